@@ -12,7 +12,10 @@ from .nodes import (
     AnimePromptBatch,
     AnimePromptCombiner,
     AnimePromptLoader,
+    AnimePromptQuery,
     AnimePromptRedNote,
+    AnimePromptSimilar,
+    CachedCLIPTextEncode,
     SuffixEditor,
 )
 
@@ -24,7 +27,10 @@ NODE_CLASS_MAPPINGS = {
     "AnimePromptBatch": AnimePromptBatch,
     "AnimePromptCombiner": AnimePromptCombiner,
     "AnimePromptRedNote": AnimePromptRedNote,
+    "AnimePromptQuery": AnimePromptQuery,
+    "AnimePromptSimilar": AnimePromptSimilar,
     "SuffixEditor": SuffixEditor,
+    "CachedCLIPTextEncode": CachedCLIPTextEncode,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -32,9 +38,23 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "AnimePromptBatch": "🎨 Anime Prompt Batch",
     "AnimePromptCombiner": "🎨 Anime Prompt Combiner",
     "AnimePromptRedNote": "🩷 RedNote Style",
+    "AnimePromptQuery": "🔎 Anime Prompt Query",
+    "AnimePromptSimilar": "🔎 Similar Characters",
     "SuffixEditor": "✨ Suffix Editor",
+    "CachedCLIPTextEncode": "⚡ Cached CLIP Text Encode",
 }
 
+# HTTP endpoints, when loaded by ComfyUI (its server module provides aiohttp)
+try:
+    from server import PromptServer
+except ImportError:
+    PromptServer = None
+
+if getattr(PromptServer, "instance", None) is not None:
+    from .api import register_routes
+
+    register_routes(PromptServer.instance.routes)
+
 __all__ = [
     "NODE_CLASS_MAPPINGS",
     "NODE_DISPLAY_NAME_MAPPINGS",
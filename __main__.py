@@ -0,0 +1,26 @@
+"""
+Command-line entry point: python -m comfyui-anime-prompts (see cli.py).
+
+Also works as `python path/to/comfyui-anime-prompts`, in which case the
+package is imported by path first so its relative imports resolve.
+"""
+
+if __package__:
+    from .cli import main
+else:
+    import importlib.util
+    import sys
+    from pathlib import Path
+
+    _package_dir = Path(__file__).resolve().parent
+    _spec = importlib.util.spec_from_file_location(
+        "anime_prompts",
+        _package_dir / "__init__.py",
+        submodule_search_locations=[str(_package_dir)],
+    )
+    _package = importlib.util.module_from_spec(_spec)
+    sys.modules[_spec.name] = _package
+    _spec.loader.exec_module(_package)
+    from anime_prompts.cli import main
+
+main()
@@ -0,0 +1,10 @@
+"""HTTP API serving prompt batches outside of workflows (requires aiohttp)."""
+
+from .routes import ENDPOINTS, ROUTE_PREFIX, create_app, register_routes
+
+__all__ = [
+    "ENDPOINTS",
+    "ROUTE_PREFIX",
+    "create_app",
+    "register_routes",
+]
@@ -0,0 +1,151 @@
+"""
+aiohttp endpoints running the batch-style nodes without a workflow.
+
+Each endpoint takes the node's inputs as query parameters and streams the
+outputs as NDJSON: first one line with the node's single-value outputs
+(e.g. the negative prompt), then one line per list item:
+
+    GET /anime_prompts/batch?prompt_file=chars.txt&batch_size=2&seed=7
+
+    {"negative": "lowres, ..."}
+    {"index": 0, "prompts": "masterpiece, ...", "token_count": 41, ...}
+    {"index": 1, "prompts": "masterpiece, ...", "token_count": 39, ...}
+
+Invalid parameters or a failed run answer 400 with {"error": message}.
+A node call is atomic (its outputs, e.g. after unique_only, and whether it
+failed are only known once it returns), so each run is computed first; its
+lines are then encoded in a worker thread and written chunk by chunk as
+they are encoded, so neither the event loop nor the response holds the
+whole body.
+
+Each endpoint keeps one node instance for all requests, so `prefetch=true`
+works across requests: a client stepping start_index by batch_size gets
+the next window computed in the background.
+
+GET /anime_prompts/prefetch reports the batch prefetch counters of the
+process: {"hits": ..., "misses": ..., "discarded": ..., "hit_rate": ...}.
+"""
+
+import asyncio
+import json
+import os
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from aiohttp import web
+
+from ..core.node_params import coerce_inputs
+from ..core.parallel import chunked
+from ..core.prefetch import prefetch_stats
+from ..nodes import AnimePromptBatch, AnimePromptQuery, AnimePromptSimilar
+
+ROUTE_PREFIX = "/anime_prompts"
+
+# Endpoint name -> node class it runs
+ENDPOINTS: dict[str, type] = {
+    "batch": AnimePromptBatch,
+    "query": AnimePromptQuery,
+    "similar": AnimePromptSimilar,
+}
+
+# Lines written to the socket per chunk while streaming
+_LINES_PER_WRITE = 64
+
+# Generation is CPU-bound; keep it off the event loop and bounded so API
+# traffic can't starve the ComfyUI server
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="anime_prompts"
+)
+
+
+def _result_lines(node_cls: type, result: tuple) -> Iterator[dict[str, Any]]:
+    """Split node outputs into a single-value line and one line per item."""
+    outputs = list(
+        zip(node_cls.RETURN_NAMES, result, node_cls.OUTPUT_IS_LIST, strict=True)
+    )
+    yield {name: value for name, value, is_list in outputs if not is_list}
+
+    lists = [(name, value) for name, value, is_list in outputs if is_list]
+    length = max((len(value) for _, value in lists), default=0)
+    for index in range(length):
+        line: dict[str, Any] = {"index": index}
+        for name, value in lists:
+            if index < len(value):
+                line[name] = value[index]
+        yield line
+
+
+def _encoded_chunks(node_cls: type, result: tuple) -> Iterator[bytes]:
+    """Encode the NDJSON lines of a result, a few lines per chunk."""
+    for lines in chunked(_result_lines(node_cls, result), _LINES_PER_WRITE):
+        payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+        yield payload.encode("utf-8")
+
+
+def _error_of(result: tuple) -> str | None:
+    """Get the message of a node's "Error: ..." result, if it is one."""
+    prompts = result[0]
+    if len(prompts) == 1 and prompts[0].startswith("Error:"):
+        return prompts[0].removeprefix("Error:").strip()
+    return None
+
+
+async def _run_node(node: Any, request: web.Request) -> web.StreamResponse:
+    node_cls = type(node)
+    try:
+        kwargs = coerce_inputs(node_cls.INPUT_TYPES(), request.query)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+    loop = asyncio.get_running_loop()
+    run = partial(getattr(node, node_cls.FUNCTION), **kwargs)
+    result = await loop.run_in_executor(_EXECUTOR, run)
+    error = _error_of(result)
+    if error is not None:
+        return web.json_response({"error": error}, status=400)
+
+    response = web.StreamResponse(
+        headers={"Content-Type": "application/x-ndjson; charset=utf-8"}
+    )
+    await response.prepare(request)
+    chunks = _encoded_chunks(node_cls, result)
+    while payload := await loop.run_in_executor(_EXECUTOR, next, chunks, None):
+        await response.write(payload)
+    await response.write_eof()
+    return response
+
+
+async def _prefetch_stats(request: web.Request) -> web.Response:
+    stats = prefetch_stats()
+    return web.json_response({**stats._asdict(), "hit_rate": stats.hit_rate})
+
+
+def _handler(node: Any) -> Callable[[web.Request], Awaitable[web.StreamResponse]]:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        return await _run_node(node, request)
+
+    return handler
+
+
+def register_routes(routes: web.RouteTableDef) -> None:
+    """
+    Add a GET endpoint per entry of ENDPOINTS, plus the prefetch counters,
+    to a route table. Each endpoint gets its own node instance.
+
+    Args:
+        routes: Route table, e.g. PromptServer.instance.routes.
+    """
+    for name, node_cls in ENDPOINTS.items():
+        routes.get(f"{ROUTE_PREFIX}/{name}")(_handler(node_cls()))
+    routes.get(f"{ROUTE_PREFIX}/prefetch")(_prefetch_stats)
+
+
+def create_app() -> web.Application:
+    """Build a standalone aiohttp app serving the endpoints."""
+    routes = web.RouteTableDef()
+    register_routes(routes)
+    app = web.Application()
+    app.add_routes(routes)
+    return app
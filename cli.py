@@ -0,0 +1,250 @@
+"""
+Generate prompts from the command line with the node code, without ComfyUI.
+
+Each subcommand runs one node with the same inputs it has in ComfyUI, given
+as --<input> options (defaults as in the node). --runs N repeats it like a
+queue that advances the node's position input after each run (start_index
+by batch_size, the Loader's index by 1, the Combiner's char_start_index by
+char_count), so run k prints exactly what the node outputs on its k-th
+queue run. Runs are independent, so large counts are spread over worker
+processes and written back in order as they finish.
+
+Usage (from the directory containing the package, e.g. custom_nodes/):
+    python -m comfyui-anime-prompts batch --prompt_file chars.txt --batch_size 50
+    python -m comfyui-anime-prompts rednote --batch_size 100 --runs 500 -o rednote.txt
+    python -m comfyui-anime-prompts loader --mode random --seed 7 --runs 20 --format jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from collections.abc import Iterator
+from typing import Any, NamedTuple, TextIO
+
+from .core.node_params import coerce_inputs
+from .core.parallel import imap_ordered
+from .nodes import (
+    AnimePromptBatch,
+    AnimePromptCombiner,
+    AnimePromptLoader,
+    AnimePromptRedNote,
+)
+
+# Use worker processes automatically from this many runs on
+PARALLEL_RUNS = 16
+
+# Inputs naming a prompt file; the CLI also accepts paths for them
+_FILE_INPUTS = frozenset({"prompt_file", "character_file", "style_file"})
+
+# Inputs that only make sense inside a running ComfyUI server
+_SKIPPED_INPUTS = frozenset({"prefetch"})
+
+
+class Command(NamedTuple):
+    """A node exposed as a subcommand and how its queue advances."""
+
+    node_cls: type
+    position: str
+    # Name of the input holding the step, or a fixed step
+    step: str | int
+
+
+COMMANDS: dict[str, Command] = {
+    "loader": Command(AnimePromptLoader, "index", 1),
+    "batch": Command(AnimePromptBatch, "start_index", "batch_size"),
+    "combiner": Command(AnimePromptCombiner, "char_start_index", "char_count"),
+    "rednote": Command(AnimePromptRedNote, "start_index", "batch_size"),
+}
+
+
+def _input_types(node_cls: type) -> dict[str, dict[str, tuple]]:
+    """The node's INPUT_TYPES with file inputs taking free text."""
+    input_types = node_cls.INPUT_TYPES()
+    for section in input_types.values():
+        for name in list(section):
+            if name in _SKIPPED_INPUTS:
+                del section[name]
+            elif name in _FILE_INPUTS:
+                section[name] = ("STRING", {"default": section[name][1]["default"]})
+    return input_types
+
+
+def _resolve_file(value: str) -> str:
+    # An existing path is used as is (absolute paths survive the node's
+    # join with the prompt directory); anything else is a prompts/ name
+    return os.path.abspath(value) if os.path.isfile(value) else value
+
+
+def run_arguments(
+    command: Command, kwargs: dict[str, Any], runs: int, seed_step: int = 0
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield the node arguments of each queue run.
+
+    Args:
+        command: Node and position input.
+        kwargs: Arguments of the first run.
+        runs: Number of runs.
+        seed_step: Added to the seed after each run (0 = fixed seed).
+    """
+    step = command.step if isinstance(command.step, int) else kwargs[command.step]
+    for run in range(runs):
+        arguments = dict(kwargs)
+        arguments[command.position] = kwargs[command.position] + run * step
+        if seed_step and "seed" in arguments:
+            arguments["seed"] = kwargs["seed"] + run * seed_step
+        yield arguments
+
+
+_nodes: dict[str, Any] = {}
+
+
+def _run_node(item: tuple[str, dict[str, Any]]) -> tuple:
+    """Run one node call (in a worker process or inline)."""
+    name, arguments = item
+    node_cls = COMMANDS[name].node_cls
+    node = _nodes.get(name)
+    if node is None:
+        node = _nodes[name] = node_cls()
+    return getattr(node, node_cls.FUNCTION)(**arguments)
+
+
+def _error_of(result: tuple) -> str | None:
+    """Get the message of a node's "Error: ..." result, if it is one."""
+    prompts = result[0]
+    if isinstance(prompts, list):
+        prompts = prompts[0] if len(prompts) == 1 else ""
+    if isinstance(prompts, str) and prompts.startswith("Error"):
+        return prompts.removeprefix("Error:").strip()
+    return None
+
+
+def write_results(
+    node_cls: type, results: Iterator[tuple], out: TextIO, fmt: str
+) -> int:
+    """
+    Write node results as they arrive.
+
+    "text" writes the prompt output(s) of each run, one per line. "jsonl"
+    writes one object per run with every output under its node name.
+
+    Returns:
+        Number of runs written.
+
+    Raises:
+        ValueError: If a run returned an error.
+    """
+    runs = 0
+    for run, result in enumerate(results):
+        error = _error_of(result)
+        if error is not None:
+            raise ValueError(f"run {run}: {error}")
+        if fmt == "jsonl":
+            line = {"run": run, **dict(zip(node_cls.RETURN_NAMES, result, strict=True))}
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        else:
+            prompts = result[0]
+            for prompt in [prompts] if isinstance(prompts, str) else prompts:
+                out.write(prompt + "\n")
+        runs += 1
+    return runs
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the parser with one subcommand per node."""
+    parser = argparse.ArgumentParser(
+        prog="python -m comfyui-anime-prompts",
+        description=__doc__.strip().splitlines()[0],
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        sub = subparsers.add_parser(
+            name, help=f"Run {command.node_cls.__name__}", allow_abbrev=False
+        )
+        inputs = sub.add_argument_group("node inputs (defaults as in the node)")
+        for section in ("required", "optional"):
+            for input_name, spec in _input_types(command.node_cls)[section].items():
+                kind = spec[0]
+                if isinstance(kind, (list, tuple)):
+                    help_text = "one of: " + ", ".join(map(str, kind))
+                elif input_name in _FILE_INPUTS:
+                    help_text = "file in prompts/ or a path"
+                else:
+                    help_text = str(kind).lower()
+                inputs.add_argument(
+                    f"--{input_name}", metavar="VALUE", help=help_text, default=None
+                )
+        sub.add_argument(
+            "--runs",
+            type=int,
+            default=1,
+            help=f"Queue runs, advancing {command.position} each time",
+        )
+        sub.add_argument(
+            "--seed-step",
+            type=int,
+            default=0,
+            help="Add this to the seed after each run (default: fixed seed)",
+        )
+        sub.add_argument("-o", "--output", help="Output file (default: stdout)")
+        sub.add_argument(
+            "--format",
+            choices=("text", "jsonl"),
+            default="text",
+            help="Prompts one per line, or every output of each run as JSON",
+        )
+        sub.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=0,
+            help=f"Processes (default: all CPUs from {PARALLEL_RUNS} runs on)",
+        )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    command = COMMANDS[args.command]
+    input_types = _input_types(command.node_cls)
+
+    params = {}
+    for section in input_types.values():
+        for name in section:
+            value = getattr(args, name)
+            if value is not None:
+                params[name] = _resolve_file(value) if name in _FILE_INPUTS else value
+    try:
+        kwargs = coerce_inputs(input_types, params)
+    except ValueError as e:
+        # stdout may be the prompt stream
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    workers = args.workers
+    if workers <= 0:
+        workers = (os.cpu_count() or 1) if args.runs >= PARALLEL_RUNS else 1
+    if kwargs.get("skip_seen") or kwargs.get("mode") == "unused_first":
+        # Runs record what they output on disk, so they run in order
+        workers = 1
+
+    items = (
+        (args.command, arguments)
+        for arguments in run_arguments(command, kwargs, args.runs, args.seed_step)
+    )
+    results = imap_ordered(_run_node, items, workers=workers)
+    try:
+        with contextlib.ExitStack() as stack:
+            out = (
+                stack.enter_context(open(args.output, "w", encoding="utf-8"))
+                if args.output
+                else sys.stdout
+            )
+            runs = write_results(command.node_cls, results, out, args.format)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.output:
+        print(f"Done. {runs} runs written to {args.output}.")
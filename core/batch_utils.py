@@ -0,0 +1,87 @@
+"""Helpers for partitioning and post-processing batch node outputs."""
+
+from collections.abc import Hashable, Sequence
+from typing import TypeVar, overload
+
+T = TypeVar("T", bound=Hashable)
+E = TypeVar("E")
+
+SHARD_MODES = ("contiguous", "strided")
+
+
+def collapse_duplicates(items: Sequence[T]) -> tuple[list[T], list[int]]:
+    """
+    Collapse exact repeats in a batch in a single linear pass.
+
+    Args:
+        items: Batch items (e.g. prompt strings), in output order.
+
+    Returns:
+        Tuple of (unique items in first-occurrence order, index map), where
+        index_map[i] is the position of items[i] in the unique list, so
+        `[unique[j] for j in index_map]` re-expands the original batch.
+    """
+    positions: dict[T, int] = {}
+    unique: list[T] = []
+    index_map: list[int] = []
+    for item in items:
+        position = positions.get(item)
+        if position is None:
+            position = positions[item] = len(unique)
+            unique.append(item)
+        index_map.append(position)
+    return unique, index_map
+
+
+def shard_indices(
+    total: int, shard_id: int, num_shards: int, mode: str = "contiguous"
+) -> range:
+    """
+    Get the indices of [0, total) that belong to one shard.
+
+    The shards of a given num_shards are disjoint and together cover every
+    index exactly once, so N workers given shard_id 0 .. N-1 split the work
+    without coordinating.
+
+    Args:
+        total: Size of the index space.
+        shard_id: This worker's shard, 0 .. num_shards - 1.
+        num_shards: Number of workers.
+        mode: "contiguous" gives each shard one block of nearly equal size;
+            "strided" deals indices round-robin (shard k gets k, k + N, ...).
+
+    Returns:
+        Increasing indices of the shard (possibly empty).
+
+    Raises:
+        ValueError: If shard_id is not in [0, num_shards) or mode is unknown.
+    """
+    if not 0 <= shard_id < num_shards:
+        raise ValueError(f"shard_id must be in [0, {num_shards})")
+    if mode == "strided":
+        return range(shard_id, total, num_shards)
+    if mode != "contiguous":
+        raise ValueError(f"mode must be one of {SHARD_MODES}")
+    return range(total * shard_id // num_shards, total * (shard_id + 1) // num_shards)
+
+
+class SubsetView(Sequence[E]):
+    """Read-only view of the items of a sequence at the given indices."""
+
+    def __init__(self, items: Sequence[E], indices: Sequence[int]) -> None:
+        self._items = items
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @overload
+    def __getitem__(self, index: int) -> E: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "SubsetView[E]": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SubsetView(self._items, self._indices[index])
+        return self._items[self._indices[index]]
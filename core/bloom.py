@@ -0,0 +1,304 @@
+"""Persistent memory-mapped Bloom filter for cross-run prompt history."""
+
+import contextlib
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from typing import TypeVar
+
+from .constants import CACHE_DIR
+from .tag_utils import tag_keys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# magic, num_bits, num_hashes, capacity, count
+_HEADER = struct.Struct("<8sQIQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"APBLOOM1"
+
+DEFAULT_CAPACITY = 100_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+HISTORY_DIR = os.path.join(CACHE_DIR, "history")
+_HISTORY_NAME_RE = re.compile(r"[^\w.-]+")
+
+T = TypeVar("T")
+
+
+def content_key(text: str) -> bytes:
+    """
+    Fingerprint prompt content independently of formatting.
+
+    Tags are normalized (case, underscores, weights) and sorted, so the
+    same prompt is recognized after its corpus is reordered, re-filtered
+    or reformatted.
+
+    Args:
+        text: Comma-separated tags.
+
+    Returns:
+        16-byte digest.
+    """
+    canonical = "\x00".join(sorted(tag_keys(text)))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+def bloom_size(capacity: int, error_rate: float) -> tuple[int, int]:
+    """
+    Get the optimal (num_bits, num_hashes) for a capacity and error rate.
+
+    Args:
+        capacity: Expected number of items.
+        error_rate: Target false-positive probability once full.
+
+    Returns:
+        Tuple of (bit count, hash count).
+    """
+    capacity = max(capacity, 1)
+    num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    """
+    Bloom filter whose bit array lives in a memory-mapped file.
+
+    Checks and inserts touch `num_hashes` bits (double hashing from one
+    BLAKE2b digest), so they are O(1) however many items were added, and
+    only the touched pages are ever read from disk. The file is created
+    sparse at full size; capacity and error rate are fixed at creation and
+    read back from the header when the file is reopened. Each insert and its
+    update of the item count in the header run under a thread lock and an
+    exclusive fcntl lock on the file (where available), so threads and
+    processes sharing a history never both add the same new item.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+    ) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            self._create(path, capacity, error_rate)
+
+        # Stays open for as long as the mapping lives
+        self._file = open(path, "r+b")  # noqa: SIM115
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            magic, num_bits, num_hashes, capacity, _ = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+        except Exception:
+            self._file.close()
+            raise
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.capacity = capacity
+
+    @staticmethod
+    def _create(path: str, capacity: int, error_rate: float) -> None:
+        num_bits, num_hashes = bloom_size(capacity, error_rate)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(
+                    _HEADER.pack(_MAGIC, num_bits, num_hashes, capacity, 0).ljust(
+                        _HEADER_SIZE, b"\0"
+                    )
+                )
+                # Extending with truncate leaves the bit array sparse on disk
+                f.truncate(_HEADER_SIZE + (num_bits + 7) // 8)
+            # Publish the complete file without ever replacing one another
+            # process created (and may already be adding to) in the meantime
+            with contextlib.suppress(FileExistsError):
+                os.link(temp_path, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+
+    def __enter__(self) -> "BloomFilter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @property
+    def count(self) -> int:
+        """Number of items added, by every process sharing the file."""
+        return _HEADER.unpack_from(self._map)[4]
+
+    def _positions(self, key: bytes) -> list[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, key: bytes) -> bool:
+        data = self._map
+        for bit in self._positions(key):
+            if not data[_HEADER_SIZE + (bit >> 3)] >> (bit & 7) & 1:
+                return False
+        return True
+
+    def add(self, key: bytes) -> bool:
+        """
+        Insert a key.
+
+        Args:
+            key: Item key, e.g. from content_key.
+
+        Returns:
+            True if the key was new (not reported as already present).
+        """
+        positions = self._positions(key)
+        with self._locked():
+            data = self._map
+            added = False
+            for bit in positions:
+                offset = _HEADER_SIZE + (bit >> 3)
+                mask = 1 << (bit & 7)
+                if not data[offset] & mask:
+                    data[offset] |= mask
+                    added = True
+            if added:
+                # Re-read under the lock: other processes add to it too
+                _HEADER.pack_into(
+                    data,
+                    0,
+                    _MAGIC,
+                    self.num_bits,
+                    self.num_hashes,
+                    self.capacity,
+                    self.count + 1,
+                )
+            return added
+
+    @property
+    def estimated_error_rate(self) -> float:
+        """False-positive probability at the current fill level."""
+        fill = 1.0 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        return fill**self.num_hashes
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file."""
+        self._map.flush()
+
+    def close(self) -> None:
+        """Flush and unmap the filter."""
+        if self._map.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._file.close()
+
+
+_HISTORIES: dict[str, BloomFilter] = {}
+_HISTORIES_LOCK = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # flock locks belong to the open file, which a forked child shares with
+    # its parent; the child must open its own to exclude the parent
+    global _HISTORIES_LOCK
+    _HISTORIES.clear()
+    _HISTORIES_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def history_path(name: str) -> str:
+    """Get the file of a named prompt history under cache/history/."""
+    safe_name = _HISTORY_NAME_RE.sub("_", name.strip()) or "default"
+    return os.path.join(HISTORY_DIR, f"{safe_name}.bloom")
+
+
+def open_history(
+    path: str,
+    capacity: int = DEFAULT_CAPACITY,
+    error_rate: float = DEFAULT_ERROR_RATE,
+) -> BloomFilter:
+    """
+    Get a process-wide shared BloomFilter for a history file.
+
+    Args:
+        path: Filter file (see history_path).
+        capacity: Capacity used if the file has to be created.
+        error_rate: Error rate used if the file has to be created.
+
+    Returns:
+        Open BloomFilter, reused across calls.
+    """
+    path = os.path.abspath(path)
+    with _HISTORIES_LOCK:
+        history = _HISTORIES.get(path)
+        if history is None:
+            history = _HISTORIES[path] = BloomFilter(path, capacity, error_rate)
+        return history
+
+
+def take_unseen(
+    candidates: Iterable[T],
+    key_of: Callable[[T], bytes],
+    history: BloomFilter,
+    limit: int,
+) -> list[T]:
+    """
+    Take up to `limit` candidates missing from a history and record them.
+
+    Candidates are scanned in order and stop being consumed once `limit`
+    are found, so the cost is O(items scanned) hash checks. Keys repeated
+    within the scan are only taken once. Each check-and-record is a single
+    add under the filter's thread and file locks, so concurrent callers
+    sharing a history, in this process or another, never take the same
+    item twice.
+
+    Args:
+        candidates: Items in preference order.
+        key_of: Maps an item to its history key (e.g. content_key).
+        history: Filter of already produced items; taken items are added.
+        limit: Maximum number of items to take.
+
+    Returns:
+        Taken items in scan order.
+    """
+    taken: list[T] = []
+    if limit <= 0:
+        return taken
+    for item in candidates:
+        if not history.add(key_of(item)):
+            continue
+        taken.append(item)
+        if len(taken) >= limit:
+            break
+    history.flush()
+    return taken
@@ -0,0 +1,69 @@
+"""Prompt layer composition shared by the prompt nodes."""
+
+from collections.abc import Sequence
+from typing import Final
+
+from .tag_utils import dedupe_tag_lists, split_tags
+from .token_utils import CLIP_CHUNK_TOKENS, estimate_tokens
+
+# Layer priorities: 0 is never dropped, higher values are dropped first
+# when a prompt exceeds its token budget.
+LAYER_REQUIRED: Final[int] = 0
+LAYER_ACTION: Final[int] = 1
+LAYER_BACKGROUND: Final[int] = 2
+LAYER_CAMERA: Final[int] = 3
+
+# Token cost of the ", " separator between layers
+_SEPARATOR_TOKENS: Final[int] = 1
+
+
+def compose_layers(
+    layers: Sequence[tuple[str, int]], max_chunks: int = 0, dedupe: bool = False
+) -> tuple[str, int]:
+    """
+    Join prompt layers into a single prompt string.
+
+    With `dedupe`, repeated tags are removed across all layers (case,
+    underscores and weights folded, highest weight kept), and the budget is
+    measured on the deduplicated prompt.
+
+    With a budget, optional layers are dropped (highest priority value first,
+    later layers first on ties) until the estimated token count fits within
+    `max_chunks` CLIP chunks. Required layers are always kept, so a prompt
+    can still exceed the budget if they alone are too long. Deduplication
+    is redone on the layers that remain after each drop, so a tag that also
+    appeared in a dropped layer is never lost.
+
+    Args:
+        layers: (text, priority) pairs in prompt order. Empty texts are skipped.
+        max_chunks: Maximum number of 75-token chunks, 0 disables the budget.
+        dedupe: Whether to remove repeated tags.
+
+    Returns:
+        Tuple of (prompt, estimated token count).
+    """
+    layers = [(text, priority) for text, priority in layers if text]
+    droppable = (
+        sorted(
+            (i for i, (_, priority) in enumerate(layers) if priority > LAYER_REQUIRED),
+            key=lambda i: (layers[i][1], i),
+            reverse=True,
+        )
+        if max_chunks > 0
+        else []
+    )
+    limit = max_chunks * CLIP_CHUNK_TOKENS
+    dropped: set[int] = set()
+    while True:
+        texts = [text for i, (text, _) in enumerate(layers) if i not in dropped]
+        if dedupe:
+            tag_lists = dedupe_tag_lists([split_tags(text) for text in texts])
+            texts = [", ".join(tags) for tags in tag_lists if tags]
+        total = sum(map(estimate_tokens, texts)) + _SEPARATOR_TOKENS * max(
+            0, len(texts) - 1
+        )
+        if total <= limit or len(dropped) == len(droppable):
+            break
+        dropped.add(droppable[len(dropped)])
+
+    return ", ".join(texts), total
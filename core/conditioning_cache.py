@@ -0,0 +1,207 @@
+"""Hash-keyed LRU cache for text-encoder conditioning outputs."""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+
+def make_cache_key(text: str, namespace: str = "") -> str:
+    """
+    Build a stable cache key for a prompt.
+
+    Args:
+        text: Prompt text passed to the encoder.
+        namespace: Encoder identity (e.g. checkpoint name) so equal prompts
+            encoded by different models never collide.
+
+    Returns:
+        Hex SHA-256 digest.
+    """
+    return hashlib.sha256(f"{namespace}\x00{text}".encode()).hexdigest()
+
+
+# Default cap on the spill directory's total size
+DEFAULT_SPILL_BYTES = 2 << 30
+
+
+class ConditioningCache:
+    """
+    In-memory LRU of encoder outputs with an optional on-disk spill.
+
+    Entries evicted from memory are pickled into `spill_dir` (when set) and
+    promoted back on the next hit, so recurring prompts survive both memory
+    pressure and restarts. The spill directory is kept under
+    `max_spill_bytes` by deleting the least recently used files. Disk reads
+    and writes run outside the lock. The encoder is any zero-argument
+    callable, which keeps the cache testable without a real CLIP model.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        spill_dir: str | None = None,
+        max_spill_bytes: int = DEFAULT_SPILL_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        # Size of the spill directory, None until it is measured
+        self._spilled_bytes: int | None = None
+        self._spill_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def configure(
+        self,
+        max_entries: int,
+        spill_dir: str | None,
+        max_spill_bytes: int = DEFAULT_SPILL_BYTES,
+    ) -> None:
+        """Update the memory and spill limits, evicting if needed."""
+        with self._lock:
+            if spill_dir != self.spill_dir:
+                self._spilled_bytes = None
+            self.max_entries = max_entries
+            self.spill_dir = spill_dir
+            self.max_spill_bytes = max_spill_bytes
+            evicted = self._evict()
+        self._spill(evicted, spill_dir)
+
+    def get_or_encode(self, key: str, encode: Callable[[], Any]) -> Any:
+        """
+        Return the cached output for `key`, encoding it on a miss.
+
+        Args:
+            key: Cache key from make_cache_key.
+            encode: Callable producing the conditioning on a miss.
+
+        Returns:
+            The cached or freshly encoded conditioning.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            spill_dir = self.spill_dir
+
+        value = self._load_spilled(key, spill_dir)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+                evicted = self._store(key, value)
+            self._spill(evicted, spill_dir)
+            return value
+
+        # Encode outside the lock so other prompts aren't blocked meanwhile
+        value = encode()
+        with self._lock:
+            self.misses += 1
+            evicted = self._store(key, value)
+        self._spill(evicted, spill_dir)
+        return value
+
+    def stats(self) -> dict[str, int | float]:
+        """Get hit/miss counters and the overall hit rate."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def _store(self, key: str, value: Any) -> list[tuple[str, Any]]:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        return self._evict()
+
+    def _evict(self) -> list[tuple[str, Any]]:
+        """Pop entries over the limit; the caller spills them unlocked."""
+        evicted = []
+        while len(self._entries) > max(self.max_entries, 0):
+            evicted.append(self._entries.popitem(last=False))
+        return evicted
+
+    def _spill(self, evicted: list[tuple[str, Any]], spill_dir: str | None) -> None:
+        if not spill_dir or not evicted:
+            return
+        for key, value in evicted:
+            path = os.path.join(spill_dir, f"{key}.pkl")
+            if os.path.exists(path):
+                continue
+            try:
+                os.makedirs(spill_dir, exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    size = f.tell()
+                os.replace(temp_path, path)
+            except (OSError, pickle.PicklingError, TypeError, AttributeError):
+                # Spilling is best-effort; the entry is simply re-encoded later
+                continue
+            with self._spill_lock:
+                if self._spilled_bytes is not None:
+                    self._spilled_bytes += size
+        self._trim_spill(spill_dir)
+
+    def _trim_spill(self, spill_dir: str) -> None:
+        """Delete the least recently used spill files over max_spill_bytes."""
+        with self._spill_lock:
+            if (
+                self._spilled_bytes is not None
+                and self._spilled_bytes <= self.max_spill_bytes
+            ):
+                return
+            files = []
+            try:
+                with os.scandir(spill_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".pkl"):
+                            with contextlib.suppress(OSError):
+                                stat = entry.stat()
+                                files.append(
+                                    (stat.st_mtime_ns, stat.st_size, entry.path)
+                                )
+            except OSError:
+                return
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_spill_bytes:
+                    break
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+                    total -= size
+            self._spilled_bytes = total
+
+    def _load_spilled(self, key: str, spill_dir: str | None) -> Any:
+        if not spill_dir:
+            return None
+        path = os.path.join(spill_dir, f"{key}.pkl")
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        # Refresh the file's recency for _trim_spill
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return value
@@ -8,6 +8,24 @@ PROMPT_DIR: Final[str] = os.path.join(
     os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "prompts"
 )
 
+# Directory for runtime caches (conditioning spill files, etc.)
+CACHE_DIR: Final[str] = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "cache"
+)
+
+# Share parsed corpora between ComfyUI processes on one host through
+# memory-mapped files (see core/shared_corpus.py); set
+# ANIME_PROMPTS_SHARED_CORPUS=1 when running one process per GPU
+SHARED_CORPUS: Final[bool] = os.environ.get(
+    "ANIME_PROMPTS_SHARED_CORPUS", ""
+).strip().lower() in ("1", "true", "yes", "on")
+
+# Extension of pre-cleaned Flux companion files (see scripts/precompile_flux.py)
+FLUX_COMPANION_EXT: Final[str] = ".flux.tsv"
+
+# Extension of imported SQLite corpora (see scripts/import_corpus_db.py)
+CORPUS_DB_EXT: Final[str] = ".db"
+
 # --- 1. CORE QUALITY TAGS ---
 QUALITY_TAGS: Final[str] = (
     "masterpiece, best quality, very aesthetic, absurdres, newest, sensitive, "
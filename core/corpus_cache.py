@@ -0,0 +1,223 @@
+"""Process-wide cache of parsed prompt corpora and structures built on them."""
+
+import itertools
+import os
+import threading
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any, TypeVar
+
+from . import shared_corpus
+from .constants import SHARED_CORPUS
+from .corpus_db import DbEntries, db_version, is_db_source
+from .file_utils import PromptEntry, parse_prompt_file
+from .rwlock import ReadWriteLock
+from .virtual_corpus import (
+    VirtualEntries,
+    count_entries,
+    file_version,
+    is_virtual_source,
+    resolve_sources,
+)
+
+T = TypeVar("T")
+
+
+class Corpus:
+    """
+    Parsed entries of one prompt file plus lazily built derived structures.
+
+    Derived structures (tag index, score arrays, ...) are built on first use
+    and live as long as the corpus stays cached, so a node pays the build
+    cost once per file version instead of once per queue run.
+
+    Lookups of built structures only take a shared read lock. Builds are
+    serialized per name, so a slow build (e.g. a similarity index) neither
+    runs twice nor blocks threads using other structures of the corpus.
+    """
+
+    def __init__(self, file_path: str, entries: Sequence[PromptEntry]) -> None:
+        self.file_path = file_path
+        self.entries = entries
+        self._derived: dict[str, Any] = {}
+        self._rwlock = ReadWriteLock()
+        self._build_locks: dict[str, threading.RLock] = {}
+        self._build_locks_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _lookup(self, name: str) -> tuple[bool, Any]:
+        with self._rwlock.read():
+            if name in self._derived:
+                return True, self._derived[name]
+        return False, None
+
+    def derived(self, name: str, build: Callable[[Sequence[PromptEntry]], T]) -> T:
+        """
+        Get a derived structure, building it from the entries on first use.
+
+        Args:
+            name: Cache slot; include any build parameters in it.
+            build: Called with the entries on a miss. It may request other
+                derived structures of the same corpus.
+
+        Returns:
+            The cached structure.
+        """
+        found, value = self._lookup(name)
+        if found:
+            return value
+
+        with self._build_locks_lock:
+            # Reentrant so a build may look up its own slot without deadlock
+            build_lock = self._build_locks.setdefault(name, threading.RLock())
+        with build_lock:
+            # Another thread may have finished the build while we waited
+            found, value = self._lookup(name)
+            if found:
+                return value
+            value = build(self.entries)
+            with self._rwlock.write():
+                self._derived[name] = value
+        return value
+
+
+class _CachedCorpus:
+    """Cache slot: a corpus, the file version it was parsed from, last use."""
+
+    __slots__ = ("version", "corpus", "last_used")
+
+    def __init__(self, version: Hashable, corpus: Corpus, tick: int) -> None:
+        self.version = version
+        self.corpus = corpus
+        self.last_used = tick
+
+
+class CorpusCache:
+    """
+    LRU of parsed corpora keyed by path.
+
+    A cached corpus is reused while the file's mtime and size are unchanged
+    and re-parsed as soon as either moves. Hits only take a shared read
+    lock (recency is a tick stamped on the slot), concurrent misses on the
+    same file parse it once, and the least recently used file is evicted
+    when a new one is inserted.
+
+    A glob pattern or .manifest source gives a virtual corpus spanning its
+    member files (see core.virtual_corpus). It is rebuilt when the set of
+    members or any member's version changes. Members are loaded on access
+    into a cache owned by the virtual corpus and sized to hold every member.
+    They neither thrash nor evict the corpus (and its derived structures)
+    from this cache, and they are released with it.
+
+    A .db source is an imported SQLite corpus (see core.corpus_db). Its rows
+    are fetched on access instead of parsed, and its connections are closed
+    when the corpus is dropped from the cache.
+
+    With `shared`, entries are memory-mapped from a packed file that every
+    process on the host shares (see core.shared_corpus) instead of being
+    parsed into a private list.
+    """
+
+    def __init__(self, max_files: int = 4, shared: bool = False) -> None:
+        self.max_files = max_files
+        self.shared = shared and shared_corpus.is_supported()
+        self._corpora: dict[str, _CachedCorpus] = {}
+        self._rwlock = ReadWriteLock()
+        self._clock = itertools.count()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._load_locks_lock = threading.Lock()
+
+    def _lookup(self, file_path: str, version: Hashable) -> Corpus | None:
+        with self._rwlock.read():
+            cached = self._corpora.get(file_path)
+            if cached is None or cached.version != version:
+                return None
+            cached.last_used = next(self._clock)
+            return cached.corpus
+
+    def get(self, file_path: str) -> Corpus:
+        """
+        Get the parsed corpus for a file, re-parsing it if it changed.
+
+        Args:
+            file_path: Path to the TXT prompt file or corpus database, or a
+                glob pattern or .manifest file for a virtual corpus.
+
+        Returns:
+            Cached or freshly parsed Corpus.
+
+        Raises:
+            FileNotFoundError: If the file does not exist (or no file matches).
+        """
+        members = None
+        if is_virtual_source(file_path):
+            members = resolve_sources(file_path)
+            version = tuple(map(file_version, members))
+            if os.path.isfile(file_path):
+                version += (file_version(file_path),)
+        elif is_db_source(file_path):
+            version = db_version(file_path)
+        else:
+            stat = os.stat(file_path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        corpus = self._lookup(file_path, version)
+        if corpus is not None:
+            return corpus
+
+        with self._load_locks_lock:
+            load_lock = self._load_locks.setdefault(file_path, threading.Lock())
+        with load_lock:
+            corpus = self._lookup(file_path, version)
+            if corpus is not None:
+                return corpus
+
+            if members is not None:
+                member_cache = CorpusCache(len(members), self.shared)
+                entries = VirtualEntries(
+                    members,
+                    [count_entries(member) for member in members],
+                    lambda member: member_cache.get(member).entries,
+                )
+            elif is_db_source(file_path):
+                entries = DbEntries(file_path)
+            elif self.shared:
+                entries = shared_corpus.attach_corpus(file_path)
+            else:
+                entries = parse_prompt_file(file_path)
+            corpus = Corpus(file_path, entries)
+            with self._rwlock.write():
+                # The previous version of this file, if any, is dropped too
+                dropped = [self._corpora.get(file_path)]
+                self._corpora[file_path] = _CachedCorpus(
+                    version, corpus, next(self._clock)
+                )
+                while len(self._corpora) > max(self.max_files, 1):
+                    oldest = min(
+                        self._corpora, key=lambda path: self._corpora[path].last_used
+                    )
+                    dropped.append(self._corpora.pop(oldest))
+        _release(dropped)
+        return corpus
+
+    def clear(self) -> None:
+        """Drop every cached corpus."""
+        with self._rwlock.write():
+            dropped = list(self._corpora.values())
+            self._corpora.clear()
+        _release(dropped)
+
+
+def _release(dropped: list[_CachedCorpus | None]) -> None:
+    """Close the database connections of corpora dropped from a cache."""
+    for cached in dropped:
+        if cached is not None and isinstance(cached.corpus.entries, DbEntries):
+            cached.corpus.entries.close()
+
+
+_CACHE = CorpusCache(shared=SHARED_CORPUS)
+
+
+def load_corpus(file_path: str) -> Corpus:
+    """Get a file's Corpus from the shared process-wide cache."""
+    return _CACHE.get(file_path)
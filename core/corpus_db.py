@@ -0,0 +1,327 @@
+"""
+SQLite storage for large prompt corpora.
+
+A TXT prompt file is imported once into a database (scripts/import_corpus_db.py)
+and then read row by row: entry i is the row with rowid i, so a node fetches
+just the entries it uses instead of parsing the whole file. An FTS5 index
+holds one token per normalized tag, so boolean tag queries run inside SQLite
+with the same matching rules as core.tag_index.
+
+Connections are opened lazily, one per thread and database. A DbEntries
+keeps its own, which close() releases when the corpus cache drops it;
+connect() serves everything else and keeps them for the life of the thread.
+"""
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import overload
+
+from .constants import CORPUS_DB_EXT
+from .file_utils import PromptEntry, iter_prompt_file
+from .parallel import chunked
+from .rwlock import ReadWriteLock
+from .tag_index import QueryParser, tokenize_query
+from .tag_utils import normalize_tag, tag_keys
+
+_SCHEMA = """
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    tags TEXT NOT NULL,
+    character_name TEXT NOT NULL
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID;
+CREATE VIRTUAL TABLE entries_fts USING fts5(tag_keys, content='', columnsize=0);
+"""
+
+_PAGE_ROWS = 4096
+
+
+def is_db_source(source: str) -> bool:
+    """Whether a corpus source is an imported SQLite database."""
+    return source.endswith(CORPUS_DB_EXT)
+
+
+def _tag_token(key: str) -> str:
+    # One alphanumeric FTS token per normalized tag, so a tag only matches
+    # itself (never a longer tag containing its words)
+    return "k" + hashlib.blake2b(key.encode("utf-8"), digest_size=10).hexdigest()
+
+
+def import_prompt_file(source_path: str, db_path: str) -> int:
+    """
+    Import a TXT prompt file into a corpus database, replacing its contents.
+
+    The import streams the file in a single transaction in WAL mode, so
+    readers keep seeing the previous contents until it commits.
+
+    Args:
+        source_path: TXT prompt file (parse_prompt_file format).
+        db_path: Database file to create or overwrite.
+
+    Returns:
+        Number of entries imported.
+
+    Raises:
+        FileNotFoundError: If the source file does not exist.
+    """
+    stat = os.stat(source_path)
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("entries_fts", "entries", "meta"):
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    connection.execute(statement)
+
+            count = 0
+            for chunk in chunked(iter_prompt_file(source_path), _PAGE_ROWS):
+                connection.executemany(
+                    "INSERT INTO entries (id, tags, character_name) VALUES (?, ?, ?)",
+                    ((i, tags, name) for i, (tags, name) in enumerate(chunk, count)),
+                )
+                connection.executemany(
+                    "INSERT INTO entries_fts (rowid, tag_keys) VALUES (?, ?)",
+                    (
+                        (i, " ".join(map(_tag_token, sorted(tag_keys(tags)))))
+                        for i, (tags, _) in enumerate(chunk, count)
+                    ),
+                )
+                count += len(chunk)
+            connection.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("count", count),
+                    ("source_size", stat.st_size),
+                    ("source_mtime_ns", stat.st_mtime_ns),
+                    ("imported_ns", time.time_ns()),
+                ],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        # Fold the log back so the database is one self-contained file
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+    return count
+
+
+# Per-thread connections: thread-local {database path: (inode, connection)}
+_local = threading.local()
+# Bumped in a forked child, whose inherited connections must not be used
+_fork_epoch = 0
+
+
+def _reset_after_fork() -> None:
+    # SQLite connections must not be used across fork; the child opens its own
+    global _local, _fork_epoch
+    _local = threading.local()
+    _fork_epoch += 1
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _open(db_path: str, inode: int | None = None) -> sqlite3.Connection:
+    connections = _local.__dict__.setdefault("connections", {})
+    opened = connections.get(db_path)
+    if opened is not None and inode in (None, opened[0]):
+        return opened[1]
+    if opened is not None:
+        # The file was replaced; drop the connection to the old one
+        opened[1].close()
+    connections[db_path] = _connect(db_path)
+    return connections[db_path][1]
+
+
+def _connect(
+    db_path: str, check_same_thread: bool = True
+) -> tuple[int, sqlite3.Connection]:
+    """Open a read-only connection; returns it with the file's inode."""
+    try:
+        inode = os.stat(db_path).st_ino
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Corpus database {db_path} not found") from None
+    connection = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    connection.execute("PRAGMA query_only=ON")
+    return inode, connection
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Get this thread's read-only connection to a corpus database.
+
+    Raises:
+        FileNotFoundError: If the database does not exist.
+    """
+    return _open(db_path)
+
+
+def db_version(db_path: str) -> tuple[int, int]:
+    """
+    Identify a database's current contents: (inode, import timestamp).
+
+    File stats alone can't tell, because readers create and remove the
+    write-ahead log; the timestamp is written by every import. If the file
+    was replaced, this thread's connection is reopened.
+
+    Raises:
+        FileNotFoundError: If the database does not exist.
+    """
+    inode = os.stat(db_path).st_ino
+    (imported,) = (
+        _open(db_path, inode)
+        .execute("SELECT value FROM meta WHERE key = 'imported_ns'")
+        .fetchone()
+    )
+    return inode, imported
+
+
+class _SqlAlgebra:
+    """Builds SQL id sets for QueryParser in place of posting lists."""
+
+    def posting(self, tag: str) -> str:
+        token = _tag_token(normalize_tag(tag)[0])
+        return (
+            "SELECT rowid AS id FROM entries_fts "
+            f"WHERE entries_fts MATCH 'tag_keys:{token}'"
+        )
+
+    def intersect(self, a: str, b: str) -> str:
+        return f"SELECT id FROM ({a}) INTERSECT SELECT id FROM ({b})"
+
+    def union(self, a: str, b: str) -> str:
+        return f"SELECT id FROM ({a}) UNION SELECT id FROM ({b})"
+
+    def complement(self, a: str) -> str:
+        return f"SELECT id FROM entries EXCEPT SELECT id FROM ({a})"
+
+
+def compile_tag_query(expression: str) -> str:
+    """
+    Translate a boolean tag query (see TagIndex.query) into SQL.
+
+    Returns:
+        SELECT statement of the matching ids in ascending order.
+
+    Raises:
+        ValueError: If the expression is malformed.
+    """
+    sql = QueryParser(_SqlAlgebra(), tokenize_query(expression)).parse()
+    return f"SELECT id FROM ({sql}) ORDER BY id"
+
+
+class DbEntries(Sequence[PromptEntry]):
+    """
+    PromptEntry sequence read from a corpus database on access.
+
+    Indexing fetches one row by rowid; slices and iteration read pages of
+    consecutive rows. Each thread uses its own connection, owned by this
+    sequence: close() releases them all at once, and a thread that reads
+    again afterwards simply opens a new one.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.path = db_path
+        self._local = threading.local()
+        self._connections: list[tuple[int, sqlite3.Connection]] = []
+        self._connections_lock = threading.Lock()
+        # Queries hold it shared, close() exclusively, so no connection is
+        # closed while another thread is reading from it
+        self._rwlock = ReadWriteLock()
+        self._generation = 0
+        with self._connection() as connection:
+            (self._count,) = connection.execute(
+                "SELECT value FROM meta WHERE key = 'count'"
+            ).fetchone()
+
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with self._rwlock.read():
+            generation = (self._generation, _fork_epoch)
+            opened = getattr(self._local, "opened", None)
+            if opened is None or opened[0] != generation:
+                # Closed from another thread by close(), or inherited by fork
+                _, connection = _connect(self.path, check_same_thread=False)
+                self._local.opened = (generation, connection)
+                with self._connections_lock:
+                    self._connections.append((_fork_epoch, connection))
+            yield self._local.opened[1]
+
+    def close(self) -> None:
+        """Close every thread's connection to the database."""
+        with self._rwlock.write():
+            self._generation += 1
+            with self._connections_lock:
+                connections, self._connections = self._connections, []
+            for epoch, connection in connections:
+                # A parent process's connections are left alone
+                if epoch == _fork_epoch:
+                    connection.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _rows(self, start: int, stop: int) -> list[PromptEntry]:
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT tags, character_name FROM entries "
+                "WHERE id >= ? AND id < ? ORDER BY id",
+                (start, stop),
+            )
+            return [PromptEntry(*row) for row in rows]
+
+    @overload
+    def __getitem__(self, index: int) -> PromptEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[PromptEntry]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                return self._rows(start, stop) if start < stop else []
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("corpus index out of range")
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT tags, character_name FROM entries WHERE id = ?", (index,)
+            ).fetchone()
+        return PromptEntry(*row)
+
+    def __iter__(self) -> Iterator[PromptEntry]:
+        for start in range(0, self._count, _PAGE_ROWS):
+            yield from self._rows(start, start + _PAGE_ROWS)
+
+    def query(self, expression: str) -> array:
+        """
+        Select entries with a boolean tag query, evaluated by SQLite.
+
+        Same syntax and tag matching as TagIndex.query.
+
+        Returns:
+            Sorted array of matching entry ids.
+
+        Raises:
+            ValueError: If the expression is malformed.
+        """
+        sql = compile_tag_query(expression)
+        with self._connection() as connection:
+            rows = connection.execute(sql)
+            return array("I", (row_id for (row_id,) in rows))
@@ -0,0 +1,152 @@
+"""Keep/purge keyword filtering for prompt corpora."""
+
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+from .file_utils import iter_line_ranges, read_line_range
+from .matcher import KeywordMatcher
+from .parallel import imap_ordered
+
+# Per-process filter built once by the pool initializer
+_worker_filter: "CorpusFilter | None" = None
+
+
+@dataclass
+class FilterStats:
+    """Line counters collected while filtering."""
+
+    total: int = 0
+    kept: int = 0
+    missing_keep: int = 0
+    dropped_by: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "FilterStats") -> None:
+        """Add another chunk's counters into this one."""
+        self.total += other.total
+        self.kept += other.kept
+        self.missing_keep += other.missing_keep
+        self.dropped_by.update(other.dropped_by)
+
+
+def load_keyword_file(file_path: str) -> list[str]:
+    """
+    Read a keyword list: one keyword per line, '#' starts a comment.
+
+    Args:
+        file_path: Path to the keyword file.
+
+    Returns:
+        Keywords in file order.
+    """
+    keywords: list[str] = []
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            keyword = line.split("#", 1)[0].strip()
+            if keyword:
+                keywords.append(keyword)
+    return keywords
+
+
+class CorpusFilter:
+    """
+    Drop corpus lines that hit a purge keyword or miss every keep keyword.
+
+    Keywords match whole words within the tags column (text before the
+    first TAB), so character names never trigger a purge.
+    """
+
+    def __init__(self, keep: Iterable[str] = (), purge: Iterable[str] = ()) -> None:
+        keep_matcher = KeywordMatcher(keep)
+        self.keep = keep_matcher if len(keep_matcher) else None
+        self.purge = KeywordMatcher(purge)
+
+    def filter_lines(self, lines: Iterable[str], stats: FilterStats) -> Iterator[str]:
+        """
+        Yield the lines that pass the filter, updating `stats` as it goes.
+
+        Args:
+            lines: Raw corpus lines (newlines are passed through untouched).
+            stats: Counters to update.
+
+        Yields:
+            Kept lines in input order.
+        """
+        keep, purge = self.keep, self.purge
+        dropped_by = stats.dropped_by
+        for line in lines:
+            stats.total += 1
+            tags = line.split("\t", 1)[0]
+
+            if keep is not None and not keep.search(tags):
+                stats.missing_keep += 1
+                continue
+
+            hits = purge.find(tags)
+            if hits:
+                # A line counts once for every purge keyword it contains
+                dropped_by.update(purge.keywords[i] for i in hits)
+                continue
+
+            stats.kept += 1
+            yield line
+
+
+def _init_worker(keep: list[str], purge: list[str]) -> None:
+    global _worker_filter
+    _worker_filter = CorpusFilter(keep=keep, purge=purge)
+
+
+def _filter_range(task: tuple[str, int, int]) -> tuple[str, FilterStats]:
+    file_path, start, end = task
+    stats = FilterStats()
+    kept = "".join(
+        _worker_filter.filter_lines(read_line_range(file_path, start, end), stats)
+    )
+    return kept, stats
+
+
+def filter_file(
+    input_file: str,
+    output_file: str,
+    keep: list[str],
+    purge: list[str],
+    workers: int | None = None,
+    chunk_bytes: int = 32 * 1024 * 1024,
+) -> FilterStats:
+    """
+    Filter a corpus file across a process pool, preserving line order.
+
+    The input is split at line boundaries into byte ranges that workers read
+    and filter independently; results are written back in range order. At
+    most two ranges per worker are in flight, so peak memory depends on
+    `chunk_bytes` and `workers`, not on the file size.
+
+    Args:
+        input_file: Corpus to filter.
+        output_file: Where to write the kept lines.
+        keep: Keep keywords (empty = keep everything not purged).
+        purge: Purge keywords.
+        workers: Number of processes (default: CPU count).
+        chunk_bytes: Target byte size of each range.
+
+    Returns:
+        Combined FilterStats of all ranges.
+    """
+    stats = FilterStats()
+    tasks = (
+        (input_file, start, end)
+        for start, end in iter_line_ranges(input_file, chunk_bytes)
+    )
+    results = imap_ordered(
+        _filter_range,
+        tasks,
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(keep, purge),
+    )
+    with open(output_file, "w", encoding="utf-8", newline="") as f_out:
+        for kept, chunk_stats in results:
+            f_out.write(kept)
+            stats.merge(chunk_stats)
+    return stats
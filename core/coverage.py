@@ -0,0 +1,239 @@
+"""
+Persistent memory-mapped coverage bitmaps for exhaustive corpus selection.
+
+A coverage map holds one bit per corpus entry, set once the entry has been
+used. It lives in a file under cache/coverage/, so it survives restarts and
+is shared by every workflow and process using the same corpus. Taking the
+next unused entry scans 64-bit words for the first one that isn't full
+(find-first-zero), starting from a cursor stored in the file: every word
+before the cursor is full, so a whole lap over the corpus costs O(1)
+amortized per entry.
+"""
+
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from .constants import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# magic, num_bits, used, cursor (first word that may hold a zero), laps
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"APCOVER1"
+_FULL_WORD = (1 << 64) - 1
+
+COVERAGE_DIR = os.path.join(CACHE_DIR, "coverage")
+
+
+class CoverageTake(NamedTuple):
+    """An entry taken from a coverage map and the state after taking it."""
+
+    index: int
+    # Entries still unused in the current lap
+    remaining: int
+    # Completed laps over the whole corpus
+    laps: int
+
+
+def coverage_path(source: str, size: int) -> str:
+    """
+    Get the coverage file of a corpus under cache/coverage/.
+
+    The key is the corpus path and its entry count, so editing entries in
+    place keeps the coverage while adding or removing entries (which shifts
+    indices) starts a new map.
+    """
+    key = f"{os.path.abspath(source)}\0{size}"
+    name = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+    return os.path.join(COVERAGE_DIR, f"{name}.coverage")
+
+
+class CoverageMap:
+    """
+    Bitmap of used corpus entries in a memory-mapped file.
+
+    The bit array is a sequence of native-endian 64-bit words after a
+    64-byte header. Bits past the corpus size are set at creation, so the
+    last word needs no special case. Every read-modify-write runs under a
+    thread lock and an exclusive fcntl lock on the file (where available),
+    so concurrent threads and processes never take the same entry twice.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        if size <= 0:
+            raise ValueError("Coverage size must be positive")
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            self._create(path, size)
+
+        # Stays open for as long as the mapping lives
+        self._file = open(path, "r+b")  # noqa: SIM115
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            magic, num_bits, *_ = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a coverage file")
+            if num_bits != size:
+                raise ValueError(f"{path} covers {num_bits} entries, expected {size}")
+        except Exception:
+            self._file.close()
+            raise
+        self.size = size
+        self._words = memoryview(self._map)[_HEADER_SIZE:].cast("Q")
+
+    @staticmethod
+    def _create(path: str, size: int) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        num_words = (size + 63) // 64
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, size, 0, 0, 0).ljust(_HEADER_SIZE, b"\0"))
+                f.write(bytes(8 * (num_words - 1)))
+                f.write(_padding_word(size).to_bytes(8, sys.byteorder))
+            # Publish the complete file without ever replacing one another
+            # process created (and may already be marking) in the meantime
+            with contextlib.suppress(FileExistsError):
+                os.link(temp_path, path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+
+    def __enter__(self) -> "CoverageMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _header(self) -> tuple[int, int, int]:
+        _, _, used, cursor, laps = _HEADER.unpack_from(self._map)
+        return used, cursor, laps
+
+    def _write_header(self, used: int, cursor: int, laps: int) -> None:
+        _HEADER.pack_into(self._map, 0, _MAGIC, self.size, used, cursor, laps)
+
+    def _clear(self) -> None:
+        self._map[_HEADER_SIZE:] = bytes(len(self._map) - _HEADER_SIZE)
+        self._words[-1] = _padding_word(self.size)
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self._words[index >> 6] >> (index & 63) & 1)
+
+    def take(self) -> CoverageTake:
+        """
+        Take the lowest unused entry and mark it used.
+
+        When every entry has been used, the map is cleared and a new lap
+        starts from entry 0.
+
+        Returns:
+            CoverageTake of the entry, remaining count and lap count.
+        """
+        with self._locked():
+            used, cursor, laps = self._header()
+            if used >= self.size:
+                self._clear()
+                used, cursor, laps = 0, 0, laps + 1
+
+            words = self._words
+            while words[cursor] == _FULL_WORD:
+                cursor += 1
+            word = words[cursor]
+            # Lowest zero bit: ~word & (word + 1) isolates it
+            bit = (~word & (word + 1)).bit_length() - 1
+            words[cursor] = word | (1 << bit)
+            used += 1
+            self._write_header(used, cursor, laps)
+            return CoverageTake(cursor * 64 + bit, self.size - used, laps)
+
+    def remaining(self) -> int:
+        """Number of entries unused in the current lap."""
+        with self._locked():
+            used, _, _ = self._header()
+            return self.size - used
+
+    def reset(self) -> None:
+        """Mark every entry unused and the lap count zero."""
+        with self._locked():
+            self._clear()
+            self._write_header(0, 0, 0)
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file."""
+        self._map.flush()
+
+    def close(self) -> None:
+        """Flush and unmap the coverage map."""
+        if self._map.closed:
+            return
+        self._words.release()
+        self.flush()
+        self._map.close()
+        self._file.close()
+
+
+def _padding_word(size: int) -> int:
+    """Last word of a map with the bits past `size` set."""
+    tail = size % 64
+    return _FULL_WORD ^ ((1 << tail) - 1) if tail else 0
+
+
+_COVERAGES: dict[str, CoverageMap] = {}
+_COVERAGES_LOCK = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # flock locks belong to the open file, which a forked child shares with
+    # its parent; the child must open its own to exclude the parent
+    global _COVERAGES_LOCK
+    _COVERAGES.clear()
+    _COVERAGES_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def open_coverage(source: str, size: int) -> CoverageMap:
+    """
+    Get the process-wide shared CoverageMap of a corpus.
+
+    Args:
+        source: Corpus path (as passed to load_corpus).
+        size: Number of entries in the corpus.
+
+    Returns:
+        Open CoverageMap, reused across calls.
+    """
+    path = coverage_path(source, size)
+    with _COVERAGES_LOCK:
+        coverage = _COVERAGES.get(path)
+        if coverage is None:
+            coverage = _COVERAGES[path] = CoverageMap(path, size)
+        return coverage
@@ -1,9 +1,14 @@
 """File utilities for parsing prompt files."""
 
+import io
 import os
+from collections.abc import Iterator
 from typing import NamedTuple
 
-from .constants import PROMPT_DIR
+from .constants import CORPUS_DB_EXT, FLUX_COMPANION_EXT, PROMPT_DIR
+
+# First line of a Flux companion file, followed by the source file size
+_FLUX_HEADER = "#flux-companion"
 
 
 class PromptEntry(NamedTuple):
@@ -27,6 +32,68 @@ def get_available_txt_files() -> list[str]:
         return ["No TXT files found"]
 
 
+def get_available_corpus_files() -> list[str]:
+    """
+    Get list of TXT files and imported corpus databases in the prompt directory.
+
+    Returns:
+        TXT filenames followed by database filenames. Returns
+        ["No TXT files found"] if neither exists.
+    """
+    try:
+        names = os.listdir(PROMPT_DIR)
+    except OSError:
+        return ["No TXT files found"]
+    files = [f for f in names if f.endswith(".txt")]
+    files += sorted(f for f in names if f.endswith(CORPUS_DB_EXT))
+    return files if files else ["No TXT files found"]
+
+
+def parse_prompt_line(line: str) -> PromptEntry | None:
+    """
+    Parse a single TXT line into a PromptEntry.
+
+    Args:
+        line: Raw line from a prompt file.
+
+    Returns:
+        PromptEntry, or None if the line is blank.
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    if "\t" in line:
+        parts = line.split("\t", 1)
+        tags = parts[0].strip()
+        char_name = parts[1].strip() if len(parts) > 1 else ""
+    else:
+        tags = line
+        char_name = ""
+
+    return PromptEntry(tags=tags, character_name=char_name)
+
+
+def iter_prompt_file(file_path: str) -> Iterator[PromptEntry]:
+    """
+    Stream PromptEntry objects from a TXT prompt file.
+
+    Same format and rules as parse_prompt_file, without holding the whole
+    file in memory.
+
+    Args:
+        file_path: Absolute path to the TXT file.
+
+    Yields:
+        PromptEntry tuples in file order.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            entry = parse_prompt_line(line)
+            if entry is not None:
+                yield entry
+
+
 def parse_prompt_file(file_path: str) -> list[PromptEntry]:
     """
     Parse a TXT prompt file into a list of PromptEntry objects.
@@ -44,25 +111,52 @@ def parse_prompt_file(file_path: str) -> list[PromptEntry]:
         FileNotFoundError: If the file doesn't exist.
         IOError: If the file can't be read.
     """
-    prompts: list[PromptEntry] = []
+    return list(iter_prompt_file(file_path))
 
-    with open(file_path, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
 
-            if "\t" in line:
-                parts = line.split("\t", 1)
-                tags = parts[0].strip()
-                char_name = parts[1].strip() if len(parts) > 1 else ""
-            else:
-                tags = line
-                char_name = ""
+def iter_line_ranges(file_path: str, chunk_bytes: int) -> Iterator[tuple[int, int]]:
+    """
+    Split a file into byte ranges that start and end on line boundaries.
 
-            prompts.append(PromptEntry(tags=tags, character_name=char_name))
+    Only the file size and one line per boundary are read, so splitting is
+    cheap for files of any size.
 
-    return prompts
+    Args:
+        file_path: Path to the file.
+        chunk_bytes: Target size of each range; ranges end at the first
+            newline after this many bytes.
+
+    Yields:
+        (start, end) byte offsets covering the whole file, in order.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + max(chunk_bytes, 1), size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+def read_line_range(file_path: str, start: int, end: int) -> list[str]:
+    """
+    Read the lines inside a byte range produced by iter_line_ranges.
+
+    Args:
+        file_path: Path to the UTF-8 file.
+        start: First byte of the range.
+        end: Byte after the last line of the range.
+
+    Returns:
+        Lines with their line endings.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # BytesIO splits on b"\n" only, exactly like iterating the text file
+    return [line.decode("utf-8") for line in io.BytesIO(data)]
 
 
 def apply_suffix(tags: str, suffix: str, force_comma: bool = True) -> str:
@@ -100,3 +194,118 @@ def get_prompt_file_path(filename: str) -> str:
         Absolute path to the file.
     """
     return os.path.join(PROMPT_DIR, filename)
+
+
+def is_within_directory(path: str, directory: str) -> bool:
+    """
+    Whether a path stays inside a directory once symlinks and ".." resolve.
+
+    Args:
+        path: File path or glob pattern (wildcards are kept literally).
+        directory: Directory the path must not escape.
+    """
+    real_directory = os.path.realpath(directory)
+    real_path = os.path.realpath(path)
+    return os.path.commonpath([real_directory, real_path]) == real_directory
+
+
+def get_corpus_source(prompt_file: str, prompt_glob: str = "") -> str:
+    """
+    Get the corpus a node reads: one prompt file, or several via a glob.
+
+    Args:
+        prompt_file: Prompt file name selected in the node.
+        prompt_glob: Optional glob pattern (e.g. "chars_*.txt") or .manifest
+            file name; overrides prompt_file when set.
+
+    Returns:
+        Absolute file path, glob pattern or manifest path for load_corpus.
+
+    Raises:
+        PermissionError: If prompt_glob points outside the prompts directory
+            (an absolute path or one climbing out with "..").
+    """
+    pattern = prompt_glob.strip()
+    if pattern:
+        source = os.path.join(PROMPT_DIR, pattern)
+        if not is_within_directory(source, PROMPT_DIR):
+            raise PermissionError(f"{pattern} is outside the prompts directory")
+        return source
+    return get_prompt_file_path(prompt_file)
+
+
+def get_flux_companion_path(file_path: str) -> str:
+    """
+    Get the path of the pre-cleaned Flux companion for a prompt file.
+
+    The companion uses a non-.txt extension so it never shows up in the
+    prompt file dropdowns.
+
+    Args:
+        file_path: Absolute path to the TXT prompt file.
+
+    Returns:
+        Absolute path to the companion file.
+    """
+    return os.path.splitext(file_path)[0] + FLUX_COMPANION_EXT
+
+
+def write_flux_companion(
+    file_path: str, lines: Iterator[str], source_stat: os.stat_result
+) -> int:
+    """
+    Atomically write a Flux companion file.
+
+    Args:
+        file_path: Destination path of the companion file.
+        lines: Pre-cleaned "tags<TAB>character_name" lines, in corpus order.
+        source_stat: os.stat of the source TXT file, taken before reading it;
+            its size and mtime are recorded to detect later edits.
+
+    Returns:
+        Number of entries written.
+    """
+    count = 0
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(f"{_FLUX_HEADER}\t{source_stat.st_size}\t{source_stat.st_mtime_ns}\n")
+        for line in lines:
+            f.write(line + "\n")
+            count += 1
+    os.replace(temp_path, file_path)
+    return count
+
+
+def load_flux_companion(
+    file_path: str, expected_count: int
+) -> list[PromptEntry] | None:
+    """
+    Load the pre-cleaned Flux companion of a prompt file, if it is current.
+
+    A companion is only used when it was built from a source of the same
+    size and modification time and holds exactly one entry per corpus entry.
+
+    Args:
+        file_path: Absolute path to the TXT prompt file.
+        expected_count: Number of entries parsed from the TXT file.
+
+    Returns:
+        List of cleaned PromptEntry tuples, or None if missing or stale.
+    """
+    companion_path = get_flux_companion_path(file_path)
+    try:
+        stat = os.stat(file_path)
+        with open(companion_path, encoding="utf-8") as f:
+            header = f.readline().rstrip("\n").split("\t")
+            if header != [_FLUX_HEADER, str(stat.st_size), str(stat.st_mtime_ns)]:
+                return None
+
+            # Cleaned lines may legitimately be empty, so no blank-line skipping
+            entries: list[PromptEntry] = []
+            for line in f:
+                tags, _, char_name = line.rstrip("\n").partition("\t")
+                entries.append(PromptEntry(tags=tags, character_name=char_name))
+    except OSError:
+        return None
+
+    return entries if len(entries) == expected_count else None
@@ -0,0 +1,206 @@
+"""
+Plan/render prompt generation shared by the batch-style nodes.
+
+Generation is split in two phases so it can run concurrently:
+
+- plan: every random draw for a batch is made up front, in item order,
+  from a per-call random.Random(seed). No module-level random state is
+  touched, so concurrent calls can't disturb each other's sequences.
+- render: each item is composed from its plan with pure functions, so
+  large batches can be rendered in parallel chunks and still come out
+  identical to the serial path.
+"""
+
+import os
+import random
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import NamedTuple, TypeVar
+
+from .composer import (
+    LAYER_ACTION,
+    LAYER_BACKGROUND,
+    LAYER_CAMERA,
+    LAYER_REQUIRED,
+    compose_layers,
+)
+from .constants import ACTIONS, BACKGROUNDS, CAMERA_EFFECTS
+from .parallel import chunked
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Batches smaller than this are always rendered serially; thread start-up
+# would cost more than it saves
+PARALLEL_THRESHOLD = 256
+_RENDER_CHUNK = 64
+
+
+class LayerDraw(NamedTuple):
+    """Random layers drawn for one prompt (None = layer disabled)."""
+
+    action: str | None
+    background: str | None
+    camera: str | None
+
+
+def draw_layers(
+    rng: random.Random,
+    count: int,
+    random_action: bool,
+    random_background: bool,
+    random_camera: bool,
+) -> list[LayerDraw]:
+    """
+    Plan the random action/background/camera layers of a batch.
+
+    Draws happen in the same order as the original per-item loop (action,
+    background, camera for item 0, then item 1, ...), so a given seed keeps
+    producing the same prompts.
+
+    Args:
+        rng: Per-call generator.
+        count: Number of prompts.
+        random_action: Whether to draw actions.
+        random_background: Whether to draw backgrounds.
+        random_camera: Whether to draw camera effects.
+
+    Returns:
+        One LayerDraw per prompt.
+    """
+    draws: list[LayerDraw] = []
+    for _ in range(count):
+        action = rng.choice(ACTIONS) if random_action else None
+        background = rng.choice(BACKGROUNDS) if random_background else None
+        camera = rng.choice(CAMERA_EFFECTS) if random_camera else None
+        draws.append(LayerDraw(action, background, camera))
+    return draws
+
+
+def clean_custom(custom_positive: str) -> str:
+    """Strip whitespace and leading commas from a custom positive prompt."""
+    return custom_positive.strip().lstrip(",").strip()
+
+
+def render_prompt(
+    head: Sequence[str],
+    draw: LayerDraw,
+    custom: str = "",
+    token_budget: int = 0,
+    dedupe_tags: bool = False,
+) -> tuple[str, int]:
+    """
+    Compose one prompt: required head layers + drawn layers + custom tags.
+
+    Args:
+        head: Required texts in order (quality, style, character, ...);
+            empty texts are skipped.
+        draw: Planned random layers.
+        custom: Cleaned custom positive prompt (see clean_custom).
+        token_budget: Max CLIP chunks, 0 = unlimited.
+        dedupe_tags: Whether to remove repeated tags.
+
+    Returns:
+        Tuple of (prompt, estimated token count).
+    """
+    layers = [(text, LAYER_REQUIRED) for text in head if text]
+    if draw.action is not None:
+        layers.append((draw.action, LAYER_ACTION))
+    if draw.background is not None:
+        layers.append((draw.background, LAYER_BACKGROUND))
+    if draw.camera is not None:
+        layers.append((draw.camera, LAYER_CAMERA))
+    if custom:
+        layers.append((custom, LAYER_REQUIRED))
+    return compose_layers(layers, token_budget, dedupe_tags)
+
+
+def _render_chunk(func: Callable[[T], R], chunk: list[T]) -> list[R]:
+    return [func(item) for item in chunk]
+
+
+def render_all(func: Callable[[T], R], items: Sequence[T], threads: int = 0) -> list[R]:
+    """
+    Apply a pure render function to every item, optionally in threads.
+
+    With `threads` > 1 and at least PARALLEL_THRESHOLD items, items are
+    rendered in fixed-size chunks on a thread pool and reassembled in
+    order, so the result is identical to the serial path.
+
+    Args:
+        func: Pure function of one item.
+        items: Planned items.
+        threads: Worker threads, 0 or 1 = serial, -1 = one per CPU.
+
+    Returns:
+        func(item) for each item, in order.
+    """
+    if threads < 0:
+        threads = os.cpu_count() or 1
+    if threads <= 1 or len(items) < PARALLEL_THRESHOLD:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        chunks = pool.map(partial(_render_chunk, func), chunked(items, _RENDER_CHUNK))
+        return [result for chunk in chunks for result in chunk]
+
+
+def generate_prompts(
+    heads: Sequence[Sequence[str]],
+    seed: int,
+    random_action: bool,
+    random_background: bool,
+    random_camera: bool,
+    custom_positive: str = "",
+    token_budget: int = 0,
+    dedupe_tags: bool = False,
+    threads: int = 0,
+    positions: Sequence[int] | None = None,
+) -> tuple[list[str], list[int]]:
+    """
+    Plan and render a batch of prompts.
+
+    By default prompt i gets the i-th draws of the seed. With `positions`,
+    prompt i gets the draws of position positions[i] of the full run
+    instead, so a subset (e.g. one shard) renders exactly as it would
+    inside the full batch.
+
+    Args:
+        heads: Required layer texts of each prompt, in batch order.
+        seed: Seed of this call's private random.Random.
+        random_action: Whether to add random actions.
+        random_background: Whether to add random backgrounds.
+        random_camera: Whether to add random camera effects.
+        custom_positive: Custom positive prompt appended to each.
+        token_budget: Max CLIP chunks per prompt, 0 = unlimited.
+        dedupe_tags: Whether to remove repeated tags.
+        threads: Render threads for large batches (see render_all).
+        positions: Position of each prompt in the full run.
+
+    Returns:
+        Tuple of (prompts, token counts).
+    """
+    rng = random.Random(seed)
+    count = len(heads) if positions is None else max(positions, default=-1) + 1
+    draws = draw_layers(rng, count, random_action, random_background, random_camera)
+    if positions is not None:
+        draws = [draws[position] for position in positions]
+    render = partial(
+        _render_planned,
+        custom=clean_custom(custom_positive),
+        token_budget=token_budget,
+        dedupe_tags=dedupe_tags,
+    )
+    rendered = render_all(render, list(zip(heads, draws, strict=True)), threads)
+    return [prompt for prompt, _ in rendered], [count for _, count in rendered]
+
+
+def _render_planned(
+    planned: tuple[Sequence[str], LayerDraw],
+    custom: str,
+    token_budget: int,
+    dedupe_tags: bool,
+) -> tuple[str, int]:
+    head, draw = planned
+    return render_prompt(head, draw, custom, token_budget, dedupe_tags)
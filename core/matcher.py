@@ -0,0 +1,130 @@
+"""Multi-keyword matching over tag text with an Aho-Corasick automaton."""
+
+import re
+from collections import deque
+from collections.abc import Iterable
+
+# Words inside tags, plus the comma that separates tags
+_TOKEN_RE = re.compile(r"[^\W_]+|,")
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def _words(text: str) -> tuple[str, ...]:
+    return tuple(_WORD_RE.findall(text.lower()))
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Fold a keyword the way KeywordMatcher does ("Blue_Hair" -> "blue hair").
+
+    Args:
+        keyword: Keyword text.
+
+    Returns:
+        Lowercase words joined by single spaces ("" if there are none).
+    """
+    return " ".join(_words(keyword))
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton that finds many keywords in one pass per line.
+
+    The automaton runs over words rather than characters, so a keyword only
+    matches whole words ("red" never hits "tired", "hat" never hits "that")
+    and never spans two tags. Case and underscores are folded, so
+    "Blue_Hair" matches the keyword "blue hair".
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: list[str] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+
+        seen: set[tuple[str, ...]] = set()
+        for keyword in keywords:
+            words = _words(keyword)
+            if not words or words in seen:
+                continue
+            seen.add(words)
+            self._insert(words, len(self.keywords))
+            self.keywords.append(normalize_keyword(keyword))
+
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _insert(self, words: tuple[str, ...], index: int) -> None:
+        state = 0
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][word] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] += (index,)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(word, 0)
+                # Merge outputs so each state reports every keyword ending there
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> set[int]:
+        """
+        Find every keyword present in the text.
+
+        Args:
+            text: Comma-separated tags.
+
+        Returns:
+            Indices into `self.keywords` of the keywords found.
+        """
+        found: set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token == ",":
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def search(self, text: str) -> bool:
+        """
+        Check whether any keyword is present, stopping at the first match.
+
+        Args:
+            text: Comma-separated tags.
+
+        Returns:
+            True if at least one keyword matches.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token == ",":
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                return True
+        return False
@@ -0,0 +1,345 @@
+"""MinHash signatures and LSH banding for near-duplicate tag sets."""
+
+import hashlib
+import random
+from array import array
+from collections.abc import Iterable
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import eq
+
+from .file_utils import iter_line_ranges, read_line_range
+from .parallel import imap_ordered
+from .tag_utils import tag_keys
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = 0xFFFFFFFF
+
+# Per-process hasher built once by the pool initializer
+_worker_hasher: "MinHasher | None" = None
+
+
+def tag_shingles(tags: str) -> set[str]:
+    """
+    Turn a tag string into its set of normalized tags.
+
+    Tag order, case, underscores and weights are ignored, so entries that
+    only differ in those respects get identical shingle sets.
+
+    Args:
+        tags: Comma-separated tags.
+
+    Returns:
+        Set of normalized tag keys.
+    """
+    return tag_keys(tags)
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """
+    Pick (bands, rows) so the LSH S-curve turns near the Jaccard threshold.
+
+    The probability that two sets of similarity s share a band is
+    1 - (1 - s^rows)^bands, whose midpoint is roughly (1/bands)^(1/rows).
+    The closest midpoint at or below the threshold is chosen, favoring
+    recall; candidates are verified against their signatures afterwards.
+
+    Args:
+        threshold: Target Jaccard similarity (0-1).
+        num_perm: Signature length.
+
+    Returns:
+        Tuple of (bands, rows) with bands * rows == num_perm.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    midpoints = [((1 / b) ** (1 / r), b, r) for b, r in options]
+    below = [m for m in midpoints if m[0] <= threshold]
+    _, bands, rows = max(below) if below else min(midpoints)
+    return bands, rows
+
+
+class MinHasher:
+    """
+    Compute fixed-length MinHash signatures of tag sets.
+
+    Each distinct tag's permuted hash vector is memoized, so a signature is
+    just the element-wise minimum of cached vectors; corpora reuse the same
+    few thousand tags, which keeps hashing cost per line tiny.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._empty = array("I", [_MAX_HASH] * num_perm)
+        self._tag_vector = lru_cache(maxsize=16384)(self._compute_tag_vector)
+
+    def _compute_tag_vector(self, tag: str) -> tuple[int, ...]:
+        x = int.from_bytes(
+            hashlib.blake2b(tag.encode(), digest_size=8).digest(), "little"
+        )
+        # Tuples iterate faster than arrays in the element-wise min below
+        return tuple(
+            ((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in self._params
+        )
+
+    def signature(self, shingles: Iterable[str]) -> array:
+        """
+        Compute the MinHash signature of a shingle set.
+
+        Args:
+            shingles: Normalized tags (see tag_shingles).
+
+        Returns:
+            array('I') of length num_perm.
+        """
+        vectors = [self._tag_vector(tag) for tag in shingles]
+        if not vectors:
+            return array("I", self._empty)
+        if len(vectors) == 1:
+            return array("I", vectors[0])
+        return array("I", map(min, *vectors))
+
+
+def estimate_jaccard(sig_a: array, sig_b: array) -> float:
+    """
+    Estimate Jaccard similarity as the fraction of equal signature slots.
+
+    Args:
+        sig_a: First signature.
+        sig_b: Second signature of the same length.
+
+    Returns:
+        Estimated similarity in [0, 1].
+    """
+    return sum(map(eq, sig_a, sig_b)) / len(sig_a)
+
+
+class LSHIndex:
+    """
+    Banded LSH index over MinHash signatures.
+
+    Signatures are stored in one flat array('I') and each band bucket holds
+    a single int until a second item lands in it, keeping per-item memory
+    to roughly `num_perm * 4` bytes plus one dict slot per band.
+    """
+
+    def __init__(self, num_perm: int, bands: int) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._signatures = array("I")
+        self._buckets: dict[int, int | list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures) // self.num_perm
+
+    def _band_keys(self, signature: array) -> list[int]:
+        rows = self.rows
+        # Tuple hashes of ints are stable across processes (no hash salting)
+        return [
+            hash((band, tuple(signature[band * rows : (band + 1) * rows])))
+            for band in range(self.bands)
+        ]
+
+    def add(self, signature: array) -> int:
+        """
+        Store a signature and register it in its band buckets.
+
+        Args:
+            signature: MinHash signature of length num_perm.
+
+        Returns:
+            Item id (insertion order, starting at 0).
+        """
+        item_id = len(self)
+        self._signatures.extend(signature)
+        buckets = self._buckets
+        for key in self._band_keys(signature):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = item_id
+            elif isinstance(bucket, int):
+                buckets[key] = [bucket, item_id]
+            else:
+                bucket.append(item_id)
+        return item_id
+
+    def candidates(self, signature: array) -> set[int]:
+        """
+        Get the ids of items sharing at least one band with the signature.
+
+        Args:
+            signature: Query signature.
+
+        Returns:
+            Set of candidate item ids.
+        """
+        found: set[int] = set()
+        buckets = self._buckets
+        for key in self._band_keys(signature):
+            bucket = buckets.get(key)
+            if bucket is None:
+                continue
+            if isinstance(bucket, int):
+                found.add(bucket)
+            else:
+                found.update(bucket)
+        return found
+
+    def get_signature(self, item_id: int) -> array:
+        """Get the stored signature of an item."""
+        start = item_id * self.num_perm
+        return self._signatures[start : start + self.num_perm]
+
+    def similarity(self, signature: array, item_id: int) -> float:
+        """Estimate the Jaccard similarity between a signature and an item."""
+        return estimate_jaccard(signature, self.get_signature(item_id))
+
+
+class NearDuplicateFinder:
+    """
+    Streaming near-duplicate detection over tag sets.
+
+    Only the first entry of each cluster (its representative) is indexed,
+    so memory grows with the number of distinct clusters, not with the
+    number of lines, and line text is never kept.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64) -> None:
+        self.threshold = threshold
+        bands, _ = lsh_params(threshold, num_perm)
+        self.index = LSHIndex(num_perm, bands)
+        self._representatives: list[int] = []
+
+    def assign(self, signature: array, line_id: int) -> int:
+        """
+        Assign an entry to a cluster, creating one if nothing is similar.
+
+        Args:
+            signature: MinHash signature of the entry.
+            line_id: Caller's id for the entry (e.g. line number).
+
+        Returns:
+            line_id of the cluster representative (the entry's own id if it
+            starts a new cluster).
+        """
+        best_id = -1
+        best_similarity = self.threshold
+        for item_id in self.index.candidates(signature):
+            similarity = self.index.similarity(signature, item_id)
+            if similarity >= best_similarity:
+                best_id, best_similarity = item_id, similarity
+
+        if best_id >= 0:
+            return self._representatives[best_id]
+
+        self.index.add(signature)
+        self._representatives.append(line_id)
+        return line_id
+
+
+@dataclass
+class DedupeStats:
+    """Line counters collected while deduplicating."""
+
+    total: int = 0
+    kept: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.total - self.kept
+
+
+def _init_worker(num_perm: int, seed: int) -> None:
+    global _worker_hasher
+    _worker_hasher = MinHasher(num_perm=num_perm, seed=seed)
+
+
+def _sign_range(task: tuple[str, int, int]) -> array:
+    file_path, start, end = task
+    signatures = array("I")
+    for line in read_line_range(file_path, start, end):
+        if line.strip():
+            tags = line.split("\t", 1)[0]
+            signatures.extend(_worker_hasher.signature(tag_shingles(tags)))
+    return signatures
+
+
+def dedupe_file(
+    input_file: str,
+    output_file: str | None = None,
+    clusters_file: str | None = None,
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    seed: int = 1,
+    workers: int | None = None,
+    chunk_bytes: int = 32 * 1024 * 1024,
+) -> DedupeStats:
+    """
+    Drop near-duplicate lines from a corpus, keeping the first of each cluster.
+
+    Signatures are computed for line-aligned byte ranges in a process pool;
+    clustering then runs in one streaming pass in file order, so the output
+    is deterministic for any number of workers. Blank lines are skipped.
+
+    Args:
+        input_file: Corpus to deduplicate.
+        output_file: Where to write the kept lines (None = don't write).
+        clusters_file: Where to write `line<TAB>representative_line` for
+            every dropped line, 1-based (None = don't write).
+        threshold: Jaccard similarity at which two tag sets are duplicates.
+        num_perm: MinHash signature length (higher = more accurate, slower).
+        seed: Seed of the hash permutations.
+        workers: Number of processes (default: CPU count).
+        chunk_bytes: Target byte size of each range.
+
+    Returns:
+        DedupeStats with total and kept line counts.
+    """
+    stats = DedupeStats()
+    finder = NearDuplicateFinder(threshold=threshold, num_perm=num_perm)
+    ranges = list(iter_line_ranges(input_file, chunk_bytes))
+    results = imap_ordered(
+        _sign_range,
+        ((input_file, start, end) for start, end in ranges),
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(num_perm, seed),
+    )
+
+    with ExitStack() as stack:
+        f_out = f_clusters = None
+        if output_file:
+            f_out = stack.enter_context(
+                open(output_file, "w", encoding="utf-8", newline="")
+            )
+        if clusters_file:
+            f_clusters = stack.enter_context(open(clusters_file, "w", encoding="utf-8"))
+
+        line_no = 0
+        for (start, end), signatures in zip(ranges, results, strict=True):
+            offset = 0
+            for line in read_line_range(input_file, start, end):
+                line_no += 1
+                if not line.strip():
+                    continue
+                signature = signatures[offset : offset + num_perm]
+                offset += num_perm
+                stats.total += 1
+
+                representative = finder.assign(signature, line_no)
+                if representative == line_no:
+                    stats.kept += 1
+                    if f_out is not None:
+                        f_out.write(line)
+                elif f_clusters is not None:
+                    f_clusters.write(f"{line_no}\t{representative}\n")
+    return stats
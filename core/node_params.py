@@ -0,0 +1,77 @@
+"""Convert text parameters (query strings, CLI flags) to node arguments."""
+
+from collections.abc import Mapping
+from typing import Any
+
+_TRUE = frozenset({"1", "true", "yes", "on"})
+_FALSE = frozenset({"0", "false", "no", "off"})
+
+
+def _coerce(name: str, kind: Any, options: dict[str, Any], text: str) -> Any:
+    if isinstance(kind, (list, tuple)):
+        if text not in kind:
+            raise ValueError(f"{name} must be one of: {', '.join(map(str, kind))}")
+        return text
+    if kind == "STRING":
+        return text
+    if kind == "BOOLEAN":
+        lowered = text.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+        raise ValueError(f"{name} must be true or false")
+    if kind in ("INT", "FLOAT"):
+        try:
+            value = int(text) if kind == "INT" else float(text)
+        except ValueError:
+            raise ValueError(f"{name} must be a number") from None
+        low, high = options.get("min"), options.get("max")
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f"{name} must be between {low} and {high}")
+        return value
+    raise ValueError(f"{name} ({kind}) can't be set from text")
+
+
+def coerce_inputs(
+    input_types: Mapping[str, Mapping[str, tuple]], params: Mapping[str, str]
+) -> dict[str, Any]:
+    """
+    Build node keyword arguments from text values, as ComfyUI would.
+
+    Values are validated against the node's INPUT_TYPES: combo inputs must
+    be one of their choices, numbers must parse and respect min/max, and
+    booleans accept true/false, 1/0, yes/no or on/off. Inputs left out
+    take their declared default.
+
+    Args:
+        input_types: Result of the node's INPUT_TYPES().
+        params: Input name -> text value.
+
+    Returns:
+        Keyword arguments for the node's FUNCTION.
+
+    Raises:
+        ValueError: On an unknown input, a bad value, or a missing required
+            input without a default.
+    """
+    specs = {
+        name: (section, spec)
+        for section in ("required", "optional")
+        for name, spec in input_types.get(section, {}).items()
+    }
+    unknown = sorted(set(params) - set(specs))
+    if unknown:
+        raise ValueError(f"Unknown parameter: {', '.join(unknown)}")
+
+    kwargs: dict[str, Any] = {}
+    for name, (section, spec) in specs.items():
+        kind = spec[0]
+        options = spec[1] if len(spec) > 1 else {}
+        if name in params:
+            kwargs[name] = _coerce(name, kind, options, params[name])
+        elif "default" in options:
+            kwargs[name] = options["default"]
+        elif section == "required":
+            raise ValueError(f"Missing parameter: {name}")
+    return kwargs
@@ -0,0 +1,72 @@
+"""Process pool helpers for offline corpus tools."""
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Split an iterable into lists of at most `size` items.
+
+    Args:
+        items: Items to group.
+        size: Maximum number of items per chunk.
+
+    Yields:
+        Consecutive chunks in input order.
+    """
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def imap_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int | None = None,
+    max_pending: int | None = None,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+) -> Iterator[R]:
+    """
+    Map a function over items in a process pool, yielding results in order.
+
+    Unlike Pool.imap, at most `max_pending` tasks are in flight at once, so
+    memory stays bounded however long the input is.
+
+    Args:
+        func: Picklable top-level function to apply.
+        items: Picklable work items.
+        workers: Number of processes. Defaults to the CPU count; 1 runs inline.
+        max_pending: Maximum submitted but unconsumed tasks (default 2x workers).
+        initializer: Optional per-process setup (also run once when inline).
+        initargs: Arguments for `initializer`.
+
+    Yields:
+        func(item) for each item, in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        yield from map(func, items)
+        return
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
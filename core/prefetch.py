@@ -0,0 +1,207 @@
+"""Background computation of the next batch window of a node."""
+
+import functools
+import inspect
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, NamedTuple, TypeVar
+
+R = TypeVar("R")
+
+# One thread: prefetching only has to finish before the next queue run,
+# and must not compete with the run in progress for more than one core
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anime_prefetch")
+
+
+def _reset_after_fork() -> None:
+    # The parent's worker thread doesn't exist in a forked child
+    global _EXECUTOR
+    _EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anime_prefetch")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class PrefetchStats(NamedTuple):
+    """Counters of a prefetcher (or the sum over all of them)."""
+
+    hits: int = 0
+    misses: int = 0
+    # Windows computed or queued, then dropped unused
+    discarded: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of windows served from the prefetch cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class WindowPrefetcher:
+    """
+    Serve window k of a stream, then compute window k + 1 in the background.
+
+    A stream is everything that determines the output except the window's
+    start position. Results are kept in a small LRU keyed by start
+    position; when a call arrives with a different stream, queued work for
+    the old one is cancelled and its results are discarded.
+    """
+
+    def __init__(self, max_windows: int = 2) -> None:
+        self.max_windows = max_windows
+        self._stream: Hashable = None
+        self._windows: OrderedDict[int, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._discarded = 0
+        _PREFETCHERS.add(self)
+
+    def _drop(self, future: Future) -> None:
+        # A window already running can't be stopped; it is just never served
+        future.cancel()
+        self._discarded += 1
+
+    def get(
+        self,
+        stream: Hashable,
+        start: int,
+        step: int,
+        compute: Callable[[int], R],
+    ) -> R:
+        """
+        Get the window at `start` and start computing the one at start + step.
+
+        Args:
+            stream: Hashable identity of every input but the position.
+            start: Position of the requested window.
+            step: Distance to the next window (e.g. the batch size).
+            compute: Builds the window at a given position; must depend on
+                nothing but the stream and the position.
+
+        Returns:
+            compute(start), prefetched if it was scheduled earlier.
+        """
+        with self._lock:
+            if stream != self._stream:
+                for future in self._windows.values():
+                    self._drop(future)
+                self._windows.clear()
+                self._stream = stream
+            future = self._windows.pop(start, None)
+
+        result: Any = None
+        if future is not None:
+            try:
+                result = future.result()
+            except CancelledError:
+                future = None
+            except Exception:
+                # Recompute in the caller so the error surfaces normally
+                future = None
+        with self._lock:
+            if future is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        if future is None:
+            result = compute(start)
+
+        with self._lock:
+            following = start + step
+            if stream == self._stream and following not in self._windows:
+                self._windows[following] = _EXECUTOR.submit(compute, following)
+                while len(self._windows) > max(self.max_windows, 1):
+                    _, oldest = self._windows.popitem(last=False)
+                    self._drop(oldest)
+        return result
+
+    def cancel(self) -> None:
+        """Drop every queued or finished window."""
+        with self._lock:
+            for future in self._windows.values():
+                self._drop(future)
+            self._windows.clear()
+            self._stream = None
+
+    def stats(self) -> PrefetchStats:
+        """Get this prefetcher's counters."""
+        with self._lock:
+            return PrefetchStats(self._hits, self._misses, self._discarded)
+
+
+_PREFETCHERS: "weakref.WeakSet[WindowPrefetcher]" = weakref.WeakSet()
+
+
+def prefetch_stats() -> PrefetchStats:
+    """Get the counters summed over every live prefetcher."""
+    totals = PrefetchStats()
+    for prefetcher in list(_PREFETCHERS):
+        stats = prefetcher.stats()
+        totals = PrefetchStats(*map(sum, zip(totals, stats, strict=True)))
+    return totals
+
+
+def prefetch_windows(
+    source_of: Callable[[dict[str, Any]], Hashable],
+    position: str = "start_index",
+    step: str = "batch_size",
+    bypass_if: Callable[[dict[str, Any]], bool] | None = None,
+) -> Callable[[Callable[..., R]], Callable[..., R]]:
+    """
+    Decorate a node function with an opt-in `prefetch` input.
+
+    With prefetch=True, the call is served through a WindowPrefetcher of the
+    node instance: the stream is the function's other arguments plus
+    `source_of(arguments)` (e.g. the loaded corpus, so an edited file starts
+    a new stream), and the window advances by the `step` argument.
+
+    Args:
+        source_of: Identity of the data the call reads. If it raises
+            OSError, the call runs without prefetching and reports the error
+            itself.
+        position: Argument holding the window's start.
+        step: Argument holding the window size.
+        bypass_if: Arguments for which the call must run in the foreground,
+            e.g. when it records state that a prefetch would corrupt.
+    """
+
+    def decorate(function: Callable[..., R]) -> Callable[..., R]:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(self, *args: Any, prefetch: bool = False, **kwargs: Any) -> R:
+            if not prefetch:
+                return function(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["self"]
+            if bypass_if is not None and bypass_if(arguments):
+                return function(self, **arguments)
+            try:
+                source = source_of(arguments)
+            except (OSError, ValueError):
+                return function(self, **arguments)
+
+            prefetcher = self.__dict__.get("_prefetcher")
+            if prefetcher is None:
+                prefetcher = self.__dict__["_prefetcher"] = WindowPrefetcher()
+            stream = (
+                function.__name__,
+                source,
+                tuple(sorted((k, v) for k, v in arguments.items() if k != position)),
+            )
+            return prefetcher.get(
+                stream,
+                arguments[position],
+                arguments[step],
+                lambda start: function(self, **{**arguments, position: start}),
+            )
+
+        return wrapper
+
+    return decorate
@@ -2,8 +2,15 @@
 RedNote (XiaoHongShu) Aesthetic Utilities - ARCHITECT PURE COMBINER MATCH.
 """
 
+import heapq
+import math
+from array import array
+from collections.abc import Sequence
 from typing import Final
 
+from .file_utils import PromptEntry
+from .matcher import KeywordMatcher, normalize_keyword
+
 # --- 1. CLEAN NEGATIVE PROMPT ---
 # Base Quality Negatives (Can be swapped if preset has own negatives)
 REDNOTE_NEG_BASE: Final[str] = (
@@ -73,12 +80,139 @@ def apply_rednote_style(positive: str, negative: str) -> tuple[str, str]:
     return positive + REDNOTE_POSITIVE_SUFFIX, negative + ", " + REDNOTE_NEGATIVE_SUFFIX
 
 
-def filter_characters(*args, **kwargs):
-    return []
-
+# --- 5. AESTHETIC CHARACTER SELECTION ---
+# Tag keywords that fit the RedNote look, with their score contribution.
+# Keywords match whole words inside a tag ("pink" hits "pink hair").
+AESTHETIC_KEYWORDS: Final[dict[str, float]] = {
+    "pink": 1.0,
+    "pastel": 1.5,
+    "white hair": 1.0,
+    "silver hair": 1.0,
+    "light purple hair": 1.0,
+    "long hair": 0.5,
+    "very long hair": 0.5,
+    "wavy hair": 1.0,
+    "curly hair": 1.0,
+    "drill hair": 1.0,
+    "twintails": 0.5,
+    "hair ribbon": 1.0,
+    "hair bow": 1.0,
+    "ribbon": 0.5,
+    "bow": 0.5,
+    "frills": 1.0,
+    "lace": 1.0,
+    "dress": 0.5,
+    "white dress": 1.0,
+    "maid": 0.5,
+    "flower": 0.5,
+    "hair flower": 1.0,
+    "hair ornament": 0.5,
+    "blue eyes": 0.5,
+    "purple eyes": 0.5,
+    "sad": 0.5,
+    "small breasts": 1.0,
+    "flat chest": 1.0,
+}
+
+# Tag keywords that clash with the RedNote safety negatives; any hit excludes
+# the entry from aesthetic selection
+EXCLUDE_KEYWORDS: Final[dict[str, float]] = {
+    keyword: float("inf")
+    for keyword in (
+        "large breasts",
+        "huge breasts",
+        "gigantic breasts",
+        "cleavage",
+        "muscular",
+        "muscle",
+        "abs",
+        "mecha",
+        "armor",
+        "blood",
+        "guro",
+        "skeleton",
+        "nsfw",
+        "nude",
+        "loli",
+        "child",
+    )
+}
+
+
+def score_entries(
+    entries: Sequence[PromptEntry],
+    aesthetic: dict[str, float] = AESTHETIC_KEYWORDS,
+    exclude: dict[str, float] = EXCLUDE_KEYWORDS,
+) -> array:
+    """
+    Score every entry's tags against weighted keyword lists in one pass.
+
+    All keywords are compiled into one KeywordMatcher; each keyword counts
+    once per entry. Exclude weights are subtracted, so the default infinite
+    penalties mark an entry as excluded (-inf).
+
+    Args:
+        entries: Corpus entries to score.
+        aesthetic: Keyword -> weight added when present.
+        exclude: Keyword -> penalty subtracted when present.
+
+    Returns:
+        array('d') of scores, aligned with `entries`.
+    """
+    weights: dict[str, float] = {}
+    for keyword, weight in aesthetic.items():
+        key = normalize_keyword(keyword)
+        weights[key] = weights.get(key, 0.0) + weight
+    for keyword, penalty in exclude.items():
+        key = normalize_keyword(keyword)
+        weights[key] = weights.get(key, 0.0) - penalty
+    weights.pop("", None)
+
+    matcher = KeywordMatcher(weights)
+    keyword_weights = [weights[keyword] for keyword in matcher.keywords]
+
+    scores = array("d", bytes(8 * len(entries)))
+    for entry_id, entry in enumerate(entries):
+        found = matcher.find(entry.tags)
+        if found:
+            scores[entry_id] = sum(keyword_weights[i] for i in found)
+    return scores
+
+
+def filter_characters(
+    entries: Sequence[PromptEntry],
+    top_n: int = 0,
+    min_score: float | None = None,
+    scores: Sequence[float] | None = None,
+) -> list[int]:
+    """
+    Select the best-scoring entries without sorting the whole corpus.
+
+    Excluded entries (score -inf) are never selected. With `top_n`, a heap
+    keeps the N best in O(len * log N); with `min_score`, every entry at or
+    above the threshold is kept. Both may be combined.
+
+    Args:
+        entries: Corpus entries.
+        top_n: Number of entries to keep, 0 = no limit.
+        min_score: Minimum score to keep, None = no threshold.
+        scores: Precomputed score_entries() result (e.g. cached with the
+            corpus); computed on the fly when omitted.
+
+    Returns:
+        Entry indices, best first (ties keep corpus order).
+    """
+    if scores is None:
+        scores = score_entries(entries)
+
+    floor = -math.inf if min_score is None else min_score
+    candidates = (
+        i for i, score in enumerate(scores) if score >= floor and score != -math.inf
+    )
+    if top_n > 0:
+        return heapq.nsmallest(top_n, candidates, key=lambda i: (-scores[i], i))
+    return sorted(candidates, key=lambda i: (-scores[i], i))
 
-AESTHETIC_KEYWORDS = []
-EXCLUDE_KEYWORDS = []
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,86 @@
+"""Streaming random sampling over corpora of unknown length."""
+
+import heapq
+import math
+import random
+from collections.abc import Iterable
+from itertools import islice
+from typing import TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def _open_uniform(rng: random.Random) -> float:
+    """Draw from the open interval (0, 1) so logarithms stay finite."""
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def reservoir_sample(items: Iterable[T], k: int, rng: random.Random) -> list[T]:
+    """
+    Uniformly sample k items in one pass with O(k) memory (Algorithm L).
+
+    Instead of drawing a random number per item, Algorithm L draws how many
+    items to skip, so the cost is O(k log(n/k)) random draws and skipped
+    items are consumed without being inspected.
+
+    Args:
+        items: Any iterable, e.g. lines of a file.
+        k: Sample size.
+        rng: Seeded random generator for reproducible samples.
+
+    Returns:
+        Up to k items (all of them if there are fewer than k).
+    """
+    iterator = iter(items)
+    reservoir = list(islice(iterator, k))
+    if k <= 0 or len(reservoir) < k:
+        return reservoir
+
+    w = math.exp(math.log(_open_uniform(rng)) / k)
+    while True:
+        skip = math.floor(math.log(_open_uniform(rng)) / math.log(1.0 - w))
+        item = next(islice(iterator, skip, skip + 1), _MISSING)
+        if item is _MISSING:
+            return reservoir
+        reservoir[rng.randrange(k)] = item
+        w *= math.exp(math.log(_open_uniform(rng)) / k)
+
+
+def weighted_reservoir_sample(
+    items: Iterable[tuple[T, float]], k: int, rng: random.Random
+) -> list[T]:
+    """
+    Sample k items with probability proportional to weight (A-Res).
+
+    Each item gets the key u ** (1 / weight) and the k largest keys are kept
+    in a min-heap; keys are compared in log space for numerical stability.
+    Items with a non-positive weight are never selected.
+
+    Args:
+        items: (item, weight) pairs.
+        k: Sample size.
+        rng: Seeded random generator for reproducible samples.
+
+    Returns:
+        Up to k items, highest key first.
+    """
+    if k <= 0:
+        return []
+
+    heap: list[tuple[float, int, T]] = []
+    for position, (item, weight) in enumerate(items):
+        if weight <= 0:
+            continue
+        key = math.log(_open_uniform(rng)) / weight
+        entry = (key, position, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    return [item for _, _, item in sorted(heap, reverse=True)]
@@ -0,0 +1,276 @@
+"""
+Parsed prompt corpora shared read-only between processes.
+
+A corpus is packed once into a file under cache/shared/ (a UTF-8 blob of
+every tags and character_name field, followed by an offset table) and then
+memory-mapped read-only by every process that needs it. The mapping is
+backed by the OS page cache, so N ComfyUI processes on one host hold one
+copy of the corpus instead of N parsed copies; entries are decoded on
+access.
+
+A small JSON registry, guarded by an exclusive file lock, records which
+processes have each packed file attached. A file is deleted when its last
+process detaches, and entries of dead processes are pruned on every
+registry access, so crashed processes don't leak files. Sharing needs
+fcntl file locks and is unavailable on Windows (is_supported()).
+"""
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import overload
+
+from .constants import CACHE_DIR
+from .file_utils import PromptEntry, iter_prompt_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SHARED_DIR = os.path.join(CACHE_DIR, "shared")
+_REGISTRY_FILE = "registry.json"
+_LOCK_FILE = "registry.lock"
+
+# magic, entry count, offset table position
+_HEADER = struct.Struct("<8sQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"APCORP01"
+
+
+def is_supported() -> bool:
+    """Whether this platform can share corpora between processes."""
+    return fcntl is not None
+
+
+def pack_corpus(source_path: str, packed_path: str) -> int:
+    """
+    Write the packed form of a TXT prompt file.
+
+    Fields are streamed into the blob, so memory stays at 16 bytes of
+    offsets per entry however large the corpus is.
+
+    Args:
+        source_path: TXT prompt file.
+        packed_path: File to create (written atomically).
+
+    Returns:
+        Number of entries.
+    """
+    # Entry i spans fields 2i (tags) and 2i + 1 (name); field j covers
+    # bytes offsets[j] .. offsets[j + 1] of the blob
+    offsets = array("Q", [0])
+    temp_path = f"{packed_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(bytes(_HEADER_SIZE))
+        position = 0
+        for entry in iter_prompt_file(source_path):
+            for field in entry:
+                data = field.encode("utf-8")
+                f.write(data)
+                position += len(data)
+                offsets.append(position)
+        # Align the table so it can be cast to 64-bit ints in place
+        table_at = _HEADER_SIZE + position
+        padding = -table_at % 8
+        f.write(bytes(padding))
+        table_at += padding
+        offsets.tofile(f)
+        f.seek(0)
+        count = (len(offsets) - 1) // 2
+        f.write(_HEADER.pack(_MAGIC, count, table_at))
+    os.replace(temp_path, packed_path)
+    return count
+
+
+class PackedEntries(Sequence[PromptEntry]):
+    """
+    Read-only PromptEntry sequence over a memory-mapped packed corpus.
+
+    Nothing is decoded up front; each access decodes one entry from the
+    shared mapping.
+    """
+
+    def __init__(self, packed_path: str) -> None:
+        self.path = packed_path
+        with open(packed_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, table_at = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{packed_path} is not a packed corpus")
+        self._count = count
+        self._blob = memoryview(self._map)[_HEADER_SIZE:table_at]
+        self._offsets = memoryview(self._map)[table_at:].cast("Q")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, index: int) -> PromptEntry:
+        offsets = self._offsets
+        start, middle, end = (
+            offsets[2 * index],
+            offsets[2 * index + 1],
+            offsets[2 * index + 2],
+        )
+        blob = self._blob
+        return PromptEntry(
+            str(blob[start:middle], "utf-8"), str(blob[middle:end], "utf-8")
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> PromptEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[PromptEntry]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("corpus index out of range")
+        return self._entry(index)
+
+    def __iter__(self) -> Iterator[PromptEntry]:
+        for index in range(self._count):
+            yield self._entry(index)
+
+    def close(self) -> None:
+        """Unmap the corpus; entries can no longer be read."""
+        if self._map.closed:
+            return
+        self._blob.release()
+        self._offsets.release()
+        self._map.close()
+
+
+@contextlib.contextmanager
+def _registry() -> Iterator[dict[str, list[int]]]:
+    """Lock the registry and yield {packed file name: attached pids}."""
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    with open(os.path.join(SHARED_DIR, _LOCK_FILE), "a+b") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        registry_path = os.path.join(SHARED_DIR, _REGISTRY_FILE)
+        try:
+            with open(registry_path, encoding="utf-8") as f:
+                registry = json.load(f)
+        except (OSError, ValueError):
+            registry = {}
+
+        _prune(registry)
+        yield registry
+
+        temp_path = registry_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(registry, f)
+        os.replace(temp_path, registry_path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _prune(registry: dict[str, list[int]]) -> None:
+    """Forget dead processes and delete files no live process uses."""
+    for name, pids in list(registry.items()):
+        alive = [pid for pid in pids if _pid_alive(pid)]
+        if alive:
+            registry[name] = alive
+        else:
+            del registry[name]
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(SHARED_DIR, name))
+
+
+def packed_name(file_path: str) -> str:
+    """Get the packed file name of a prompt file's current version."""
+    stat = os.stat(file_path)
+    key = f"{os.path.realpath(file_path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + ".corpus"
+
+
+# Mappings attached by this process: packed file name -> live PackedEntries
+_attached: weakref.WeakValueDictionary[str, PackedEntries] = (
+    weakref.WeakValueDictionary()
+)
+_attached_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # A forked child must register itself rather than reuse the parent's
+    # attachments (their finalizers only ever detach the current pid)
+    global _attached_lock
+    _attached.clear()
+    _attached_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _detach(name: str) -> None:
+    """Drop this process from a file's registry entry (finalizer)."""
+    with contextlib.suppress(OSError), _registry() as registry:
+        pids = registry.get(name)
+        if pids is not None:
+            registry[name] = [pid for pid in pids if pid != os.getpid()]
+            # Deletes the file if this was the last process using it
+            _prune(registry)
+
+
+def attach_corpus(file_path: str) -> PackedEntries:
+    """
+    Get a shared read-only view of a prompt file's entries.
+
+    The first process to ask for a file version packs it; every later
+    caller, in any process, maps the existing file. Within a process the
+    same mapping is reused while anything references it. When the last
+    reference goes away (or the process exits), the process detaches and
+    the file is deleted if no other process still uses it.
+
+    Args:
+        file_path: TXT prompt file.
+
+    Returns:
+        PackedEntries in file order.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        RuntimeError: If sharing is not supported on this platform.
+    """
+    if not is_supported():
+        raise RuntimeError("Shared corpora need fcntl file locks")
+    name = packed_name(file_path)
+    with _attached_lock:
+        entries = _attached.get(name)
+        if entries is not None:
+            return entries
+
+        with _registry() as registry:
+            packed_path = os.path.join(SHARED_DIR, name)
+            if name not in registry or not os.path.exists(packed_path):
+                pack_corpus(file_path, packed_path)
+            entries = PackedEntries(packed_path)
+            pids = registry.setdefault(name, [])
+            if os.getpid() not in pids:
+                pids.append(os.getpid())
+
+        _attached[name] = entries
+        # Also runs at interpreter exit
+        weakref.finalize(entries, _detach, name)
+        return entries
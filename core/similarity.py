@@ -0,0 +1,132 @@
+"""Top-K tag-set similarity search over a prompt corpus."""
+
+import heapq
+from collections.abc import Sequence
+from itertools import islice
+
+from .file_utils import PromptEntry
+from .minhash import LSHIndex, MinHasher, tag_shingles
+from .tag_index import Matches, TagIndex
+
+# 8 bands of 4 rows: pairs at Jaccard 0.5 collide ~40% of the time, 0.7 ~90%,
+# while typical unrelated entries (~0.15) almost never do
+_NUM_PERM = 32
+_BANDS = 8
+
+# Candidates re-ranked by exact Jaccard, as a multiple of k
+_RERANK_FACTOR = 4
+
+# Cap on fallback candidates gathered from tag postings, as a multiple of k
+_FALLBACK_FACTOR = 32
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    """Exact Jaccard similarity of two tag sets (0.0 when both are empty)."""
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index for "more like this" lookups over entry tag sets.
+
+    A query only scores the entries that share an LSH band with it, ranks
+    them by estimated Jaccard, then re-ranks the best few by exact Jaccard.
+    If fewer than k entries collide (no close neighbours exist), candidates
+    are topped up from the inverted tag index, rarest query tag first, so
+    the query still touches only a bounded slice of the corpus.
+    """
+
+    def __init__(
+        self, tag_texts: Sequence[str], tag_index: TagIndex | None = None
+    ) -> None:
+        self._tag_texts = tag_texts
+        if tag_index is None:
+            tag_index = TagIndex.build(tag_texts)
+        self._tag_index = tag_index
+        self._hasher = MinHasher(num_perm=_NUM_PERM)
+        self._lsh = LSHIndex(_NUM_PERM, _BANDS)
+        for text in tag_texts:
+            self._lsh.add(self._hasher.signature(tag_shingles(text)))
+
+    def __len__(self) -> int:
+        return len(self._lsh)
+
+    @classmethod
+    def from_entries(
+        cls, entries: list[PromptEntry], tag_index: TagIndex | None = None
+    ) -> "SimilarityIndex":
+        """
+        Build an index over the tags column of parsed entries.
+
+        Args:
+            entries: Parsed corpus entries.
+            tag_index: Existing TagIndex of the same entries to share.
+
+        Returns:
+            New SimilarityIndex.
+        """
+        return cls([entry.tags for entry in entries], tag_index)
+
+    def similar_to_entry(self, entry_id: int, k: int) -> list[tuple[int, float]]:
+        """
+        Find the entries most similar to an entry of the corpus.
+
+        Args:
+            entry_id: Index of the seed entry (excluded from the results).
+            k: Number of results.
+
+        Returns:
+            (entry id, Jaccard similarity) pairs, most similar first.
+        """
+        return self._search(tag_shingles(self._tag_texts[entry_id]), k, entry_id)
+
+    def similar_to_tags(self, tags: str, k: int) -> list[tuple[int, float]]:
+        """
+        Find the entries most similar to a free-text tag list.
+
+        Args:
+            tags: Comma-separated tags.
+            k: Number of results.
+
+        Returns:
+            (entry id, Jaccard similarity) pairs, most similar first.
+        """
+        return self._search(tag_shingles(tags), k, exclude=-1)
+
+    def _search(
+        self, shingles: set[str], k: int, exclude: int
+    ) -> list[tuple[int, float]]:
+        if k <= 0 or not shingles:
+            return []
+        signature = self._hasher.signature(shingles)
+        candidates = self._lsh.candidates(signature)
+        candidates.discard(exclude)
+        if len(candidates) < k:
+            self._add_tag_neighbours(candidates, shingles, k * _FALLBACK_FACTOR)
+            candidates.discard(exclude)
+
+        shortlist = heapq.nlargest(
+            k * _RERANK_FACTOR,
+            candidates,
+            key=lambda item: (self._lsh.similarity(signature, item), -item),
+        )
+        scored = [
+            (item, jaccard(shingles, tag_shingles(self._tag_texts[item])))
+            for item in shortlist
+        ]
+        return heapq.nlargest(k, scored, key=lambda pair: (pair[1], -pair[0]))
+
+    def _add_tag_neighbours(
+        self, candidates: set[int], shingles: set[str], limit: int
+    ) -> None:
+        """Add entries sharing a query tag, rarest tags first, up to `limit`."""
+        size = len(self._lsh)
+        postings = sorted(
+            (Matches(self._tag_index.posting(tag), size) for tag in shingles),
+            key=len,
+        )
+        for matches in postings:
+            if len(candidates) >= limit:
+                break
+            candidates.update(islice(matches, limit - len(candidates)))
@@ -0,0 +1,167 @@
+"""Stratified entry selection for balanced batches."""
+
+import random
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
+from itertools import accumulate
+
+from .file_utils import PromptEntry
+from .tag_utils import normalize_tag, split_tags
+
+# Dimension -> stratum -> tags that put an entry in that stratum.
+# An entry joins the stratum of its first tag listed here; entries with
+# none of the tags go to "other".
+STRATA_DIMENSIONS: dict[str, dict[str, tuple[str, ...]]] = {
+    "hair_color": {
+        "black": ("black hair",),
+        "brown": ("brown hair", "light brown hair"),
+        "blonde": ("blonde hair",),
+        "red": ("red hair", "orange hair"),
+        "pink": ("pink hair",),
+        "purple": ("purple hair", "light purple hair"),
+        "blue": ("blue hair", "light blue hair", "dark blue hair"),
+        "aqua": ("aqua hair",),
+        "green": ("green hair",),
+        "silver": ("white hair", "silver hair", "grey hair"),
+        "multicolored": ("multicolored hair", "two-tone hair", "gradient hair"),
+    },
+    "eye_color": {
+        "red": ("red eyes",),
+        "blue": ("blue eyes", "aqua eyes"),
+        "green": ("green eyes",),
+        "yellow": ("yellow eyes", "orange eyes"),
+        "purple": ("purple eyes",),
+        "brown": ("brown eyes",),
+        "pink": ("pink eyes",),
+        "grey": ("grey eyes",),
+        "heterochromia": ("heterochromia",),
+    },
+    "hair_length": {
+        "short": ("short hair",),
+        "medium": ("medium hair",),
+        "long": ("long hair",),
+        "very long": ("very long hair", "absurdly long hair"),
+    },
+    "outfit": {
+        "uniform": ("school uniform", "serafuku", "military uniform"),
+        "dress": ("dress", "white dress", "black dress"),
+        "maid": ("maid", "maid headdress"),
+        "traditional": ("japanese clothes", "kimono", "chinese clothes"),
+        "swimsuit": ("swimsuit", "bikini"),
+        "armor": ("armor",),
+        "magical girl": ("magical girl",),
+        "casual": ("shirt", "hoodie", "jacket", "skirt"),
+    },
+}
+
+STRATA_MODES = ("round_robin", "proportional")
+
+# Golden-ratio step of the low-discrepancy proportional schedule
+_GOLDEN_STEP = 0.6180339887498949
+
+
+class StrataIndex:
+    """
+    Entries bucketed by one tag dimension, for O(1) stratified draws.
+
+    Bucketing happens once at build time; drawing a batch then costs
+    O(batch_size): each position maps to a stratum (round-robin, or by a
+    golden-ratio schedule that spreads strata in proportion to their size)
+    and to a member of that stratum chosen from the seed and position.
+    """
+
+    def __init__(self, labels: list[str], members: list[array]) -> None:
+        self.labels = labels
+        self.members = members
+        sizes = [len(ids) for ids in members]
+        total = sum(sizes) or 1
+        # Upper bound of each stratum's share of [0, 1)
+        self._bounds = [count / total for count in accumulate(sizes)]
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    @classmethod
+    def build(cls, tag_texts: Iterable[str], dimension: str) -> "StrataIndex":
+        """
+        Bucket entries by a dimension of STRATA_DIMENSIONS.
+
+        Args:
+            tag_texts: Comma-separated tags per entry, in corpus order.
+            dimension: Key of STRATA_DIMENSIONS.
+
+        Returns:
+            StrataIndex with empty strata dropped.
+        """
+        strata = STRATA_DIMENSIONS[dimension]
+        labels = [*strata, "other"]
+        stratum_of = {
+            normalize_tag(tag)[0]: position
+            for position, tags in enumerate(strata.values())
+            for tag in tags
+        }
+        other = len(labels) - 1
+        members = [array("I") for _ in labels]
+
+        for entry_id, text in enumerate(tag_texts):
+            stratum = other
+            for tag in split_tags(text):
+                found = stratum_of.get(normalize_tag(tag)[0])
+                if found is not None:
+                    stratum = found
+                    break
+            members[stratum].append(entry_id)
+
+        kept = [i for i, ids in enumerate(members) if ids]
+        return cls([labels[i] for i in kept], [members[i] for i in kept])
+
+    @classmethod
+    def from_entries(
+        cls, entries: Sequence[PromptEntry], dimension: str
+    ) -> "StrataIndex":
+        """Bucket parsed entries by the tags column."""
+        return cls.build((entry.tags for entry in entries), dimension)
+
+    def stratum_at(self, position: int, mode: str = "round_robin") -> int:
+        """
+        Get the stratum drawn at a batch position.
+
+        Args:
+            position: Absolute position (e.g. start_index + i).
+            mode: "round_robin" cycles through strata equally;
+                "proportional" visits each stratum in proportion to its
+                size, spread evenly instead of in random clumps.
+
+        Returns:
+            Index into self.labels / self.members.
+        """
+        if mode == "proportional":
+            share = ((position + 0.5) * _GOLDEN_STEP) % 1.0
+            return min(bisect_right(self._bounds, share), len(self.members) - 1)
+        return position % len(self.members)
+
+    def draw(self, position: int, seed: int, mode: str = "round_robin") -> int:
+        """
+        Pick the entry for a batch position.
+
+        The member is chosen by a generator seeded from (seed, position), so
+        any window of positions is reproducible on its own.
+
+        Args:
+            position: Absolute position (e.g. start_index + i).
+            seed: Node seed.
+            mode: See stratum_at.
+
+        Returns:
+            Entry id.
+        """
+        ids = self.members[self.stratum_at(position, mode)]
+        rng = random.Random(hash((seed, position)))
+        return ids[rng.randrange(len(ids))]
+
+    def draw_batch(
+        self, start: int, count: int, seed: int, mode: str = "round_robin"
+    ) -> list[int]:
+        """Pick the entries for positions start .. start + count - 1."""
+        return [self.draw(start + i, seed, mode) for i in range(count)]
@@ -0,0 +1,182 @@
+"""Exhaustive character × style × action sweeps rendered across processes."""
+
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from .constants import (
+    ACTIONS,
+    BACKGROUNDS,
+    CAMERA_EFFECTS,
+    DEFAULT_SUFFIX,
+    PRESETS,
+)
+from .file_utils import parse_prompt_file
+from .generators import LayerDraw, clean_custom, render_prompt
+from .parallel import imap_ordered
+
+ACTION_MODES = ("sweep", "random", "none")
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN64 = 0x9E3779B97F4A7C15
+
+
+def _mix64(value: int) -> int:
+    """SplitMix64 finalizer: a cheap, well-distributed 64-bit hash."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK64
+    return value ^ (value >> 31)
+
+
+class SweepSpec(NamedTuple):
+    """Everything a worker needs to render any item of a sweep."""
+
+    character_file: str
+    style_file: str | None = None
+    preset: str = "standard"
+    seed: int = 0
+    action_mode: str = "sweep"
+    random_background: bool = True
+    random_camera: bool = True
+    custom_positive: str = ""
+    token_budget: int = 0
+    dedupe_tags: bool = False
+
+
+class Sweep:
+    """
+    Random-access view of every prompt of a sweep.
+
+    Item `i` pairs character i // (styles × actions) with the styles and
+    actions in nested-loop order, like AnimePromptCombiner. Its random
+    layers are drawn from a hash of (seed, i) rather than a sequential
+    generator, so any range of items renders the same on its own as inside
+    a serial run, and ranges can be split across processes freely.
+    """
+
+    def __init__(self, spec: SweepSpec) -> None:
+        if spec.action_mode not in ACTION_MODES:
+            raise ValueError(f"action_mode must be one of {ACTION_MODES}")
+        self.spec = spec
+        self._characters = [
+            (entry.tags.strip().rstrip(","), entry.character_name)
+            for entry in parse_prompt_file(spec.character_file)
+        ]
+        self._styles = (
+            [
+                entry.tags.strip().rstrip(",")
+                for entry in parse_prompt_file(spec.style_file)
+            ]
+            if spec.style_file
+            else [""]
+        )
+        suffix = PRESETS.get(spec.preset, DEFAULT_SUFFIX)
+        self._preset = suffix.lstrip(", ").strip() if suffix else ""
+        self._custom = clean_custom(spec.custom_positive)
+        self._actions = len(ACTIONS) if spec.action_mode == "sweep" else 1
+        self._per_character = len(self._styles) * self._actions
+        self._seed_base = spec.seed * _GOLDEN64 & _MASK64
+
+    def __len__(self) -> int:
+        return len(self._characters) * self._per_character
+
+    def draw(self, index: int) -> LayerDraw:
+        """Get the layers of item `index` (depends only on seed and index)."""
+        bits = _mix64((self._seed_base + index * _GOLDEN64) & _MASK64)
+        spec = self.spec
+        if spec.action_mode == "sweep":
+            action = ACTIONS[index % self._actions]
+        elif spec.action_mode == "random":
+            action = ACTIONS[bits % len(ACTIONS)]
+        else:
+            action = None
+        background = (
+            BACKGROUNDS[(bits >> 21) % len(BACKGROUNDS)]
+            if spec.random_background
+            else None
+        )
+        camera = (
+            CAMERA_EFFECTS[(bits >> 42) % len(CAMERA_EFFECTS)]
+            if spec.random_camera
+            else None
+        )
+        return LayerDraw(action, background, camera)
+
+    def render(self, index: int) -> str:
+        """Render item `index` as a TXT line: prompt<TAB>character_name."""
+        character, rest = divmod(index, self._per_character)
+        char_tags, name = self._characters[character]
+        style_tags = self._styles[rest // self._actions]
+        prompt, _ = render_prompt(
+            (self._preset, style_tags, char_tags),
+            self.draw(index),
+            self._custom,
+            self.spec.token_budget,
+            self.spec.dedupe_tags,
+        )
+        return f"{prompt}\t{name}\n"
+
+    def render_range(self, start: int, stop: int) -> str:
+        """Render items start .. stop - 1 as one block of lines."""
+        return "".join(self.render(index) for index in range(start, stop))
+
+
+def sweep_ranges(total: int, chunk_size: int) -> Iterator[tuple[int, int]]:
+    """Split [0, total) into consecutive (start, stop) ranges."""
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+# Per-process sweep, parsed once by the pool initializer
+_worker_sweep: Sweep | None = None
+
+
+def _init_worker(spec: SweepSpec) -> None:
+    global _worker_sweep
+    _worker_sweep = Sweep(spec)
+
+
+def _render_range(bounds: tuple[int, int]) -> str:
+    return _worker_sweep.render_range(*bounds)
+
+
+def write_sweep(
+    spec: SweepSpec,
+    output_file: str,
+    workers: int | None = None,
+    chunk_size: int = 20000,
+    limit: int | None = None,
+) -> int:
+    """
+    Render a sweep to a TXT file, partitioned across processes.
+
+    Each worker parses the corpus files itself and renders whole ranges of
+    item indices; blocks are written back in index order, so the file is
+    byte-identical whatever the worker count.
+
+    Args:
+        spec: Sweep definition.
+        output_file: TXT file to write.
+        workers: Processes (default: CPU count; 1 renders inline).
+        chunk_size: Items per work unit.
+        limit: Render only the first `limit` items.
+
+    Returns:
+        Number of prompts written.
+
+    Raises:
+        FileNotFoundError: If a corpus file does not exist.
+    """
+    total = len(Sweep(spec))
+    if limit is not None:
+        total = min(total, limit)
+    blocks = imap_ordered(
+        _render_range,
+        sweep_ranges(total, max(chunk_size, 1)),
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(spec,),
+    )
+    with open(output_file, "w", encoding="utf-8") as f:
+        for block in blocks:
+            f.write(block)
+    return total
@@ -0,0 +1,324 @@
+"""Inverted tag index with boolean tag queries."""
+
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from typing import Generic, Protocol, TypeVar
+
+from .file_utils import PromptEntry
+from .tag_utils import normalize_tag, tag_keys
+
+# A posting list is either a sorted array of entry ids (rare tags) or an
+# int bitmap with bit i set for entry i (common tags) - whichever is smaller
+Posting = array | int
+
+# Set type a query is evaluated into (see QueryAlgebra)
+S = TypeVar("S")
+
+# Quoted literal, brackets, comma, or a bare word
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|([(),])|([^\s(),"]+)')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+# Set bits per byte value, for rank/select over bitmaps
+_BYTE_COUNTS = bytes(bin(i).count("1") for i in range(256))
+_SELECT_BLOCK = 512
+
+
+class Matches:
+    """
+    Entry ids matched by a query, in corpus order.
+
+    Supports len() and indexing by rank without materializing large
+    results: bitmap results keep per-block popcounts and locate the n-th
+    set bit with a bisect plus a short byte scan.
+    """
+
+    def __init__(self, posting: Posting, size: int) -> None:
+        self._posting = posting
+        self._size = size
+        self._bytes: bytes | None = None
+        self._cumulative: list[int] | None = None
+        if isinstance(posting, int):
+            self._length = posting.bit_count()
+        else:
+            self._length = len(posting)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, rank: int) -> int:
+        if rank < 0:
+            rank += self._length
+        if not 0 <= rank < self._length:
+            raise IndexError("match rank out of range")
+        if not isinstance(self._posting, int):
+            return self._posting[rank]
+        return self._select(rank)
+
+    def __iter__(self) -> Iterator[int]:
+        if not isinstance(self._posting, int):
+            yield from self._posting
+            return
+        data = self._bitmap_bytes()
+        for byte_index, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield byte_index * 8 + low.bit_length() - 1
+                byte ^= low
+
+    def _bitmap_bytes(self) -> bytes:
+        if self._bytes is None:
+            self._bytes = self._posting.to_bytes((self._size + 7) // 8, "little")
+        return self._bytes
+
+    def _select(self, rank: int) -> int:
+        data = self._bitmap_bytes()
+        if self._cumulative is None:
+            # cumulative[b] = set bits before block b
+            total = 0
+            self._cumulative = [0]
+            for start in range(0, len(data), _SELECT_BLOCK):
+                block = data[start : start + _SELECT_BLOCK]
+                total += int.from_bytes(block, "little").bit_count()
+                self._cumulative.append(total)
+
+        block = bisect_right(self._cumulative, rank) - 1
+        remaining = rank - self._cumulative[block]
+        for byte_index in range(block * _SELECT_BLOCK, len(data)):
+            byte = data[byte_index]
+            count = _BYTE_COUNTS[byte]
+            if remaining < count:
+                for _ in range(remaining):
+                    byte &= byte - 1
+                return byte_index * 8 + (byte & -byte).bit_length() - 1
+            remaining -= count
+        raise IndexError("match rank out of range")
+
+
+class TagIndex:
+    """
+    Inverted index from normalized tag to the entries containing it.
+
+    Rare tags store a sorted array('I') of entry ids (4 bytes per hit);
+    tags present in more than 1/32 of entries store a bitmap instead, which
+    is then the smaller encoding and makes AND/OR/NOT a single big-int op.
+    """
+
+    def __init__(self, postings: dict[str, Posting], size: int) -> None:
+        self.size = size
+        self._postings = postings
+        self._all = (1 << size) - 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def build(cls, tag_texts: Iterable[str]) -> "TagIndex":
+        """
+        Build an index over tag strings.
+
+        Args:
+            tag_texts: Comma-separated tags per entry; entry ids follow
+                iteration order.
+
+        Returns:
+            New TagIndex.
+        """
+        building: dict[str, array] = {}
+        size = 0
+        for entry_id, text in enumerate(tag_texts):
+            size = entry_id + 1
+            for key in tag_keys(text):
+                ids = building.get(key)
+                if ids is None:
+                    ids = building[key] = array("I")
+                ids.append(entry_id)
+
+        postings: dict[str, Posting] = {}
+        for key, ids in building.items():
+            postings[key] = _to_bitmap(ids, size) if len(ids) * 32 > size else ids
+        return cls(postings, size)
+
+    @classmethod
+    def from_entries(cls, entries: list[PromptEntry]) -> "TagIndex":
+        """Build an index over the tags column of parsed entries."""
+        return cls.build(entry.tags for entry in entries)
+
+    def posting(self, tag: str) -> Posting:
+        """
+        Get the posting list of a tag.
+
+        Args:
+            tag: Tag in any spelling ("Pink_Hair" finds "pink hair").
+
+        Returns:
+            Sorted id array or bitmap (empty array for unknown tags).
+        """
+        return self._postings.get(normalize_tag(tag)[0], array("I"))
+
+    def count(self, tag: str) -> int:
+        """Get the number of entries containing a tag."""
+        posting = self.posting(tag)
+        return posting.bit_count() if isinstance(posting, int) else len(posting)
+
+    def query(self, expression: str) -> Matches:
+        """
+        Select entries with a boolean tag expression.
+
+        Terms are tags (several words form one tag); combine them with AND,
+        OR, NOT (uppercase) and parentheses. A comma means AND. Quote a tag
+        that contains brackets or an uppercase operator word, e.g.
+        `"hibiki (kancolle)" AND NOT blue hair`.
+
+        Args:
+            expression: Query text.
+
+        Returns:
+            Matches in corpus order.
+
+        Raises:
+            ValueError: If the expression is malformed.
+        """
+        parser = QueryParser(self, tokenize_query(expression))
+        return Matches(parser.parse(), self.size)
+
+    # Posting list algebra
+
+    def intersect(self, a: Posting, b: Posting) -> Posting:
+        if isinstance(a, int) and isinstance(b, int):
+            return a & b
+        if isinstance(a, int):
+            a, b = b, a
+        if isinstance(b, int):
+            bits = b.to_bytes((self.size + 7) // 8, "little")
+            return array("I", [i for i in a if bits[i >> 3] >> (i & 7) & 1])
+        small, large = (a, b) if len(a) <= len(b) else (b, a)
+        return array("I", sorted(set(small).intersection(large)))
+
+    def union(self, a: Posting, b: Posting) -> Posting:
+        if isinstance(a, int) or isinstance(b, int):
+            return _to_bitmap(a, self.size) | _to_bitmap(b, self.size)
+        if (len(a) + len(b)) * 32 > self.size:
+            return _to_bitmap(a, self.size) | _to_bitmap(b, self.size)
+        return array("I", sorted(set(a).union(b)))
+
+    def complement(self, a: Posting) -> int:
+        return self._all ^ _to_bitmap(a, self.size)
+
+
+def _to_bitmap(posting: Posting, size: int) -> int:
+    if isinstance(posting, int):
+        return posting
+    buffer = bytearray((size + 7) // 8)
+    for i in posting:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def tokenize_query(expression: str) -> list[str]:
+    """
+    Split a query into operators, brackets and tag terms.
+
+    Consecutive bare words are joined into one multi-word tag; tag terms
+    are returned with a leading "=" so they can never equal an operator.
+    """
+    tokens: list[str] = []
+    words: list[str] = []
+
+    def flush() -> None:
+        if words:
+            tokens.append("=" + " ".join(words))
+            words.clear()
+
+    for quoted, symbol, word in _QUERY_TOKEN_RE.findall(expression):
+        if symbol:
+            flush()
+            tokens.append("AND" if symbol == "," else symbol)
+        elif word in _OPERATORS:
+            flush()
+            tokens.append(word)
+        elif word:
+            words.append(word)
+        else:
+            flush()
+            tokens.append("=" + quoted)
+    flush()
+    return tokens
+
+
+class QueryAlgebra(Protocol[S]):
+    """Set operations a QueryParser evaluates a query with."""
+
+    def posting(self, tag: str) -> S: ...
+
+    def intersect(self, a: S, b: S) -> S: ...
+
+    def union(self, a: S, b: S) -> S: ...
+
+    def complement(self, a: S) -> S: ...
+
+
+class QueryParser(Generic[S]):
+    """
+    Recursive-descent evaluator for tag queries.
+
+    Grammar (NOT binds tightest, then AND, then OR):
+        expr   := term ("OR" term)*
+        term   := factor ("AND" factor)*
+        factor := "NOT" factor | "(" expr ")" | TAG
+
+    Sets are built by the algebra: posting lists for TagIndex, SQL for a
+    corpus database (core.corpus_db).
+    """
+
+    def __init__(self, algebra: QueryAlgebra[S], tokens: list[str]) -> None:
+        self.algebra = algebra
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self) -> S:
+        if not self.tokens:
+            raise ValueError("empty query")
+        result = self._expr()
+        if self.position < len(self.tokens):
+            raise ValueError(f"unexpected '{self._peek().lstrip('=')}'")
+        return result
+
+    def _peek(self) -> str | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self) -> str | None:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _expr(self) -> S:
+        result = self._term()
+        while self._peek() == "OR":
+            self._next()
+            result = self.algebra.union(result, self._term())
+        return result
+
+    def _term(self) -> S:
+        result = self._factor()
+        while self._peek() == "AND":
+            self._next()
+            result = self.algebra.intersect(result, self._factor())
+        return result
+
+    def _factor(self) -> S:
+        token = self._next()
+        if token == "NOT":
+            return self.algebra.complement(self._factor())
+        if token == "(":
+            result = self._expr()
+            if self._next() != ")":
+                raise ValueError("missing ')'")
+            return result
+        if token is not None and token.startswith("="):
+            return self.algebra.posting(token[1:])
+        found = "end of query" if token is None else f"'{token}'"
+        raise ValueError(f"expected a tag, got {found}")
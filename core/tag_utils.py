@@ -0,0 +1,208 @@
+"""Tag text utilities shared by the prompt nodes and offline scripts."""
+
+import re
+from functools import lru_cache
+
+# Precompiled patterns for the Flux/Natural Language cleaner
+_WEIGHT_RE = re.compile(r":\d+(\.\d+)?")
+_BRACKETS_TABLE = str.maketrans("", "", "(){}")
+_ONE_GIRL_RE = re.compile(r"\b1girl\b", re.IGNORECASE)
+_LORA_TRIGGER_RE = re.compile(r"(?i)lora triggers?:?")
+_COMMA_RE = re.compile(r",\s*")
+_SPACES_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def clean_tag(text: str) -> str:
+    """
+    Aggressive cleaner for Flux/Natural Language.
+
+    Removes: weights (:1.3), parens, '1girl', 'lora triggers', and fixes commas.
+    Results are memoized, so the fixed action/background/mood fragments are
+    only cleaned once per process.
+
+    Args:
+        text: Tag-style prompt text.
+
+    Returns:
+        Cleaned text suitable for natural language sentences.
+    """
+    if not text:
+        return ""
+
+    # 1. Remove weights (e.g., :1.3, :0.5, :1)
+    text = _WEIGHT_RE.sub("", text)
+
+    # 2. Remove parenthesis completely
+    text = text.translate(_BRACKETS_TABLE)
+
+    # 3. Replace underscores with spaces
+    text = text.replace("_", " ")
+
+    # 4. Remove Booru-isms that sound robotic in sentences
+    # Remove '1girl' (we already say 'A girl with...')
+    text = _ONE_GIRL_RE.sub("", text)
+    # Remove 'lora triggers:' junk text (Case insensitive)
+    text = _LORA_TRIGGER_RE.sub("", text)
+
+    # 5. Fix Comma Spacing (tag1,tag2 -> tag1, tag2)
+    text = _COMMA_RE.sub(", ", text)
+
+    # 6. Cleanup double spaces or trailing punctuation
+    text = _SPACES_RE.sub(" ", text).strip()
+    text = text.strip(", ")  # Remove trailing commas
+
+    return text
+
+
+# Explicit weight at the end of a group body, e.g. "pink hair:1.3"
+_EXPLICIT_WEIGHT_RE = re.compile(r"^(.*?)\s*:\s*(\d+(?:\.\d+)?)$", re.DOTALL)
+
+# Implicit weight of one unweighted pair of parentheses
+_PAREN_WEIGHT = 1.1
+
+
+def split_tags(text: str) -> list[str]:
+    """
+    Split prompt text into tags on top-level commas.
+
+    Weighted groups such as "(a, b:1.2)" stay intact and escaped brackets
+    like "hibiki \\(kancolle\\)" are treated as literal text.
+
+    Args:
+        text: Prompt or prompt fragment.
+
+    Returns:
+        Non-empty, stripped tags in prompt order.
+    """
+    if "(" not in text:
+        return [tag for tag in map(str.strip, text.split(",")) if tag]
+
+    tags: list[str] = []
+    depth = 0
+    start = 0
+    escaped = False
+    for i, char in enumerate(text):
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif char == "," and depth == 0:
+            tags.append(text[start:i])
+            start = i + 1
+    tags.append(text[start:])
+    return [tag for tag in map(str.strip, tags) if tag]
+
+
+def _is_wrapped(tag: str) -> bool:
+    """Check whether the first "(" of a tag closes at its very last character."""
+    if len(tag) < 2 or tag[0] != "(" or tag[-1] != ")":
+        return False
+    depth = 0
+    escaped = False
+    for i, char in enumerate(tag):
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i == len(tag) - 1
+    return False
+
+
+@lru_cache(maxsize=16384)
+def normalize_tag(tag: str) -> tuple[str, float]:
+    """
+    Normalize a single tag into a comparison key and its attention weight.
+
+    Folds case, underscores, escapes and whitespace, and unwraps weight
+    syntax: "(Pink_Hair:1.3)" -> ("pink hair", 1.3), "((smile))" ->
+    ("smile", 1.21). Results are memoized per fragment.
+
+    Args:
+        tag: One tag as returned by split_tags.
+
+    Returns:
+        Tuple of (normalized key, weight).
+    """
+    body = tag.strip()
+    weight = 1.0
+    while _is_wrapped(body):
+        body = body[1:-1].strip()
+        match = _EXPLICIT_WEIGHT_RE.match(body)
+        if match:
+            body = match.group(1)
+            weight *= float(match.group(2))
+        else:
+            weight *= _PAREN_WEIGHT
+
+    key = body.replace("\\", "").replace("_", " ").lower()
+    return " ".join(key.split()), round(weight, 4)
+
+
+def tag_keys(text: str) -> set[str]:
+    """
+    Get the set of normalized tag keys in a prompt.
+
+    Args:
+        text: Comma-separated tags.
+
+    Returns:
+        Normalized keys (see normalize_tag), empty keys dropped.
+    """
+    return {key for key, _ in map(normalize_tag, split_tags(text)) if key}
+
+
+def dedupe_tag_lists(tag_lists: list[list[str]]) -> list[list[str]]:
+    """
+    Remove repeated tags across several tag lists in one linear pass.
+
+    The first occurrence of a tag keeps its position; if a later duplicate
+    carries a higher weight, its text replaces the first occurrence.
+
+    Args:
+        tag_lists: Tags grouped by prompt layer, in prompt order.
+
+    Returns:
+        New tag lists with duplicates removed (lists may become empty).
+    """
+    result: list[list[str]] = [[] for _ in tag_lists]
+    # key -> (list index, position in list, weight)
+    seen: dict[str, tuple[int, int, float]] = {}
+
+    for list_index, tags in enumerate(tag_lists):
+        out = result[list_index]
+        for tag in tags:
+            key, weight = normalize_tag(tag)
+            if not key:
+                continue
+            previous = seen.get(key)
+            if previous is None:
+                seen[key] = (list_index, len(out), weight)
+                out.append(tag)
+            elif weight > previous[2]:
+                result[previous[0]][previous[1]] = tag
+                seen[key] = (previous[0], previous[1], weight)
+
+    return result
+
+
+def dedupe_prompt(text: str) -> str:
+    """
+    Remove repeated tags from a prompt string.
+
+    Args:
+        text: Comma-separated prompt.
+
+    Returns:
+        Prompt with duplicates removed, joined with ", ".
+    """
+    return ", ".join(dedupe_tag_lists([split_tags(text)])[0])
@@ -0,0 +1,75 @@
+"""Offline CLIP token count estimation for composed prompts."""
+
+import math
+import re
+from functools import lru_cache
+from typing import Final
+
+# CLIP encodes 77 tokens per chunk, two of which are BOS/EOS
+CLIP_CHUNK_TOKENS: Final[int] = 75
+
+# Mirrors the CLIP pre-tokenizer: letter runs, single digits, punctuation runs
+_PRETOKENIZE_RE = re.compile(r"[^\W\d_]+|\d|[^\w\s]+|_")
+
+
+def _word_tokens(word: str) -> int:
+    """Estimate BPE tokens for one pre-tokenized piece."""
+    if not word[0].isalpha():
+        # Digits and punctuation are (almost) always one token per character
+        return len(word)
+    if not word.isascii():
+        # Byte-level BPE spends one to three tokens per CJK character
+        return 2 * len(word)
+    # Common words are a single BPE token; long or rare ones split every ~4 chars
+    return 1 + max(0, len(word) - 6) // 4
+
+
+@lru_cache(maxsize=16384)
+def estimate_fragment_tokens(fragment: str) -> int:
+    """
+    Estimate the CLIP token count of a single comma-free prompt fragment.
+
+    Results are memoized: preset tags, actions and backgrounds recur in every
+    prompt, so each distinct fragment is only measured once per process.
+
+    Args:
+        fragment: Prompt text without commas (e.g. one tag).
+
+    Returns:
+        Estimated number of tokens, errs on the high side for rare words.
+    """
+    return sum(
+        _word_tokens(piece) for piece in _PRETOKENIZE_RE.findall(fragment.lower())
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the CLIP token count of a prompt.
+
+    Each comma is one token; the fragments between them use the memoized
+    per-fragment estimate.
+
+    Args:
+        text: Full or partial prompt string.
+
+    Returns:
+        Estimated number of tokens (excluding BOS/EOS).
+    """
+    if not text:
+        return 0
+    fragments = text.split(",")
+    return len(fragments) - 1 + sum(map(estimate_fragment_tokens, fragments))
+
+
+def count_chunks(token_count: int) -> int:
+    """
+    Get the number of 77-token CLIP chunks needed to encode a prompt.
+
+    Args:
+        token_count: Estimated token count of the prompt.
+
+    Returns:
+        Number of chunks (at least 1).
+    """
+    return max(1, math.ceil(token_count / CLIP_CHUNK_TOKENS))
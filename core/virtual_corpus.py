@@ -0,0 +1,173 @@
+"""Several prompt files addressed as one corpus without concatenating them."""
+
+import glob
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterator, Sequence
+from itertools import accumulate
+from typing import overload
+
+from .file_utils import PromptEntry, is_within_directory, iter_prompt_file
+
+MANIFEST_EXT = ".manifest"
+# Only TXT prompt files are members; Flux companions (.flux.tsv) and
+# imported databases (.db) sit next to them in prompts/
+MEMBER_EXT = ".txt"
+_GLOB_CHARS = frozenset("*?[")
+
+# (path, mtime_ns, size) -> entry count
+_counts: dict[tuple[str, int, int], int] = {}
+_counts_lock = threading.Lock()
+
+
+def is_virtual_source(source: str) -> bool:
+    """Whether a corpus source is a glob pattern or manifest, not one file."""
+    return source.endswith(MANIFEST_EXT) or not _GLOB_CHARS.isdisjoint(source)
+
+
+def _expand(pattern: str) -> list[str]:
+    paths = [pattern] if _GLOB_CHARS.isdisjoint(pattern) else sorted(glob.glob(pattern))
+    return [
+        path for path in paths if path.endswith(MEMBER_EXT) and os.path.isfile(path)
+    ]
+
+
+def _base_directory(source: str) -> str:
+    """Directory a source's members must stay inside."""
+    # The manifest's directory, or a pattern's path before its first wildcard
+    if _GLOB_CHARS.isdisjoint(source):
+        return os.path.dirname(source)
+    parts = source.split(os.sep)
+    for count, part in enumerate(parts):
+        if not _GLOB_CHARS.isdisjoint(part):
+            return os.sep.join(parts[:count]) or os.sep
+    return os.path.dirname(source)
+
+
+def resolve_sources(source: str) -> list[str]:
+    """
+    Get the member files of a virtual corpus, in corpus order.
+
+    A glob pattern matches files in sorted path order. A manifest lists one
+    file name or glob pattern per line, relative to the manifest's
+    directory; blank lines and lines starting with # are skipped. Only .txt
+    files are members, so companions and databases matched by a broad
+    pattern are left out. Files listed twice are kept once, at their first
+    position. Members must stay
+    inside the manifest's directory (or the pattern's directory before its
+    first wildcard) after resolving symlinks and "..".
+
+    Args:
+        source: Absolute glob pattern or path to a .manifest file.
+
+    Returns:
+        Absolute member file paths.
+
+    Raises:
+        FileNotFoundError: If the manifest is missing or nothing matches.
+        PermissionError: If a member lies outside the source's directory.
+    """
+    if source.endswith(MANIFEST_EXT) and _GLOB_CHARS.isdisjoint(source):
+        base = os.path.dirname(source)
+        with open(source, encoding="utf-8") as f:
+            patterns = [
+                os.path.join(base, line.strip())
+                for line in f
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+    else:
+        patterns = [source]
+
+    files = list(dict.fromkeys(path for p in patterns for path in _expand(p)))
+    if not files:
+        raise FileNotFoundError(f"No prompt files match {source}")
+    base = _base_directory(source)
+    for path in files:
+        if not is_within_directory(path, base):
+            raise PermissionError(f"{path} is outside {base}")
+    return files
+
+
+def file_version(file_path: str) -> tuple[str, int, int]:
+    """Identify a file's current content by (path, mtime_ns, size)."""
+    stat = os.stat(file_path)
+    return file_path, stat.st_mtime_ns, stat.st_size
+
+
+def count_entries(file_path: str) -> int:
+    """
+    Count a file's entries (non-blank lines), cached per file version.
+
+    Args:
+        file_path: TXT prompt file.
+
+    Returns:
+        Number of entries parse_prompt_file would return.
+    """
+    version = file_version(file_path)
+    with _counts_lock:
+        count = _counts.get(version)
+    if count is None:
+        with open(file_path, encoding="utf-8") as f:
+            count = sum(1 for line in f if line.strip())
+        with _counts_lock:
+            _counts[version] = count
+    return count
+
+
+class VirtualEntries(Sequence[PromptEntry]):
+    """
+    PromptEntry sequence spanning several files.
+
+    Only entry counts are needed up front. A prefix-sum table of the counts
+    maps a global index to (file, local index) by binary search, and only
+    the file holding a requested entry is loaded, through `load_file`
+    (e.g. the corpus cache). Iteration streams the files in order.
+    """
+
+    def __init__(
+        self,
+        files: Sequence[str],
+        counts: Sequence[int],
+        load_file: Callable[[str], Sequence[PromptEntry]],
+    ) -> None:
+        self.files = list(files)
+        # ends[k] = number of entries in files 0 .. k
+        self._ends = array("Q", accumulate(counts))
+        self._load_file = load_file
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def locate(self, index: int) -> tuple[int, int]:
+        """
+        Map a global index to (file number, index within that file).
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("corpus index out of range")
+        file_number = bisect_right(self._ends, index)
+        start = self._ends[file_number - 1] if file_number else 0
+        return file_number, index - start
+
+    @overload
+    def __getitem__(self, index: int) -> PromptEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[PromptEntry]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        file_number, local = self.locate(index)
+        return self._load_file(self.files[file_number])[local]
+
+    def __iter__(self) -> Iterator[PromptEntry]:
+        for file_path in self.files:
+            yield from iter_prompt_file(file_path)
@@ -1,6 +1,21 @@
-import os
+"""
+Convert a CSV of raw tag strings into a TXT prompt file.
 
-import pandas as pd
+Streams rows with the stdlib csv module and writes one prompt per line, so
+it starts instantly and runs in constant memory for CSVs of any size.
+
+Usage:
+    python main.py
+    python main.py pure_1girl_v1.csv system_lock_prompts.txt --column 0
+    python main.py tags.csv out.txt --column prompt --suffix "masterpiece, 8k"
+"""
+
+import argparse
+import csv
+import re
+import sys
+
+from core.file_utils import apply_suffix
 
 # --- Configuration ---
 INPUT_FILE = "pure_1girl_v1.csv"
@@ -14,38 +29,86 @@ AESTHETIC_SUFFIX = (
     "sharp focus, cinematic lighting"
 )
 
+# Line breaks and tabs inside a quoted field would split the prompt line or
+# start a character name column in the TXT output
+_FIELD_BREAKS_RE = re.compile(r"\s*[\t\r\n]+\s*")
 
-def generate_prompts():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: {INPUT_FILE} not found in current directory.")
-        return
 
-    # Load data - skipping header as the file appears to be raw tag strings
-    try:
-        df = pd.read_csv(INPUT_FILE, header=None)
+def generate_prompts(
+    input_file: str = INPUT_FILE,
+    output_file: str = OUTPUT_FILE,
+    suffix: str = AESTHETIC_SUFFIX,
+    column: str = "0",
+) -> int:
+    """
+    Append `suffix` to the tags in one CSV column, one prompt per line.
 
-        # The first column contains the tags
-        raw_tags = df[0].astype(str).tolist()
+    Quoted fields may contain commas and line breaks; line breaks and tabs
+    are folded into single spaces so each row stays one prompt line.
 
-        processed_prompts = []
-        for tags in raw_tags:
-            # Clean and append suffix
-            clean_tags = tags.strip().rstrip(",")
-            full_prompt = clean_tags + AESTHETIC_SUFFIX
-            processed_prompts.append(full_prompt)
+    Args:
+        input_file: CSV file to read.
+        output_file: TXT file to write.
+        suffix: Aesthetic suffix applied with core.file_utils.apply_suffix.
+        column: Column index (no header row) or column name (first row is
+            the header).
 
-        # Write to text file (one prompt per line for batch loaders)
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            for p in processed_prompts:
-                f.write(p + "\n")
+    Returns:
+        Number of prompts written.
+    """
+    count = 0
+    with (
+        open(input_file, encoding="utf-8", newline="") as f_in,
+        open(output_file, "w", encoding="utf-8") as f_out,
+    ):
+        reader = csv.reader(f_in)
 
-        print(
-            f"Success: {len(processed_prompts)} prompts optimized and saved to {OUTPUT_FILE}."
-        )
+        if column.isdigit():
+            index = int(column)
+        else:
+            header = next(reader, [])
+            if column not in header:
+                raise KeyError(column)
+            index = header.index(column)
+
+        for row in reader:
+            if len(row) <= index or not row[index].strip():
+                continue
+            tags = _FIELD_BREAKS_RE.sub(" ", row[index].strip())
+            f_out.write(apply_suffix(tags, suffix) + "\n")
+            count += 1
 
-    except Exception as e:
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", nargs="?", default=INPUT_FILE)
+    parser.add_argument("output_file", nargs="?", default=OUTPUT_FILE)
+    parser.add_argument(
+        "--suffix", default=AESTHETIC_SUFFIX, help="Suffix appended to each prompt"
+    )
+    parser.add_argument(
+        "--column", default="0", help="Tag column index or header name (default: 0)"
+    )
+    args = parser.parse_args()
+
+    try:
+        count = generate_prompts(
+            args.input_file, args.output_file, args.suffix, args.column
+        )
+    except FileNotFoundError:
+        print(f"Error: {args.input_file} not found.")
+        sys.exit(1)
+    except KeyError:
+        print(f"Error: column '{args.column}' not found in the CSV header.")
+        sys.exit(1)
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
         print(f"System Error during processing: {e}")
+        sys.exit(1)
+
+    print(f"Success: {count} prompts optimized and saved to {args.output_file}.")
 
 
 if __name__ == "__main__":
-    generate_prompts()
+    main()
@@ -3,13 +3,19 @@
 from .prompt_batch import AnimePromptBatch
 from .prompt_combiner import AnimePromptCombiner
 from .prompt_loader import AnimePromptLoader
+from .prompt_query import AnimePromptQuery
 from .prompt_rednote import AnimePromptRedNote
+from .prompt_similar import AnimePromptSimilar
 from .suffix_editor import SuffixEditor
+from .text_encode_cache import CachedCLIPTextEncode
 
 __all__ = [
     "AnimePromptLoader",
     "AnimePromptBatch",
     "AnimePromptCombiner",
     "AnimePromptRedNote",
+    "AnimePromptQuery",
+    "AnimePromptSimilar",
     "SuffixEditor",
+    "CachedCLIPTextEncode",
 ]
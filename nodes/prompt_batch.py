@@ -5,23 +5,43 @@ Outputs multiple prompts for batch image generation with dynamic actions, backgr
 Formula: Quality Tags + Character + Action + Background + Camera Effects
 """
 
-import random
+from collections.abc import Sequence
 from typing import Any
 
+from ..core.batch_utils import (
+    SHARD_MODES,
+    SubsetView,
+    collapse_duplicates,
+    shard_indices,
+)
+from ..core.bloom import content_key, history_path, open_history, take_unseen
 from ..core.constants import (
-    ACTIONS,
-    BACKGROUNDS,
-    CAMERA_EFFECTS,
     DEFAULT_NEGATIVE,
     DEFAULT_SUFFIX,
     NEGATIVE_PRESETS,
     PRESETS,
 )
+from ..core.corpus_cache import load_corpus
 from ..core.file_utils import (
-    get_available_txt_files,
-    get_prompt_file_path,
-    parse_prompt_file,
+    PromptEntry,
+    get_available_corpus_files,
+    get_corpus_source,
 )
+from ..core.generators import generate_prompts
+from ..core.prefetch import prefetch_windows
+from ..core.tag_utils import dedupe_prompt
+
+
+def _selected_corpus(arguments: dict[str, Any]) -> Any:
+    """Prefetch source: the corpus a call reads (new on every file edit)."""
+    return load_corpus(
+        get_corpus_source(arguments["prompt_file"], arguments["prompt_glob"])
+    )
+
+
+def _records_history(arguments: dict[str, Any]) -> bool:
+    """skip_seen runs write the history, so they are never prefetched."""
+    return arguments["skip_seen"]
 
 
 class AnimePromptBatch:
@@ -42,22 +62,44 @@ class AnimePromptBatch:
         random_camera: Add random camera effects to each prompt
         custom_positive: Your additional positive tags
         custom_negative: Your additional negative tags
+        token_budget: Max CLIP chunks (75 tokens each), 0 = unlimited.
+            Camera, background, then action layers are dropped to fit.
+        dedupe_tags: Remove repeated tags (case, underscores and weights
+            folded, highest weight kept) from the prompt and negative.
+        unique_only: Output each identical prompt once (see index_map)
+        skip_seen: Skip entries already produced by earlier runs, matched by
+            normalized content, and record the new ones
+        history_name: Name of the persistent history (cache/history/)
+        render_threads: Threads composing large batches (0 = serial);
+            output is identical either way
+        shard_id / num_shards: Split the file between independent workers;
+            each worker reads only its own disjoint share of the entries
+            (start_index and batch_size then apply within the share)
+        shard_mode: "contiguous" blocks or "strided" (every num_shards-th)
+        prompt_glob: Read several files as one corpus, by glob pattern
+            (e.g. chars_*.txt) or .manifest file; overrides prompt_file
+        prefetch: After each run, compute the window at start_index +
+            batch_size in the background so the next queue run returns at
+            once; any other input change discards it (not with skip_seen)
 
     Outputs:
         prompts: List of prompt strings (for batch processing)
         negative: Combined negative prompt
+        token_count: Estimated CLIP token count of each prompt
+        index_map: For each batch position, the index of its prompt in
+            `prompts` (identity unless unique_only collapsed repeats)
     """
 
     CATEGORY = "prompt/anime"
     FUNCTION = "load_batch"
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("prompts", "negative")
-    OUTPUT_IS_LIST = (True, False)
+    RETURN_TYPES = ("STRING", "STRING", "INT", "INT")
+    RETURN_NAMES = ("prompts", "negative", "token_count", "index_map")
+    OUTPUT_IS_LIST = (True, False, True, True)
 
     @classmethod
     def INPUT_TYPES(cls) -> dict[str, Any]:
         """Define input parameters for the node."""
-        txt_files = get_available_txt_files()
+        txt_files = get_available_corpus_files()
 
         return {
             "required": {
@@ -107,9 +149,52 @@ class AnimePromptBatch:
                         "display": "number",
                     },
                 ),
+                "token_budget": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 8, "step": 1},
+                ),
+                "dedupe_tags": ("BOOLEAN", {"default": False}),
+                "unique_only": ("BOOLEAN", {"default": False}),
+                "skip_seen": ("BOOLEAN", {"default": False}),
+                "history_name": ("STRING", {"default": "default"}),
+                "render_threads": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 64, "step": 1},
+                ),
+                "shard_id": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 1023, "step": 1},
+                ),
+                "num_shards": (
+                    "INT",
+                    {"default": 1, "min": 1, "max": 1024, "step": 1},
+                ),
+                "shard_mode": (list(SHARD_MODES), {"default": "contiguous"}),
+                "prompt_glob": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "placeholder": "Several files: chars_*.txt or a .manifest",
+                    },
+                ),
+                # Compute the next window (start_index + batch_size) in the
+                # background after each run
+                "prefetch": ("BOOLEAN", {"default": False}),
             },
         }
 
+    @classmethod
+    def IS_CHANGED(cls, skip_seen: bool = False, **kwargs: Any) -> float | str:
+        """
+        Force a re-run when the output depends on the persistent history.
+
+        ComfyUI reuses a node's cached output while its inputs are
+        unchanged; with skip_seen, identical inputs must still consult and
+        update the history. NaN never compares equal, so the node re-runs.
+        """
+        return float("nan") if skip_seen else ""
+
+    @prefetch_windows(_selected_corpus, bypass_if=_records_history)
     def load_batch(
         self,
         prompt_file: str,
@@ -122,7 +207,17 @@ class AnimePromptBatch:
         custom_positive: str = "",
         custom_negative: str = "",
         seed: int = 0,
-    ) -> tuple[list[str], str]:
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        unique_only: bool = False,
+        skip_seen: bool = False,
+        history_name: str = "default",
+        render_threads: int = 0,
+        shard_id: int = 0,
+        num_shards: int = 1,
+        shard_mode: str = "contiguous",
+        prompt_glob: str = "",
+    ) -> tuple[list[str], str, list[int], list[int]]:
         """
         Load a batch of prompts with dynamic generation.
 
@@ -139,27 +234,112 @@ class AnimePromptBatch:
             custom_positive: Your custom POSITIVE prompt.
             custom_negative: Your custom NEGATIVE prompt.
             seed: Random seed for reproducibility.
+            token_budget: Max CLIP chunks per prompt, 0 = unlimited.
+            dedupe_tags: Whether to remove repeated tags.
+            unique_only: Whether to collapse identical prompts.
+            skip_seen: Whether to skip entries recorded in the history.
+            history_name: Name of the persistent history.
+            render_threads: Threads composing large batches, 0 = serial.
+            shard_id: This worker's shard, 0 .. num_shards - 1.
+            num_shards: Number of workers splitting the entries.
+            shard_mode: "contiguous" or "strided" partitioning.
+            prompt_glob: Glob or manifest of several files, read as one
+                corpus instead of prompt_file.
 
         Returns:
-            Tuple containing (list of prompt strings, negative prompt).
+            Tuple containing (list of prompt strings, negative prompt,
+            list of token counts).
         """
-        file_path = get_prompt_file_path(prompt_file)
-
         try:
-            prompts = parse_prompt_file(file_path)
+            source = get_corpus_source(prompt_file, prompt_glob)
+            prompts = load_corpus(source).entries
         except FileNotFoundError:
-            return ([f"Error: {prompt_file} not found"], "")
-        except OSError as e:
-            return ([f"Error: {e}"], "")
+            name = prompt_glob.strip() or prompt_file
+            return ([f"Error: {name} not found"], "", [0], [0])
+        except (OSError, ValueError) as e:
+            # ValueError: e.g. a member file that isn't UTF-8 text
+            return ([f"Error: {e}"], "", [0], [0])
 
         if not prompts:
-            return (["Error: No prompts found"], "")
+            return (["Error: No prompts found"], "", [0], [0])
+
+        return self.compose_batch(
+            prompts,
+            start_index,
+            batch_size,
+            preset,
+            random_action,
+            random_background,
+            random_camera,
+            custom_positive,
+            custom_negative,
+            seed,
+            token_budget,
+            dedupe_tags,
+            unique_only,
+            skip_seen,
+            history_name,
+            render_threads,
+            shard_id,
+            num_shards,
+            shard_mode,
+        )
+
+    def compose_batch(
+        self,
+        prompts: Sequence[PromptEntry],
+        start_index: int,
+        batch_size: int,
+        preset: str,
+        random_action: bool,
+        random_background: bool,
+        random_camera: bool,
+        custom_positive: str = "",
+        custom_negative: str = "",
+        seed: int = 0,
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        unique_only: bool = False,
+        skip_seen: bool = False,
+        history_name: str = "default",
+        render_threads: int = 0,
+        shard_id: int = 0,
+        num_shards: int = 1,
+        shard_mode: str = "contiguous",
+    ) -> tuple[list[str], str, list[int], list[int]]:
+        """
+        Apply the batch formula to already loaded entries.
 
-        total = len(prompts)
-        result: list[str] = []
+        Shared by every node that selects entries differently but composes
+        prompts the same way (e.g. AnimePromptQuery).
 
-        # Initialize random with seed
-        random.seed(seed)
+        Args:
+            prompts: Non-empty entries to draw from, wrapping around.
+
+        The other arguments and the return value are as in load_batch.
+        """
+        if num_shards > 1:
+            try:
+                shard = shard_indices(len(prompts), shard_id, num_shards, shard_mode)
+            except ValueError as e:
+                return ([f"Error: {e}"], "", [0], [0])
+            if not shard:
+                return ([f"Error: Shard {shard_id} is empty"], "", [0], [0])
+            prompts = SubsetView(prompts, shard)
+
+        total = len(prompts)
+        indices = [(start_index + i) % total for i in range(batch_size)]
+        if skip_seen:
+            # Scan one full lap from start_index for entries never produced
+            history = open_history(history_path(history_name))
+            indices = take_unseen(
+                ((start_index + i) % total for i in range(total)),
+                lambda idx: content_key(prompts[idx].tags),
+                history,
+                batch_size,
+            )
+            if not indices:
+                return (["Error: Every entry is in the history"], "", [0], [0])
 
         # Get preset values
         preset_suffix = PRESETS.get(preset, DEFAULT_SUFFIX)
@@ -168,47 +348,24 @@ class AnimePromptBatch:
         # Clean preset suffix (remove leading comma)
         clean_preset = preset_suffix.lstrip(", ").strip() if preset_suffix else ""
 
-        for i in range(batch_size):
-            idx = (start_index + i) % total
-            entry = prompts[idx]
-
-            # Build prompt using formula:
-            # Quality Tags + Character + Action + Background + Camera + Custom
-            parts: list[str] = []
-
-            # 1. Quality Tags
-            if clean_preset:
-                parts.append(clean_preset)
-
-            # 2. Character tags
-            character_tags = entry.tags.strip().rstrip(",")
-            if character_tags:
-                parts.append(character_tags)
-
-            # 3. Random Action (different for each batch item)
-            if random_action:
-                action = random.choice(ACTIONS)
-                parts.append(action)
-
-            # 4. Random Background (different for each batch item)
-            if random_background:
-                background = random.choice(BACKGROUNDS)
-                parts.append(background)
-
-            # 5. Random Camera (different for each batch item)
-            if random_camera:
-                camera = random.choice(CAMERA_EFFECTS)
-                parts.append(camera)
-
-            # 6. Custom Positive
-            if custom_positive.strip():
-                custom = custom_positive.strip().lstrip(",").strip()
-                if custom:
-                    parts.append(custom)
-
-            # Join all parts
-            final_prompt = ", ".join(filter(None, parts))
-            result.append(final_prompt)
+        # Build prompts using formula:
+        # Quality Tags + Character + Action + Background + Camera + Custom
+        # Random layers come from a per-call generator, so concurrent runs
+        # never share random state
+        heads = [
+            (clean_preset, prompts[idx].tags.strip().rstrip(",")) for idx in indices
+        ]
+        result, token_counts = generate_prompts(
+            heads,
+            seed,
+            random_action,
+            random_background,
+            random_camera,
+            custom_positive,
+            token_budget,
+            dedupe_tags,
+            render_threads,
+        )
 
         # Combine preset negative + custom_negative
         if custom_negative.strip():
@@ -219,4 +376,18 @@ class AnimePromptBatch:
         else:
             final_negative = preset_negative
 
-        return (result, final_negative)
+        if dedupe_tags:
+            final_negative = dedupe_prompt(final_negative)
+
+        if unique_only:
+            # Identical prompts (e.g. index wraparound with random layers off)
+            # are emitted once; index_map re-expands them downstream
+            unique, index_map = collapse_duplicates(
+                list(zip(result, token_counts, strict=True))
+            )
+            result = [prompt for prompt, _ in unique]
+            token_counts = [count for _, count in unique]
+        else:
+            index_map = list(range(len(result)))
+
+        return (result, final_negative, token_counts, index_map)
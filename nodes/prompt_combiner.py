@@ -5,23 +5,23 @@ Combines characters from one file with styles from another file using nested loo
 Formula: Quality Tags + Style + Character + Action + Background + Camera Effects
 """
 
-import random
 from typing import Any
 
+from ..core.batch_utils import SHARD_MODES, collapse_duplicates, shard_indices
 from ..core.constants import (
-    ACTIONS,
-    BACKGROUNDS,
-    CAMERA_EFFECTS,
     DEFAULT_NEGATIVE,
     DEFAULT_SUFFIX,
     NEGATIVE_PRESETS,
     PRESETS,
 )
+from ..core.corpus_cache import load_corpus
 from ..core.file_utils import (
-    get_available_txt_files,
+    get_available_corpus_files,
+    get_corpus_source,
     get_prompt_file_path,
-    parse_prompt_file,
 )
+from ..core.generators import generate_prompts
+from ..core.tag_utils import dedupe_prompt
 
 
 class AnimePromptCombiner:
@@ -44,17 +44,32 @@ class AnimePromptCombiner:
         style_count: Number of styles to use per character
         preset: Style preset for quality tags
         random_action/background/camera: Dynamic generation options
+        token_budget: Max CLIP chunks (75 tokens each), 0 = unlimited.
+            Camera, background, then action layers are dropped to fit.
+        dedupe_tags: Remove repeated tags (case, underscores and weights
+            folded, highest weight kept) from the prompt and negative.
+        unique_only: Output each identical prompt once (see index_map)
+        shard_id / num_shards: Split the char × style grid between
+            independent workers; each outputs only its own disjoint share,
+            with the same prompts it would have in the unsharded run
+        shard_mode: "contiguous" blocks or "strided" (every num_shards-th)
+        character_glob: Read several character files as one, by glob
+            pattern (e.g. chars_*.txt) or .manifest file; overrides
+            character_file
 
     Outputs:
         prompts: List of combined prompts (char_count × style_count)
         negative: Combined negative prompt
+        token_count: Estimated CLIP token count of each prompt
+        index_map: For each batch position, the index of its prompt in
+            `prompts` (identity unless unique_only collapsed repeats)
     """
 
     CATEGORY = "prompt/anime"
     FUNCTION = "combine_prompts"
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("prompts", "negative")
-    OUTPUT_IS_LIST = (True, False)
+    RETURN_TYPES = ("STRING", "STRING", "INT", "INT")
+    RETURN_NAMES = ("prompts", "negative", "token_count", "index_map")
+    OUTPUT_IS_LIST = (True, False, True, True)
 
     # Maximum prompts to prevent accidental massive batches
     MAX_TOTAL_PROMPTS = 100
@@ -62,7 +77,7 @@ class AnimePromptCombiner:
     @classmethod
     def INPUT_TYPES(cls) -> dict[str, Any]:
         """Define input parameters for the node."""
-        txt_files = get_available_txt_files()
+        txt_files = get_available_corpus_files()
 
         return {
             "required": {
@@ -130,6 +145,28 @@ class AnimePromptCombiner:
                         "display": "number",
                     },
                 ),
+                "token_budget": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 8, "step": 1},
+                ),
+                "dedupe_tags": ("BOOLEAN", {"default": False}),
+                "unique_only": ("BOOLEAN", {"default": False}),
+                "shard_id": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 1023, "step": 1},
+                ),
+                "num_shards": (
+                    "INT",
+                    {"default": 1, "min": 1, "max": 1024, "step": 1},
+                ),
+                "shard_mode": (list(SHARD_MODES), {"default": "contiguous"}),
+                "character_glob": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "placeholder": "Several files: chars_*.txt or a .manifest",
+                    },
+                ),
             },
         }
 
@@ -148,33 +185,40 @@ class AnimePromptCombiner:
         custom_positive: str = "",
         custom_negative: str = "",
         seed: int = 0,
-    ) -> tuple[list[str], str]:
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        unique_only: bool = False,
+        shard_id: int = 0,
+        num_shards: int = 1,
+        shard_mode: str = "contiguous",
+        character_glob: str = "",
+    ) -> tuple[list[str], str, list[int], list[int]]:
         """
         Combine characters with styles using nested loops.
 
         Formula: Quality Tags + Style + Character + Action + Background + Camera + Custom
 
         Returns:
-            Tuple of (list of prompts, negative prompt).
+            Tuple of (list of prompts, negative prompt, list of token counts).
         """
         # Load character file
-        char_path = get_prompt_file_path(character_file)
         try:
-            characters = parse_prompt_file(char_path)
-        except (FileNotFoundError, OSError) as e:
-            return ([f"Error loading characters: {e}"], "")
+            char_path = get_corpus_source(character_file, character_glob)
+            characters = load_corpus(char_path).entries
+        except (OSError, ValueError) as e:
+            return ([f"Error loading characters: {e}"], "", [0], [0])
 
         # Load style file
         style_path = get_prompt_file_path(style_file)
         try:
-            styles = parse_prompt_file(style_path)
-        except (FileNotFoundError, OSError) as e:
-            return ([f"Error loading styles: {e}"], "")
+            styles = load_corpus(style_path).entries
+        except (OSError, ValueError) as e:
+            return ([f"Error loading styles: {e}"], "", [0], [0])
 
         if not characters:
-            return (["Error: No characters found"], "")
+            return (["Error: No characters found"], "", [0], [0])
         if not styles:
-            return (["Error: No styles found"], "")
+            return (["Error: No styles found"], "", [0], [0])
 
         # Limit total prompts
         total_prompts = char_count * style_count
@@ -184,64 +228,51 @@ class AnimePromptCombiner:
                     f"Error: Total prompts ({total_prompts}) exceeds max ({self.MAX_TOTAL_PROMPTS})"
                 ],
                 "",
+                [0],
+                [0],
             )
 
-        # Initialize random
-        random.seed(seed)
-
         # Get preset values
         preset_suffix = PRESETS.get(preset, DEFAULT_SUFFIX)
         preset_negative = NEGATIVE_PRESETS.get(preset, DEFAULT_NEGATIVE)
         clean_preset = preset_suffix.lstrip(", ").strip() if preset_suffix else ""
 
-        result: list[str] = []
-
-        # Nested loop: for each character, iterate through styles
-        for char_offset in range(char_count):
+        # Grid item j pairs character j // style_count with style
+        # j % style_count (nested loop: for each character, every style)
+        try:
+            positions = shard_indices(total_prompts, shard_id, num_shards, shard_mode)
+        except ValueError as e:
+            return ([f"Error: {e}"], "", [0], [0])
+        if not positions:
+            return ([f"Error: Shard {shard_id} is empty"], "", [0], [0])
+
+        # Build prompt: Quality + Style + Character + Action + Bg + Camera
+        heads: list[tuple[str, str, str]] = []
+        for position in positions:
+            char_offset, style_offset = divmod(position, style_count)
             char_idx = (char_start_index + char_offset) % len(characters)
-            char = characters[char_idx]
-
-            for style_offset in range(style_count):
-                style_idx = (style_start_index + style_offset) % len(styles)
-                style = styles[style_idx]
-
-                # Build prompt: Quality + Style + Character + Action + Bg + Camera
-                parts: list[str] = []
-
-                # 1. Quality Tags (from preset)
-                if clean_preset:
-                    parts.append(clean_preset)
-
-                # 2. Style tags (from style file)
-                style_tags = style.tags.strip().rstrip(",")
-                if style_tags:
-                    parts.append(style_tags)
-
-                # 3. Character tags (from character file)
-                char_tags = char.tags.strip().rstrip(",")
-                if char_tags:
-                    parts.append(char_tags)
-
-                # 4. Random Action
-                if random_action:
-                    parts.append(random.choice(ACTIONS))
-
-                # 5. Random Background
-                if random_background:
-                    parts.append(random.choice(BACKGROUNDS))
-
-                # 6. Random Camera
-                if random_camera:
-                    parts.append(random.choice(CAMERA_EFFECTS))
-
-                # 7. Custom Positive
-                if custom_positive.strip():
-                    custom = custom_positive.strip().lstrip(",").strip()
-                    if custom:
-                        parts.append(custom)
+            style_idx = (style_start_index + style_offset) % len(styles)
+            heads.append(
+                (
+                    clean_preset,
+                    styles[style_idx].tags.strip().rstrip(","),
+                    characters[char_idx].tags.strip().rstrip(","),
+                )
+            )
 
-                final_prompt = ", ".join(filter(None, parts))
-                result.append(final_prompt)
+        # Random layers come from a per-call generator seeded here; each
+        # grid item keeps its draws whichever shard renders it
+        result, token_counts = generate_prompts(
+            heads,
+            seed,
+            random_action,
+            random_background,
+            random_camera,
+            custom_positive,
+            token_budget,
+            dedupe_tags,
+            positions=positions,
+        )
 
         # Combine negatives
         if custom_negative.strip():
@@ -252,4 +283,18 @@ class AnimePromptCombiner:
         else:
             final_negative = preset_negative
 
-        return (result, final_negative)
+        if dedupe_tags:
+            final_negative = dedupe_prompt(final_negative)
+
+        if unique_only:
+            # Identical prompts (e.g. index wraparound with random layers off)
+            # are emitted once; index_map re-expands them downstream
+            unique, index_map = collapse_duplicates(
+                list(zip(result, token_counts, strict=True))
+            )
+            result = [prompt for prompt, _ in unique]
+            token_counts = [count for _, count in unique]
+        else:
+            index_map = list(range(len(result)))
+
+        return (result, final_negative, token_counts, index_map)
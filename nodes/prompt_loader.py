@@ -6,23 +6,25 @@ Formula: Quality Tags + Character + Action + Background + Camera Effects
 """
 
 import random
+from collections.abc import Sequence
 from typing import Any
 
 from ..core.constants import (
-    ACTIONS,
-    BACKGROUNDS,
-    CAMERA_EFFECTS,
     DEFAULT_NEGATIVE,
     DEFAULT_SUFFIX,
     NEGATIVE_PRESETS,
     PRESETS,
 )
+from ..core.corpus_cache import load_corpus
+from ..core.coverage import open_coverage
 from ..core.file_utils import (
     PromptEntry,
-    get_available_txt_files,
-    get_prompt_file_path,
-    parse_prompt_file,
+    get_available_corpus_files,
+    get_corpus_source,
 )
+from ..core.generators import clean_custom, draw_layers, render_prompt
+from ..core.strata import STRATA_DIMENSIONS, STRATA_MODES, StrataIndex
+from ..core.tag_utils import dedupe_prompt
 
 
 class AnimePromptLoader:
@@ -35,38 +37,54 @@ class AnimePromptLoader:
 
     Inputs:
         prompt_file: Select from available TXT files
-        index: Prompt index for sequential mode
-        mode: "sequential" or "random" selection
+        index: Prompt index for sequential mode (batch position in
+            stratified mode)
+        mode: "sequential", "random", "stratified" or "unused_first"
+            (next entry no run has used yet, tracked per corpus on disk)
         preset: Style preset for quality tags
         random_action: Add a random action/pose
         random_background: Add a random background
         random_camera: Add random camera/lighting effects
         custom_positive: Your additional positive tags
         custom_negative: Your additional negative tags
+        token_budget: Max CLIP chunks (75 tokens each), 0 = unlimited.
+            Camera, background, then action layers are dropped to fit.
+        dedupe_tags: Remove repeated tags (case, underscores and weights
+            folded, highest weight kept) from the prompt and negative.
+        strata_dimension: Tag dimension balanced by stratified mode
+        strata_mode: "round_robin" (equal share per stratum) or
+            "proportional" (share follows stratum size, evenly spread)
+        prompt_glob: Read several files as one corpus, by glob pattern
+            (e.g. chars_*.txt) or .manifest file; overrides prompt_file
 
     Outputs:
         prompt: The complete prompt string
         negative: Combined negative prompt
         character_name: Character name from file
         current_index: The selected prompt index
-        total_prompts: Total number of prompts in file
+        total_prompts: Total number of prompts in the file(s)
+        token_count: Estimated CLIP token count of the prompt
+        remaining_unused: Entries left in the current unused_first lap
+            (0 in other modes)
     """
 
     CATEGORY = "prompt/anime"
     FUNCTION = "load_prompt"
-    RETURN_TYPES = ("STRING", "STRING", "STRING", "INT", "INT")
+    RETURN_TYPES = ("STRING", "STRING", "STRING", "INT", "INT", "INT", "INT")
     RETURN_NAMES = (
         "prompt",
         "negative",
         "character_name",
         "current_index",
         "total_prompts",
+        "token_count",
+        "remaining_unused",
     )
 
     @classmethod
     def INPUT_TYPES(cls) -> dict[str, Any]:
         """Define input parameters for the node."""
-        txt_files = get_available_txt_files()
+        txt_files = get_available_corpus_files()
 
         return {
             "required": {
@@ -84,7 +102,10 @@ class AnimePromptLoader:
                         "display": "number",
                     },
                 ),
-                "mode": (["sequential", "random"], {"default": "sequential"}),
+                "mode": (
+                    ["sequential", "random", "stratified", "unused_first"],
+                    {"default": "sequential"},
+                ),
                 "preset": (
                     list(PRESETS.keys()),
                     {"default": "standard"},
@@ -119,9 +140,37 @@ class AnimePromptLoader:
                         "display": "number",
                     },
                 ),
+                "token_budget": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 8, "step": 1},
+                ),
+                "dedupe_tags": ("BOOLEAN", {"default": False}),
+                "strata_dimension": (
+                    list(STRATA_DIMENSIONS.keys()),
+                    {"default": "hair_color"},
+                ),
+                "strata_mode": (list(STRATA_MODES), {"default": "round_robin"}),
+                "prompt_glob": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "placeholder": "Several files: chars_*.txt or a .manifest",
+                    },
+                ),
             },
         }
 
+    @classmethod
+    def IS_CHANGED(cls, mode: str = "sequential", **kwargs: Any) -> float | str:
+        """
+        Force a re-run in unused_first mode.
+
+        ComfyUI reuses a node's cached output while its inputs are
+        unchanged, which would return the same "unused" entry forever and
+        never advance the coverage bitmap. NaN never compares equal.
+        """
+        return float("nan") if mode == "unused_first" else ""
+
     def load_prompt(
         self,
         prompt_file: str,
@@ -134,7 +183,12 @@ class AnimePromptLoader:
         custom_positive: str = "",
         custom_negative: str = "",
         seed: int = 0,
-    ) -> tuple[str, str, str, int, int]:
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        strata_dimension: str = "hair_color",
+        strata_mode: str = "round_robin",
+        prompt_glob: str = "",
+    ) -> tuple[str, str, str, int, int, int, int]:
         """
         Load a prompt with dynamic generation.
 
@@ -142,8 +196,9 @@ class AnimePromptLoader:
 
         Args:
             prompt_file: Name of the TXT file to load.
-            index: Index for sequential mode.
-            mode: Selection mode ("sequential" or "random").
+            index: Index for sequential mode, position in stratified mode.
+            mode: Selection mode ("sequential", "random", "stratified" or
+                "unused_first").
             preset: Style preset for quality tags.
             random_action: Whether to add a random action.
             random_background: Whether to add a random background.
@@ -151,30 +206,55 @@ class AnimePromptLoader:
             custom_positive: Your custom POSITIVE prompt.
             custom_negative: Your custom NEGATIVE prompt.
             seed: Random seed for reproducibility.
+            token_budget: Max CLIP chunks for the prompt, 0 = unlimited.
+            dedupe_tags: Whether to remove repeated tags.
+            strata_dimension: Tag dimension for stratified mode.
+            strata_mode: "round_robin" or "proportional".
+            prompt_glob: Glob or manifest of several files, read as one
+                corpus instead of prompt_file.
 
         Returns:
-            Tuple of (prompt, negative, character_name, current_index, total_prompts).
+            Tuple of (prompt, negative, character_name, current_index,
+            total_prompts, token_count, remaining_unused).
         """
-        file_path = get_prompt_file_path(prompt_file)
-
         try:
-            prompts: list[PromptEntry] = parse_prompt_file(file_path)
+            source = get_corpus_source(prompt_file, prompt_glob)
+            corpus = load_corpus(source)
         except FileNotFoundError:
-            return (f"Error: {prompt_file} not found", "", "", 0, 0)
-        except OSError as e:
-            return (f"Error: {e}", "", "", 0, 0)
+            name = prompt_glob.strip() or prompt_file
+            return (f"Error: {name} not found", "", "", 0, 0, 0, 0)
+        except (OSError, ValueError) as e:
+            # ValueError: e.g. a member file that isn't UTF-8 text
+            return (f"Error: {e}", "", "", 0, 0, 0, 0)
 
+        prompts: Sequence[PromptEntry] = corpus.entries
         if not prompts:
-            return ("Error: No prompts found in file", "", "", 0, 0)
+            return ("Error: No prompts found in file", "", "", 0, 0, 0, 0)
 
         total = len(prompts)
 
-        # Initialize random with seed for reproducibility
-        random.seed(seed)
+        # Per-call generator: concurrent runs never share random state
+        rng = random.Random(seed)
 
         # Select prompt based on mode
-        if mode == "random":
-            selected_index = random.randint(0, total - 1)
+        remaining = 0
+        if mode == "unused_first":
+            # Lowest entry no run has taken yet, persisted per corpus so it
+            # holds across restarts, workflows and processes
+            try:
+                taken = open_coverage(source, total).take()
+            except (OSError, ValueError) as e:
+                return (f"Error: {e}", "", "", 0, 0, 0, 0)
+            selected_index, remaining = taken.index, taken.remaining
+        elif mode == "random":
+            selected_index = rng.randint(0, total - 1)
+        elif mode == "stratified":
+            # Strata are bucketed once per file version and cached
+            strata = corpus.derived(
+                f"strata:{strata_dimension}",
+                lambda entries: StrataIndex.from_entries(entries, strata_dimension),
+            )
+            selected_index = strata.draw(index, seed, strata_mode)
         else:
             selected_index = index % total
 
@@ -184,45 +264,20 @@ class AnimePromptLoader:
         preset_suffix = PRESETS.get(preset, DEFAULT_SUFFIX)
         preset_negative = NEGATIVE_PRESETS.get(preset, DEFAULT_NEGATIVE)
 
+        # Remove leading comma and space from preset
+        clean_preset = preset_suffix.lstrip(", ").strip() if preset_suffix else ""
+
         # Build the final prompt using the formula:
         # Quality Tags + Character + Action + Background + Camera + Custom
-        parts: list[str] = []
-
-        # 1. Quality Tags (from preset)
-        if preset_suffix:
-            # Remove leading comma and space from preset
-            clean_preset = preset_suffix.lstrip(", ").strip()
-            if clean_preset:
-                parts.append(clean_preset)
-
-        # 2. Character tags (from file)
-        character_tags = entry.tags.strip().rstrip(",")
-        if character_tags:
-            parts.append(character_tags)
-
-        # 3. Random Action
-        if random_action:
-            action = random.choice(ACTIONS)
-            parts.append(action)
-
-        # 4. Random Background
-        if random_background:
-            background = random.choice(BACKGROUNDS)
-            parts.append(background)
-
-        # 5. Random Camera Effects
-        if random_camera:
-            camera = random.choice(CAMERA_EFFECTS)
-            parts.append(camera)
-
-        # 6. Custom Positive
-        if custom_positive.strip():
-            custom = custom_positive.strip().lstrip(",").strip()
-            if custom:
-                parts.append(custom)
-
-        # Join all parts with comma separator
-        final_prompt = ", ".join(filter(None, parts))
+        # Layers over budget are dropped
+        (draw,) = draw_layers(rng, 1, random_action, random_background, random_camera)
+        final_prompt, token_count = render_prompt(
+            (clean_preset, entry.tags.strip().rstrip(",")),
+            draw,
+            clean_custom(custom_positive),
+            token_budget,
+            dedupe_tags,
+        )
 
         # Combine preset negative + custom_negative
         if custom_negative.strip():
@@ -233,10 +288,15 @@ class AnimePromptLoader:
         else:
             final_negative = preset_negative
 
+        if dedupe_tags:
+            final_negative = dedupe_prompt(final_negative)
+
         return (
             final_prompt,
             final_negative,
             entry.character_name,
             selected_index,
             total,
+            token_count,
+            remaining,
         )
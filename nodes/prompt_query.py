@@ -0,0 +1,156 @@
+"""
+AnimePromptQuery node for ComfyUI.
+
+Selects entries with a boolean tag query and outputs a batch of prompts.
+Formula: Quality Tags + Character + Action + Background + Camera Effects
+"""
+
+from typing import Any
+
+from ..core.batch_utils import SubsetView
+from ..core.corpus_cache import load_corpus
+from ..core.corpus_db import DbEntries
+from ..core.file_utils import get_corpus_source
+from ..core.prefetch import prefetch_windows
+from ..core.tag_index import TagIndex
+from .prompt_batch import AnimePromptBatch, _records_history, _selected_corpus
+
+
+class AnimePromptQuery(AnimePromptBatch):
+    """
+    Output a batch of prompts whose tags match a boolean query.
+
+    Formula: Quality Tags + Character + Action + Background + Camera Effects
+    (same as Anime Prompt Batch, applied to the matching entries only)
+
+    Query syntax: tags joined with AND, OR, NOT and parentheses, e.g.
+    `pink hair AND (sad OR crying) AND NOT blue hair`. A comma means AND;
+    quote tags containing brackets. Tags match case-, underscore- and
+    weight-insensitively.
+
+    The tag index is built once per file version and cached, so queries
+    take milliseconds even on million-line corpora. Imported .db corpora
+    are queried through their FTS index instead, without building one.
+
+    Inputs:
+        query: Boolean tag expression
+        start_index: Offset into the matching entries
+        shard_id / num_shards: Split the matching entries between workers
+        (other inputs as in Anime Prompt Batch)
+
+    Outputs:
+        prompts: List of prompt strings (for batch processing)
+        negative: Combined negative prompt
+        token_count: Estimated CLIP token count of each prompt
+        index_map: For each batch position, the index of its prompt in
+            `prompts` (identity unless unique_only collapsed repeats)
+        match_count: Number of entries matching the query
+    """
+
+    FUNCTION = "query_batch"
+    RETURN_TYPES = ("STRING", "STRING", "INT", "INT", "INT")
+    RETURN_NAMES = ("prompts", "negative", "token_count", "index_map", "match_count")
+    OUTPUT_IS_LIST = (True, False, True, True, False)
+
+    @classmethod
+    def INPUT_TYPES(cls) -> dict[str, Any]:
+        """Define input parameters for the node."""
+        inputs = super().INPUT_TYPES()
+        required = {
+            "prompt_file": inputs["required"].pop("prompt_file"),
+            "query": (
+                "STRING",
+                {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "pink hair AND (sad OR crying) AND NOT blue hair",
+                },
+            ),
+        }
+        required.update(inputs["required"])
+        inputs["required"] = required
+        return inputs
+
+    @prefetch_windows(_selected_corpus, bypass_if=_records_history)
+    def query_batch(
+        self,
+        prompt_file: str,
+        query: str,
+        start_index: int,
+        batch_size: int,
+        preset: str,
+        random_action: bool,
+        random_background: bool,
+        random_camera: bool,
+        custom_positive: str = "",
+        custom_negative: str = "",
+        seed: int = 0,
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        unique_only: bool = False,
+        skip_seen: bool = False,
+        history_name: str = "default",
+        render_threads: int = 0,
+        shard_id: int = 0,
+        num_shards: int = 1,
+        shard_mode: str = "contiguous",
+        prompt_glob: str = "",
+    ) -> tuple[list[str], str, list[int], list[int], int]:
+        """
+        Select entries matching a tag query and compose a batch from them.
+
+        Args:
+            prompt_file: Name of the TXT file to query.
+            query: Boolean tag expression.
+            start_index: Offset into the matching entries.
+
+        The other arguments are as in AnimePromptBatch.load_batch.
+
+        Returns:
+            The AnimePromptBatch outputs plus the number of matches.
+        """
+        try:
+            source = get_corpus_source(prompt_file, prompt_glob)
+            corpus = load_corpus(source)
+        except FileNotFoundError:
+            name = prompt_glob.strip() or prompt_file
+            return ([f"Error: {name} not found"], "", [0], [0], 0)
+        except (OSError, ValueError) as e:
+            # ValueError: e.g. a member file that isn't UTF-8 text
+            return ([f"Error: {e}"], "", [0], [0], 0)
+
+        try:
+            if isinstance(corpus.entries, DbEntries):
+                # Evaluated by SQLite's FTS index; only matched rows are read
+                matches = corpus.entries.query(query)
+            else:
+                index = corpus.derived("tag_index", TagIndex.from_entries)
+                matches = index.query(query)
+        except ValueError as e:
+            return ([f"Error: invalid query: {e}"], "", [0], [0], 0)
+
+        if not matches:
+            return (["Error: No entries match the query"], "", [0], [0], 0)
+
+        batch = self.compose_batch(
+            SubsetView(corpus.entries, matches),
+            start_index,
+            batch_size,
+            preset,
+            random_action,
+            random_background,
+            random_camera,
+            custom_positive,
+            custom_negative,
+            seed,
+            token_budget,
+            dedupe_tags,
+            unique_only,
+            skip_seen,
+            history_name,
+            render_threads,
+            shard_id,
+            num_shards,
+            shard_mode,
+        )
+        return (*batch, len(matches))
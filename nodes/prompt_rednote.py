@@ -3,47 +3,83 @@ AnimePromptRedNote node for ComfyUI - FLUX/QWEN COMPATIBLE.
 - Added 'target_model' switch.
 - Added 'clean_tag' to strip weights (:1.2) and underscores.
 - Fixes 'Tag Soup' for Flux generations.
+- Uses pre-cleaned Flux companion files (scripts/precompile_flux.py) when present.
 """
 
+import os
 import random
-import re
+from collections.abc import Sequence
 from typing import Any
 
+from ..core.batch_utils import SHARD_MODES, shard_indices
+from ..core.composer import (
+    LAYER_ACTION,
+    LAYER_BACKGROUND,
+    LAYER_CAMERA,
+    LAYER_REQUIRED,
+    compose_layers,
+)
 from ..core.constants import (
     ACTIONS,
     BACKGROUNDS,
     CAMERA_EFFECTS,
+    FLUX_CONNECTORS,
+    FLUX_PREFIX,
+    FLUX_STYLE_PREFIX,
     NEGATIVE_PRESETS,
     PRESETS,
     QUALITY_TAGS,
-    FLUX_PREFIX,
-    FLUX_STYLE_PREFIX,
-    FLUX_CONNECTORS,
 )
+from ..core.corpus_cache import Corpus, load_corpus
 from ..core.file_utils import (
-    get_available_txt_files,
+    PromptEntry,
+    get_available_corpus_files,
+    get_corpus_source,
+    get_flux_companion_path,
     get_prompt_file_path,
-    parse_prompt_file,
+    load_flux_companion,
 )
 from ..core.rednote_utils import (
     REDNOTE_CHARACTER,
     REDNOTE_NEG_BASE,
     REDNOTE_NEG_SAFETY,
     REDNOTE_STYLE,
+    filter_characters,
     get_mood_prompt,
+    score_entries,
 )
+from ..core.strata import STRATA_DIMENSIONS, STRATA_MODES, StrataIndex
+from ..core.tag_utils import clean_tag, dedupe_prompt
+from ..core.token_utils import estimate_tokens
+
+
+def _flux_companion(corpus: Corpus) -> Sequence[PromptEntry] | None:
+    """
+    Get a corpus's pre-cleaned Flux companion, read once per file version.
+
+    Cached on the corpus, so an edited source drops it; the companion's own
+    mtime is part of the slot, so re-running precompile_flux.py is picked up.
+    """
+    try:
+        stamp = os.stat(get_flux_companion_path(corpus.file_path)).st_mtime_ns
+    except OSError:
+        return None
+    return corpus.derived(
+        f"flux_companion:{stamp}",
+        lambda entries: load_flux_companion(corpus.file_path, len(entries)),
+    )
 
 
 class AnimePromptRedNote:
     CATEGORY = "prompt/anime"
     FUNCTION = "generate_rednote"
-    RETURN_TYPES = ("STRING", "STRING", "STRING", "STRING")
-    RETURN_NAMES = ("prompt", "negative", "character_name", "mood_tags")
-    OUTPUT_IS_LIST = (True, False, True, True)
+    RETURN_TYPES = ("STRING", "STRING", "STRING", "STRING", "INT")
+    RETURN_NAMES = ("prompt", "negative", "character_name", "mood_tags", "token_count")
+    OUTPUT_IS_LIST = (True, False, True, True, True)
 
     @classmethod
     def INPUT_TYPES(cls) -> dict[str, Any]:
-        txt_files = get_available_txt_files()
+        txt_files = get_available_corpus_files()
         default_style = (
             "style_names.txt"
             if "style_names.txt" in txt_files
@@ -69,7 +105,10 @@ class AnimePromptRedNote:
                 ),
                 "batch_size": ("INT", {"default": 1, "min": 1, "max": 1000, "step": 1}),
                 "preset": (preset_list, {"default": "RedNote"}),
-                "mode": (["sequential", "random"], {"default": "sequential"}),
+                "mode": (
+                    ["sequential", "random", "stratified"],
+                    {"default": "sequential"},
+                ),
                 "mood_level": (
                     "FLOAT",
                     {
@@ -92,6 +131,46 @@ class AnimePromptRedNote:
                 "custom_positive": ("STRING", {"default": "", "multiline": True}),
                 "custom_negative": ("STRING", {"default": "", "multiline": True}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xFFFFFFFFFFFFFFFF}),
+                # Max CLIP chunks in tag mode, 0 = unlimited
+                "token_budget": ("INT", {"default": 0, "min": 0, "max": 8, "step": 1}),
+                # Remove repeated tags in tag mode (highest weight kept)
+                "dedupe_tags": ("BOOLEAN", {"default": False}),
+                # Only use the N characters that best fit the RedNote look, 0 = all
+                "aesthetic_top_n": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 1000000, "step": 1},
+                ),
+                # Only use characters scoring at least this much, 0 = off
+                "aesthetic_min_score": (
+                    "FLOAT",
+                    {"default": 0.0, "min": 0.0, "max": 100.0, "step": 0.5},
+                ),
+                # Tag dimension balanced by "stratified" mode
+                "strata_dimension": (
+                    list(STRATA_DIMENSIONS.keys()),
+                    {"default": "hair_color"},
+                ),
+                "strata_mode": (list(STRATA_MODES), {"default": "round_robin"}),
+                # Split the characters between independent workers: each
+                # worker only draws from its own disjoint share
+                "shard_id": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 1023, "step": 1},
+                ),
+                "num_shards": (
+                    "INT",
+                    {"default": 1, "min": 1, "max": 1024, "step": 1},
+                ),
+                "shard_mode": (list(SHARD_MODES), {"default": "contiguous"}),
+                # Read several character files as one (glob or .manifest),
+                # overriding prompt_file
+                "prompt_glob": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "placeholder": "Several files: chars_*.txt or a .manifest",
+                    },
+                ),
             },
         }
 
@@ -100,32 +179,7 @@ class AnimePromptRedNote:
         Aggressive cleaner for Flux/Natural Language.
         Removes: weights (:1.3), parens, '1girl', 'lora triggers', and fixes commas.
         """
-        if not text:
-            return ""
-
-        # 1. Remove weights (e.g., :1.3, :0.5, :1)
-        text = re.sub(r":\d+(\.\d+)?", "", text)
-
-        # 2. Remove parenthesis completely
-        text = text.replace("(", "").replace(")", "").replace("{", "").replace("}", "")
-
-        # 3. Replace underscores with spaces
-        text = text.replace("_", " ")
-
-        # 4. Remove Booru-isms that sound robotic in sentences
-        # Remove '1girl' (we already say 'A girl with...')
-        text = re.sub(r"\b1girl\b", "", text, flags=re.IGNORECASE)
-        # Remove 'lora triggers:' junk text (Case insensitive)
-        text = re.sub(r"(?i)lora triggers?:?", "", text)
-
-        # 5. Fix Comma Spacing (tag1,tag2 -> tag1, tag2)
-        text = re.sub(r",\s*", ", ", text)
-
-        # 6. Cleanup double spaces or trailing punctuation
-        text = re.sub(r"\s+", " ", text).strip()
-        text = text.strip(", ")  # Remove trailing commas
-
-        return text
+        return clean_tag(text)
 
     def generate_rednote(
         self,
@@ -144,46 +198,120 @@ class AnimePromptRedNote:
         custom_positive="",
         custom_negative="",
         seed=0,
+        token_budget=0,
+        dedupe_tags=False,
+        aesthetic_top_n=0,
+        aesthetic_min_score=0.0,
+        strata_dimension="hair_color",
+        strata_mode="round_robin",
+        shard_id=0,
+        num_shards=1,
+        shard_mode="contiguous",
+        prompt_glob="",
     ):
+        style_path = get_prompt_file_path(style_file)
         try:
-            char_prompts = parse_prompt_file(get_prompt_file_path(prompt_file))
-            style_prompts = parse_prompt_file(get_prompt_file_path(style_file))
+            char_path = get_corpus_source(prompt_file, prompt_glob)
+            char_corpus = load_corpus(char_path)
+            style_corpus = load_corpus(style_path)
+            style_prompts = style_corpus.entries
         except Exception:
-            return (["Error loading files"], "", ["Error"], ["Error"])
+            return (["Error loading files"], "", ["Error"], ["Error"], [0])
 
+        char_prompts = char_corpus.entries
         if not char_prompts:
-            return (["Error: No prompts"], "", ["Error"], ["Error"])
+            return (["Error: No prompts"], "", ["Error"], ["Error"], [0])
 
-        # Setup
+        # Setup: target_ids maps a character position to its line in the file
         target_list = char_prompts
-        total_chars = len(target_list)
+        target_ids = range(len(char_prompts))
+        if aesthetic_top_n > 0 or aesthetic_min_score > 0:
+            # Scores are computed once per file version and cached
+            scores = char_corpus.derived("aesthetic_scores", score_entries)
+            target_ids = filter_characters(
+                char_prompts,
+                top_n=aesthetic_top_n,
+                min_score=aesthetic_min_score or None,
+                scores=scores,
+            )
+            if not target_ids:
+                return (
+                    ["Error: No characters pass the aesthetic filter"],
+                    "",
+                    ["Error"],
+                    ["Error"],
+                    [0],
+                )
+        if num_shards > 1:
+            # Shard after filtering so workers split the filtered set
+            try:
+                shard = shard_indices(len(target_ids), shard_id, num_shards, shard_mode)
+            except ValueError as e:
+                return ([f"Error: {e}"], "", ["Error"], ["Error"], [0])
+            if not shard:
+                return (
+                    [f"Error: Shard {shard_id} is empty"],
+                    "",
+                    ["Error"],
+                    ["Error"],
+                    [0],
+                )
+            target_ids = target_ids[shard.start : shard.stop : shard.step]
+        total_chars = len(target_ids)
+
+        strata = None
+        if mode == "stratified":
+            if target_ids == range(len(char_prompts)):
+                # Whole file: strata are bucketed once per file version
+                strata = char_corpus.derived(
+                    f"strata:{strata_dimension}",
+                    lambda entries: StrataIndex.from_entries(entries, strata_dimension),
+                )
+            else:
+                # Aesthetic subset: bucket just the selected characters
+                strata = StrataIndex.build(
+                    (char_prompts[i].tags for i in target_ids), strata_dimension
+                )
         total_styles = len(style_prompts) if style_prompts else 0
         prompts_out = []
         character_names_out = []
         mood_tags_out = []
+        token_counts_out = []
 
         # Detect Model Mode
         is_flux = target_model == "Flux/Qwen (Natural)"
 
-        random.seed(seed)
+        # Pre-cleaned companions let Flux mode skip live tag cleaning
+        flux_chars = None
+        flux_styles = None
+        if is_flux:
+            flux_chars = _flux_companion(char_corpus)
+            if style_prompts:
+                flux_styles = _flux_companion(style_corpus)
+
+        # Per-call generator: concurrent runs never share random state
+        rng = random.Random(seed)
 
         for i in range(batch_size):
             current_index = start_index + i
 
             # Select Character
             if mode == "random":
-                char_idx = random.randint(0, total_chars - 1)
+                char_idx = target_ids[rng.randint(0, total_chars - 1)]
+            elif strata is not None:
+                char_idx = target_ids[strata.draw(current_index, seed, strata_mode)]
             else:
-                char_idx = current_index % total_chars
+                char_idx = target_ids[current_index % total_chars]
             entry = target_list[char_idx]
 
             # Select Style
             style_tag = ""
+            style_idx = 0
             if style_prompts:
                 if enable_style_lock:
                     style_idx = current_index % total_styles
                 else:
-                    style_idx = random.randint(0, total_styles - 1)
+                    style_idx = rng.randint(0, total_styles - 1)
                 style_tag = style_prompts[style_idx].tags.strip().rstrip(",")
 
             # --- BRANCHING LOGIC ---
@@ -193,8 +321,12 @@ class AnimePromptRedNote:
 
                 # 1. Subject Sentence
                 # Clean the character tags (remove :1.2, underscores)
-                clean_char_tags = self.clean_tag(entry.tags)
-                clean_char_name = self.clean_tag(entry.character_name)
+                if flux_chars:
+                    clean_char_tags = flux_chars[char_idx].tags
+                    clean_char_name = flux_chars[char_idx].character_name
+                else:
+                    clean_char_tags = self.clean_tag(entry.tags)
+                    clean_char_name = self.clean_tag(entry.character_name)
 
                 # "A high-quality anime illustration of [Name], a girl with [Tags]."
                 prompt_text = (
@@ -203,13 +335,13 @@ class AnimePromptRedNote:
 
                 # 2. Action Sentence
                 if random_action:
-                    act = random.choice(ACTIONS)
+                    act = rng.choice(ACTIONS)
                     clean_act = self.clean_tag(act)
                     prompt_text += f" {FLUX_CONNECTORS['action']} {clean_act}."
 
                 # 3. Background Sentence
                 if random_background:
-                    bg = random.choice(BACKGROUNDS)
+                    bg = rng.choice(BACKGROUNDS)
                     clean_bg = self.clean_tag(bg)
                     prompt_text += f" {FLUX_CONNECTORS['background']} {clean_bg}."
 
@@ -221,8 +353,11 @@ class AnimePromptRedNote:
 
                 # 5. Style/Camera Sentence
                 if style_tag or random_camera:
-                    cam = random.choice(CAMERA_EFFECTS) if random_camera else ""
-                    clean_style = self.clean_tag(style_tag)
+                    cam = rng.choice(CAMERA_EFFECTS) if random_camera else ""
+                    if flux_styles:
+                        clean_style = flux_styles[style_idx].tags
+                    else:
+                        clean_style = self.clean_tag(style_tag)
                     clean_cam = self.clean_tag(cam)
 
                     if clean_style:
@@ -236,54 +371,60 @@ class AnimePromptRedNote:
                     prompt_text += f" {clean_custom}."
 
                 prompts_out.append(prompt_text)
+                token_counts_out.append(estimate_tokens(prompt_text))
 
             else:
                 # === ILLUSTRIOUS / TAG MODE (Your original logic) ===
-                parts = []
+                layers = []
 
                 # Layer 1: Quality
                 if preset == "RedNote":
-                    parts.append(QUALITY_TAGS)
-                    parts.append(REDNOTE_STYLE.lstrip(", ").strip())
+                    layers.append((QUALITY_TAGS, LAYER_REQUIRED))
+                    layers.append((REDNOTE_STYLE.lstrip(", ").strip(), LAYER_REQUIRED))
                 else:
                     preset_tags = PRESETS.get(preset, "")
                     if preset_tags:
-                        parts.append(preset_tags)
+                        layers.append((preset_tags, LAYER_REQUIRED))
 
                 # Layer 2: Artist Style
                 if style_tag:
-                    parts.append(style_tag)
+                    layers.append((style_tag, LAYER_REQUIRED))
 
                 # Layer 3: Character
-                parts.append(entry.tags.strip().rstrip(","))
+                layers.append((entry.tags.strip().rstrip(","), LAYER_REQUIRED))
 
-                # Layer 4: Action & Safety
+                # Layer 4: Action & Safety (dropped together when over budget)
                 if random_action:
-                    selected_action = random.choice(ACTIONS)
-                    parts.append(selected_action)
+                    selected_action = rng.choice(ACTIONS)
                     if any(
                         x in selected_action for x in ["sitting", "hugging", "lying"]
                     ):
-                        parts.append("(pretty white lace safety shorts:1.3)")
+                        selected_action += ", (pretty white lace safety shorts:1.3)"
+                    layers.append((selected_action, LAYER_ACTION))
 
                 if random_background:
-                    parts.append(random.choice(BACKGROUNDS))
+                    layers.append((rng.choice(BACKGROUNDS), LAYER_BACKGROUND))
                 if random_camera:
-                    parts.append(random.choice(CAMERA_EFFECTS))
+                    layers.append((rng.choice(CAMERA_EFFECTS), LAYER_CAMERA))
 
                 # Layer 5: Mood
                 mood_tags = get_mood_prompt(mood_level)
-                parts.append(mood_tags)
+                layers.append((mood_tags, LAYER_REQUIRED))
 
                 # Layer 6: RedNote Enforcers
                 if preset == "RedNote":
-                    parts.append(REDNOTE_CHARACTER.lstrip(", ").strip())
+                    layers.append(
+                        (REDNOTE_CHARACTER.lstrip(", ").strip(), LAYER_REQUIRED)
+                    )
 
                 if custom_positive:
-                    parts.append(custom_positive)
+                    layers.append((custom_positive, LAYER_REQUIRED))
 
-                final_prompt = ", ".join(filter(None, parts))
+                final_prompt, token_count = compose_layers(
+                    layers, token_budget, dedupe_tags
+                )
                 prompts_out.append(final_prompt)
+                token_counts_out.append(token_count)
 
             character_names_out.append(entry.character_name)
             mood_tags_out.append(mood_tags)
@@ -307,5 +448,13 @@ class AnimePromptRedNote:
                 negative_parts.append(custom_negative.strip())
 
             final_negative = ", ".join(filter(None, negative_parts))
-
-        return (prompts_out, final_negative, character_names_out, mood_tags_out)
+            if dedupe_tags:
+                final_negative = dedupe_prompt(final_negative)
+
+        return (
+            prompts_out,
+            final_negative,
+            character_names_out,
+            mood_tags_out,
+            token_counts_out,
+        )
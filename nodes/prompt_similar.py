@@ -0,0 +1,171 @@
+"""
+AnimePromptSimilar node for ComfyUI.
+
+Outputs a batch of the entries most similar to a seed entry or tag list.
+Formula: Quality Tags + Character + Action + Background + Camera Effects
+"""
+
+from typing import Any
+
+from ..core.corpus_cache import load_corpus
+from ..core.file_utils import get_corpus_source
+from ..core.similarity import SimilarityIndex
+from ..core.tag_index import TagIndex
+from .prompt_batch import AnimePromptBatch
+
+
+class AnimePromptSimilar(AnimePromptBatch):
+    """
+    Output "more like this" prompts: the top-K entries by tag-set similarity.
+
+    Formula: Quality Tags + Character + Action + Background + Camera Effects
+    (same as Anime Prompt Batch, applied to the most similar entries)
+
+    Similarity is the Jaccard index of normalized tag sets. A MinHash/LSH
+    index is built once per file version and cached, so lookups only score
+    a small candidate set instead of the whole corpus.
+
+    Inputs:
+        seed_index: Line of the file to find neighbours of
+        top_k: Number of similar entries to output
+        query_tags: Free-text tags to search with instead of seed_index
+        (other inputs as in Anime Prompt Batch)
+
+    Outputs:
+        prompts: List of prompt strings, most similar first
+        negative: Combined negative prompt
+        token_count: Estimated CLIP token count of each prompt
+        index_map: For each batch position, the index of its prompt in
+            `prompts` (identity unless unique_only collapsed repeats)
+        entry_index: Corpus line of each batch position
+        similarity: Jaccard similarity of each batch position
+    """
+
+    FUNCTION = "load_similar"
+    RETURN_TYPES = ("STRING", "STRING", "INT", "INT", "INT", "FLOAT")
+    RETURN_NAMES = (
+        "prompts",
+        "negative",
+        "token_count",
+        "index_map",
+        "entry_index",
+        "similarity",
+    )
+    OUTPUT_IS_LIST = (True, False, True, True, True, True)
+
+    @classmethod
+    def INPUT_TYPES(cls) -> dict[str, Any]:
+        """Define input parameters for the node."""
+        inputs = super().INPUT_TYPES()
+        batch_required = inputs["required"]
+        del batch_required["start_index"], batch_required["batch_size"]
+        for name in ("shard_id", "num_shards", "shard_mode", "prefetch"):
+            del inputs["optional"][name]
+        required = {
+            "prompt_file": batch_required.pop("prompt_file"),
+            "seed_index": (
+                "INT",
+                {"default": 0, "min": 0, "max": 99999, "step": 1},
+            ),
+            "top_k": (
+                "INT",
+                {"default": 20, "min": 1, "max": 1000, "step": 1},
+            ),
+        }
+        required.update(batch_required)
+        inputs["required"] = required
+        inputs["optional"] = {
+            "query_tags": (
+                "STRING",
+                {
+                    "default": "",
+                    "multiline": True,
+                    "placeholder": "Tags to search with (overrides seed_index)",
+                },
+            ),
+            **inputs["optional"],
+        }
+        return inputs
+
+    def load_similar(
+        self,
+        prompt_file: str,
+        seed_index: int,
+        top_k: int,
+        preset: str,
+        random_action: bool,
+        random_background: bool,
+        random_camera: bool,
+        query_tags: str = "",
+        custom_positive: str = "",
+        custom_negative: str = "",
+        seed: int = 0,
+        token_budget: int = 0,
+        dedupe_tags: bool = False,
+        unique_only: bool = False,
+        skip_seen: bool = False,
+        history_name: str = "default",
+        render_threads: int = 0,
+        prompt_glob: str = "",
+    ) -> tuple[list[str], str, list[int], list[int], list[int], list[float]]:
+        """
+        Compose a batch from the entries most similar to a seed.
+
+        Args:
+            prompt_file: Name of the TXT file to search.
+            seed_index: Line to find neighbours of (wraps around the file).
+            top_k: Number of entries to output.
+            query_tags: Free-text tags; when set, used instead of seed_index.
+
+        The other arguments are as in AnimePromptBatch.load_batch.
+
+        Returns:
+            The AnimePromptBatch outputs plus entry indices and similarities.
+        """
+        try:
+            source = get_corpus_source(prompt_file, prompt_glob)
+            corpus = load_corpus(source)
+        except FileNotFoundError:
+            name = prompt_glob.strip() or prompt_file
+            return ([f"Error: {name} not found"], "", [0], [0], [0], [0.0])
+        except (OSError, ValueError) as e:
+            # ValueError: e.g. a member file that isn't UTF-8 text
+            return ([f"Error: {e}"], "", [0], [0], [0], [0.0])
+
+        if not corpus.entries:
+            return (["Error: No prompts found"], "", [0], [0], [0], [0.0])
+
+        tag_index = corpus.derived("tag_index", TagIndex.from_entries)
+        index = corpus.derived(
+            "similarity_index",
+            lambda entries: SimilarityIndex.from_entries(entries, tag_index),
+        )
+        if query_tags.strip():
+            results = index.similar_to_tags(query_tags, top_k)
+        else:
+            results = index.similar_to_entry(seed_index % len(corpus), top_k)
+
+        if not results:
+            return (["Error: No similar entries found"], "", [0], [0], [0], [0.0])
+
+        entry_ids = [entry_id for entry_id, _ in results]
+        batch = self.compose_batch(
+            [corpus.entries[entry_id] for entry_id in entry_ids],
+            0,
+            len(entry_ids),
+            preset,
+            random_action,
+            random_background,
+            random_camera,
+            custom_positive,
+            custom_negative,
+            seed,
+            token_budget,
+            dedupe_tags,
+            unique_only,
+            skip_seen,
+            history_name,
+            render_threads,
+        )
+        similarities = [round(score, 4) for _, score in results]
+        return (*batch, entry_ids, similarities)
@@ -0,0 +1,199 @@
+"""
+CachedCLIPTextEncode node for ComfyUI.
+
+Drop-in replacement for CLIPTextEncode that remembers conditioning outputs
+by prompt hash, so identical negatives and recurring positives are encoded
+only once.
+"""
+
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any
+
+from ..core.conditioning_cache import ConditioningCache, make_cache_key
+from ..core.constants import CACHE_DIR
+
+# Shared across node instances so every workflow benefits from the same
+# caches. Each combination of limits gets its own cache, so nodes with
+# different settings never resize or re-point each other's; the least
+# recently used combinations are dropped past _MAX_CACHES.
+_CACHES: "OrderedDict[tuple[int, str | None, int], ConditioningCache]" = OrderedDict()
+_CACHES_LOCK = threading.Lock()
+_MAX_CACHES = 4
+_SPILL_DIR = os.path.join(CACHE_DIR, "conditioning")
+
+# Process-unique tokens for encoder objects. Unlike id(), a token is never
+# reused after its object is garbage collected.
+_tokens: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+# Objects that can't be weakly referenced are kept alive so their ids stay theirs
+_pinned: dict[int, tuple[Any, int]] = {}
+_token_counter = itertools.count()
+_tokens_lock = threading.Lock()
+
+
+def _object_token(obj: Any) -> int:
+    """Get a token identifying one live object for the life of the process."""
+    with _tokens_lock:
+        try:
+            token = _tokens.get(obj)
+            if token is None:
+                token = _tokens[obj] = next(_token_counter)
+            return token
+        except TypeError:
+            pinned = _pinned.get(id(obj))
+            if pinned is None:
+                pinned = _pinned[id(obj)] = (obj, next(_token_counter))
+            return pinned[1]
+
+
+def encoder_namespace(clip: Any, cache_namespace: str = "") -> tuple[str, bool]:
+    """
+    Identify the encoder a CLIP object runs, for cache keys.
+
+    The identity covers the text encoder weights, the clip-skip layer and
+    any patches (e.g. LoRAs) applied to the CLIP's patcher, so a clone with
+    a different clip skip or LoRA never shares entries with its source.
+
+    Args:
+        clip: ComfyUI CLIP object.
+        cache_namespace: Stable name of the weights (e.g. checkpoint file),
+            or empty to identify them by the loaded model object.
+
+    Returns:
+        Tuple of (namespace, stable). Only stable namespaces mean the same
+        encoder after a restart, so only they may use the disk spill.
+    """
+    patcher = getattr(clip, "patcher", None)
+    weights = getattr(patcher, "model", None)
+    if weights is None:
+        weights = getattr(clip, "cond_stage_model", clip)
+    parts = [cache_namespace.strip() or f"clip-{_object_token(weights)}"]
+    stable = bool(cache_namespace.strip())
+
+    layer_idx = getattr(clip, "layer_idx", None)
+    if layer_idx is not None:
+        parts.append(f"skip={layer_idx}")
+    if getattr(patcher, "patches", None):
+        # Clones with the same patches share patches_uuid; it changes with
+        # every add_patches and isn't kept across restarts
+        patches_id = getattr(patcher, "patches_uuid", None)
+        parts.append(f"patches={patches_id or _object_token(patcher)}")
+        stable = False
+    return "|".join(parts), stable
+
+
+def _cache_for(
+    max_entries: int, spill_dir: str | None, max_spill_bytes: int
+) -> ConditioningCache:
+    """Get the shared cache for one combination of memory and spill limits."""
+    settings = (max_entries, spill_dir, max_spill_bytes)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(settings)
+        if cache is None:
+            cache = _CACHES[settings] = ConditioningCache(*settings)
+            while len(_CACHES) > _MAX_CACHES:
+                _CACHES.popitem(last=False)
+        _CACHES.move_to_end(settings)
+        return cache
+
+
+def _encode(clip: Any, text: str) -> Any:
+    """Encode text the same way ComfyUI's CLIPTextEncode does."""
+    tokens = clip.tokenize(text)
+    if hasattr(clip, "encode_from_tokens_scheduled"):
+        return clip.encode_from_tokens_scheduled(tokens)
+    output = clip.encode_from_tokens(tokens, return_pooled=True, return_dict=True)
+    cond = output.pop("cond")
+    return [[cond, output]]
+
+
+class CachedCLIPTextEncode:
+    """
+    Encode a prompt with CLIP, reusing cached conditioning when possible.
+
+    Inputs:
+        clip: CLIP model used for encoding
+        text: Prompt to encode
+        max_entries: In-memory LRU size (conditionings)
+        spill_to_disk: Keep evicted entries on disk for later runs
+        cache_namespace: Stable encoder name (e.g. checkpoint file). Leave
+            empty to scope entries to the loaded CLIP model only. Clip skip
+            and LoRA patches are always part of the key.
+        spill_limit_mb: Maximum size of the spill directory
+
+    Outputs:
+        conditioning: Conditioning for samplers
+        cache_stats: Hit/miss summary
+    """
+
+    CATEGORY = "prompt/anime"
+    FUNCTION = "encode"
+    RETURN_TYPES = ("CONDITIONING", "STRING")
+    RETURN_NAMES = ("conditioning", "cache_stats")
+
+    @classmethod
+    def INPUT_TYPES(cls) -> dict[str, Any]:
+        """Define input parameters for the node."""
+        return {
+            "required": {
+                "clip": ("CLIP",),
+                "text": ("STRING", {"multiline": True, "dynamicPrompts": False}),
+            },
+            "optional": {
+                "max_entries": (
+                    "INT",
+                    {"default": 256, "min": 1, "max": 65536, "step": 1},
+                ),
+                "spill_to_disk": ("BOOLEAN", {"default": False}),
+                "cache_namespace": ("STRING", {"default": ""}),
+                "spill_limit_mb": (
+                    "INT",
+                    {"default": 2048, "min": 1, "max": 1 << 20, "step": 64},
+                ),
+            },
+        }
+
+    def encode(
+        self,
+        clip: Any,
+        text: str,
+        max_entries: int = 256,
+        spill_to_disk: bool = False,
+        cache_namespace: str = "",
+        spill_limit_mb: int = 2048,
+    ) -> tuple[Any, str]:
+        """
+        Encode a prompt through the shared cache for these settings.
+
+        Args:
+            clip: ComfyUI CLIP object.
+            text: Prompt text.
+            max_entries: In-memory LRU size.
+            spill_to_disk: Whether evicted entries are written to disk.
+            cache_namespace: Stable encoder identity for cache keys.
+            spill_limit_mb: Maximum size of the spill directory in MiB.
+
+        Returns:
+            Tuple of (conditioning, stats summary).
+        """
+        # Without a stable namespace, entries are scoped to the loaded model
+        # and kept in memory only
+        namespace, stable = encoder_namespace(clip, cache_namespace)
+        spill_dir = _SPILL_DIR if spill_to_disk and stable else None
+
+        cache = _cache_for(max_entries, spill_dir, spill_limit_mb << 20)
+        key = make_cache_key(text, namespace)
+        conditioning = cache.get_or_encode(key, lambda: _encode(clip, text))
+
+        stats = cache.stats()
+        summary = (
+            f"hits={stats['hits']} disk_hits={stats['disk_hits']} "
+            f"misses={stats['misses']} entries={stats['entries']} "
+            f"hit_rate={stats['hit_rate']:.1%}"
+        )
+
+        # Copy the per-entry dicts so downstream edits never touch the cache
+        return ([[cond, dict(extra)] for cond, extra in conditioning], summary)
@@ -1,26 +1,161 @@
+"""
+Pick today's production batch from a prompt corpus.
+
+Streams the corpus once with a seeded reservoir sampler, so memory is O(K)
+whatever the corpus size, and the same seed always picks the same lines.
+The seed defaults to today's date (YYYYMMDD).
+
+With --history, lines whose tags were picked on any earlier day are skipped
+(matched by normalized content, so reordering or re-filtering the corpus
+doesn't matter) and today's picks are added to the persistent Bloom filter.
+
+Usage:
+    python scripts/daily50.py --source rednote_1girl_v1.txt -k 50
+    python scripts/daily50.py --weights rednote_weights.txt --seed 42
+    python scripts/daily50.py --history cache/history/daily.bloom
+"""
+
+import argparse
+import datetime
 import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.bloom import (  # noqa: E402
+    DEFAULT_CAPACITY,
+    DEFAULT_ERROR_RATE,
+    BloomFilter,
+    content_key,
+)
+from core.sampling import reservoir_sample, weighted_reservoir_sample  # noqa: E402
 
 # Configuration
 SOURCE_FILE = "rednote_1girl_v1.txt"
+OUTPUT_FILE = "today_production.txt"
 DAILY_BATCH_SIZE = 50
 
 
-def get_daily_batch():
-    try:
-        with open(SOURCE_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+def read_weights(file_path: str):
+    """Stream one float weight per line."""
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            yield float(line.strip() or 0)
+
+
+def line_key(line: str) -> bytes:
+    """History key of a corpus line: its normalized tags column."""
+    return content_key(line.split("\t", 1)[0])
+
 
-        # Select 50 random units for today's production
-        batch = random.sample(lines, DAILY_BATCH_SIZE)
+def get_daily_batch(
+    source_file: str,
+    output_file: str,
+    k: int,
+    seed: int,
+    weights_file: str | None = None,
+    history: BloomFilter | None = None,
+) -> int:
+    """
+    Sample `k` non-blank lines from `source_file` into `output_file`.
 
-        with open("today_production.txt", "w", encoding="utf-8") as f:
-            f.writelines(batch)
+    Lines already in `history` are skipped and the picked lines are added.
+    """
+    rng = random.Random(seed)
+
+    def is_candidate(line: str) -> bool:
+        if not line.strip():
+            return False
+        return history is None or line_key(line) not in history
+
+    with open(source_file, encoding="utf-8") as f:
+        if weights_file:
+            # Weights are aligned with the raw lines of the source file
+            pairs = zip(enumerate(f), read_weights(weights_file), strict=True)
+            candidates = (
+                ((position, line), weight)
+                for (position, line), weight in pairs
+                if is_candidate(line)
+            )
+            batch = weighted_reservoir_sample(candidates, k, rng)
+        else:
+            candidates = (
+                (pos, line) for pos, line in enumerate(f) if is_candidate(line)
+            )
+            batch = reservoir_sample(candidates, k, rng)
+
+    # Keep corpus order so the batch is easy to review
+    batch.sort()
+    with open(output_file, "w", encoding="utf-8") as f:
+        for _, line in batch:
+            f.write(line if line.endswith("\n") else line + "\n")
+
+    if history is not None:
+        for _, line in batch:
+            history.add(line_key(line))
+        history.flush()
+
+    return len(batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", default=SOURCE_FILE, help="Corpus to sample")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Batch file to write")
+    parser.add_argument(
+        "-k", type=int, default=DAILY_BATCH_SIZE, help="Number of lines to pick"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=int(datetime.date.today().strftime("%Y%m%d")),
+        help="Random seed (default: today's date)",
+    )
+    parser.add_argument(
+        "--weights", help="Optional file with one weight per source line"
+    )
+    parser.add_argument(
+        "--history", help="Bloom filter file of lines picked on earlier days"
+    )
+    parser.add_argument(
+        "--history-capacity",
+        type=int,
+        default=DEFAULT_CAPACITY,
+        help="Lines a new history file is sized for",
+    )
+    parser.add_argument(
+        "--history-fp",
+        type=float,
+        default=DEFAULT_ERROR_RATE,
+        help="False-positive rate of a new history file when full",
+    )
+    args = parser.parse_args()
+
+    history = None
+    if args.history:
+        try:
+            history = BloomFilter(args.history, args.history_capacity, args.history_fp)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot open history {args.history} ({e}).")
+            sys.exit(1)
+
+    try:
+        count = get_daily_batch(
+            args.source, args.output, args.k, args.seed, args.weights, history
+        )
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found.")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: weights don't match the source lines ({e}).")
+        sys.exit(1)
+    finally:
+        if history is not None:
+            history.close()
 
-        print(f"Success: {DAILY_BATCH_SIZE} units moved to today_production.txt")
-    except Exception as e:
-        print(f"System Error: {e}")
+    print(f"Success: {count} units moved to {args.output} (seed {args.seed})")
 
 
 if __name__ == "__main__":
-    get_daily_batch()
-  
\ No newline at end of file
+    main()
@@ -0,0 +1,85 @@
+"""
+Remove near-duplicate lines from a prompt corpus with MinHash/LSH.
+
+Each line's tags are normalized into a set (order, case, underscores and
+weights ignored) and reduced to a MinHash signature; LSH banding finds
+candidate pairs in roughly linear time, and lines whose estimated Jaccard
+similarity to an earlier line reaches --threshold are dropped.
+
+Signatures are computed on all cores over line-aligned chunks; memory grows
+with the number of distinct clusters, not with the corpus size.
+
+Usage:
+    python scripts/dedupe_corpus.py rednote_1girl_v1.txt deduped.txt
+    python scripts/dedupe_corpus.py v2.txt deduped.txt --threshold 0.7 \\
+        --clusters clusters.tsv --workers 16
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.minhash import dedupe_file  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", help="Corpus to deduplicate")
+    parser.add_argument(
+        "output_file", nargs="?", default=None, help="Where to write kept lines"
+    )
+    parser.add_argument(
+        "--clusters",
+        default=None,
+        help="Write 'line<TAB>kept_line' for every dropped line (1-based)",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.8,
+        help="Jaccard similarity treated as duplicate (default: 0.8)",
+    )
+    parser.add_argument(
+        "--num-perm", type=int, default=64, help="MinHash signature length"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Processes (default: all)"
+    )
+    parser.add_argument(
+        "--chunk-mb", type=int, default=32, help="Size of each work range in MB"
+    )
+    args = parser.parse_args()
+
+    if not args.output_file and not args.clusters:
+        print("Error: give an output file, --clusters, or both.")
+        sys.exit(1)
+    if not 0.0 < args.threshold <= 1.0:
+        print("Error: --threshold must be in (0, 1].")
+        sys.exit(1)
+
+    print(f"Deduplicating {args.input_file} (threshold {args.threshold})...")
+    try:
+        stats = dedupe_file(
+            args.input_file,
+            args.output_file,
+            clusters_file=args.clusters,
+            threshold=args.threshold,
+            num_perm=args.num_perm,
+            workers=args.workers,
+            chunk_bytes=args.chunk_mb * 1024 * 1024,
+        )
+    except FileNotFoundError:
+        print(f"Error: {args.input_file} not found.")
+        sys.exit(1)
+
+    print(
+        f"Done. Processed {stats.total} lines, kept {stats.kept}, "
+        f"dropped {stats.duplicates} near-duplicates."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Filter a prompt corpus with keep/purge keyword lists.
+
+All keywords are compiled into one Aho-Corasick automaton over words, so
+each line is scanned once however many keywords there are. Keywords match
+whole words inside the tags column ("red" never drops "tired").
+
+The input is split into line-aligned byte ranges that are filtered in a
+process pool and written back in order; memory stays bounded by
+--chunk-mb x workers regardless of the file size.
+
+Usage:
+    python scripts/filter_corpus.py rednote_1girl_v1.txt v2.txt \\
+        --purge scripts/keywords/purge_rednote.txt
+    python scripts/filter_corpus.py v2.txt pure.txt \\
+        --keep scripts/keywords/keep_rednote.txt \\
+        --purge scripts/keywords/purge_rednote.txt --workers 16
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.corpus_filter import (  # noqa: E402
+    FilterStats,
+    filter_file,
+    load_keyword_file,
+)
+
+
+def load_keywords(paths: list[str]) -> list[str]:
+    """Concatenate the keywords of several keyword files."""
+    keywords: list[str] = []
+    for path in paths:
+        keywords.extend(load_keyword_file(path))
+    return keywords
+
+
+def print_report(stats: FilterStats) -> None:
+    """Print line counts and the number of dropped lines per keyword."""
+    print(f"Done. Processed {stats.total} lines, kept {stats.kept} lines.")
+    if stats.missing_keep:
+        print(f"  {stats.missing_keep:>10}  (no keep keyword)")
+    for keyword, count in stats.dropped_by.most_common():
+        print(f"  {count:>10}  {keyword}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", help="Corpus to filter")
+    parser.add_argument("output_file", help="Where to write kept lines")
+    parser.add_argument(
+        "--keep",
+        action="append",
+        default=[],
+        help="Keyword file; lines must contain at least one (repeatable)",
+    )
+    parser.add_argument(
+        "--purge",
+        action="append",
+        default=[],
+        help="Keyword file; lines containing any are dropped (repeatable)",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Processes (default: all)"
+    )
+    parser.add_argument(
+        "--chunk-mb", type=int, default=32, help="Size of each work range in MB"
+    )
+    args = parser.parse_args()
+
+    try:
+        keep = load_keywords(args.keep)
+        purge = load_keywords(args.purge)
+    except FileNotFoundError as e:
+        print(f"Error: keyword file {e.filename} not found.")
+        sys.exit(1)
+
+    print(f"Filtering {args.input_file} to {args.output_file}...")
+    try:
+        stats = filter_file(
+            args.input_file,
+            args.output_file,
+            keep,
+            purge,
+            workers=args.workers,
+            chunk_bytes=args.chunk_mb * 1024 * 1024,
+        )
+    except FileNotFoundError:
+        print(f"Error: {args.input_file} not found.")
+        sys.exit(1)
+
+    print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
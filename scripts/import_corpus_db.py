@@ -0,0 +1,50 @@
+"""
+Import a TXT prompt corpus into an SQLite database for the prompt nodes.
+
+The database appears in the nodes' file dropdowns next to the TXT files.
+Entries are then fetched by index on demand instead of parsing the whole
+file, and the Query node evaluates tag queries with the FTS index. Re-run
+after editing the TXT file; nodes pick up the new database on their next
+run.
+
+Usage:
+    python scripts/import_corpus_db.py prompts/danbooru_1girl.txt
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.constants import CORPUS_DB_EXT  # noqa: E402
+from core.corpus_db import import_prompt_file  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", help="Tag corpus (tags<TAB>character_name)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Database path (default: next to the input file, .db extension)",
+    )
+    args = parser.parse_args()
+
+    output_file = args.output or os.path.splitext(args.input_file)[0] + CORPUS_DB_EXT
+
+    started = time.perf_counter()
+    try:
+        count = import_prompt_file(args.input_file, output_file)
+    except FileNotFoundError:
+        print(f"Error: {args.input_file} not found.")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print(f"Done. {count} entries imported into {output_file} in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
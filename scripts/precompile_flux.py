@@ -0,0 +1,77 @@
+"""
+Precompile a tag corpus into a Flux/Natural Language companion file.
+
+The RedNote node picks up the companion automatically in Flux/Qwen mode and
+skips live tag cleaning for corpus entries.
+
+Usage:
+    python scripts/precompile_flux.py prompts/rednote_1girl_v1.txt --workers 8
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.file_utils import (  # noqa: E402
+    PromptEntry,
+    get_flux_companion_path,
+    iter_prompt_file,
+    write_flux_companion,
+)
+from core.parallel import chunked, imap_ordered  # noqa: E402
+from core.tag_utils import clean_tag  # noqa: E402
+
+
+def clean_chunk(chunk: list[PromptEntry]) -> list[str]:
+    """Clean one chunk of entries into companion lines."""
+    return [
+        f"{clean_tag(entry.tags)}\t{clean_tag(entry.character_name)}" for entry in chunk
+    ]
+
+
+def precompile(
+    input_file: str, output_file: str, workers: int | None, chunk_size: int
+) -> int:
+    """Convert `input_file` into a companion file, preserving entry order."""
+    source_stat = os.stat(input_file)
+    chunks = chunked(iter_prompt_file(input_file), chunk_size)
+    lines = (
+        line
+        for cleaned in imap_ordered(clean_chunk, chunks, workers=workers)
+        for line in cleaned
+    )
+    return write_flux_companion(output_file, lines, source_stat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input_file", help="Tag corpus (tags<TAB>character_name)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Companion file path (default: next to the input file)",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Processes (default: all)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=10000, help="Entries per work item"
+    )
+    args = parser.parse_args()
+
+    output_file = args.output or get_flux_companion_path(args.input_file)
+
+    try:
+        count = precompile(args.input_file, output_file, args.workers, args.chunk_size)
+    except FileNotFoundError:
+        print(f"Error: {args.input_file} not found.")
+        sys.exit(1)
+
+    print(f"Done. {count} entries written to {output_file}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Serve the prompt HTTP API locally, without ComfyUI.
+
+Runs the same endpoints ComfyUI registers (GET /anime_prompts/batch,
+/query and /similar) on a standalone aiohttp server, reading prompt files
+from the package's prompts/ directory. Requires aiohttp.
+
+Usage:
+    python scripts/serve_api.py
+    python scripts/serve_api.py --host 0.0.0.0 --port 8190
+    curl "http://127.0.0.1:8190/anime_prompts/batch?prompt_file=chars.txt"
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_package():
+    """Import the node package by path (its directory name may contain '-')."""
+    spec = importlib.util.spec_from_file_location(
+        "anime_prompts",
+        PACKAGE_DIR / "__init__.py",
+        submodule_search_locations=[str(PACKAGE_DIR)],
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8190, help="Port to listen on")
+    args = parser.parse_args()
+
+    try:
+        from aiohttp import web
+    except ImportError:
+        print("Error: aiohttp is required (pip install aiohttp).")
+        sys.exit(1)
+
+    load_package()
+    from anime_prompts.api import create_app
+
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
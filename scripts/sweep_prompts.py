@@ -0,0 +1,148 @@
+"""
+Render every character × style × action combination to a TXT file.
+
+The index space is split into ranges rendered on all cores; each worker
+parses the corpus files itself and the blocks are written back in order,
+so the output is byte-identical for any worker count. Random backgrounds
+and cameras are derived from (seed, item index), not a shared generator.
+
+With --benchmark N, the first N items are rendered once per worker count
+(1, 2, 4, ... up to --workers) and the speedup, parallel efficiency and
+output digest of each run are printed instead.
+
+Usage:
+    python scripts/sweep_prompts.py prompts/chars.txt sweep.txt --styles prompts/styles.txt
+    python scripts/sweep_prompts.py prompts/chars.txt sweep.txt --actions random -w 8
+    python scripts/sweep_prompts.py prompts/chars.txt sweep.txt --styles prompts/styles.txt --benchmark 200000
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.constants import PRESETS  # noqa: E402
+from core.sweep import ACTION_MODES, Sweep, SweepSpec, write_sweep  # noqa: E402
+
+
+def file_digest(path: str) -> str:
+    """Short BLAKE2b digest of a file, to compare runs."""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def benchmark(spec: SweepSpec, items: int, max_workers: int, chunk_size: int) -> None:
+    """Print a scaling report for rendering the first `items` items."""
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    print(
+        f"{'workers':>7}  {'seconds':>8}  {'items/s':>10}  {'speedup':>7}  "
+        f"{'efficiency':>10}  digest"
+    )
+    baseline = None
+    digests = set()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, "sweep.txt")
+        for workers in counts:
+            started = time.perf_counter()
+            count = write_sweep(spec, output_file, workers, chunk_size, items)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            speedup = baseline / elapsed
+            digest = file_digest(output_file)
+            digests.add(digest)
+            print(
+                f"{workers:>7}  {elapsed:>8.2f}  {count / elapsed:>10.0f}  "
+                f"{speedup:>7.2f}  {speedup / workers:>10.0%}  {digest}"
+            )
+    if len(digests) != 1:
+        print("Error: outputs differ between worker counts.")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("character_file", help="Character corpus (tags<TAB>name)")
+    parser.add_argument("output_file", help="TXT file to write")
+    parser.add_argument("--styles", help="Style corpus swept for each character")
+    parser.add_argument(
+        "--preset", default="standard", choices=list(PRESETS), help="Quality preset"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--actions",
+        default="sweep",
+        choices=ACTION_MODES,
+        help="Sweep every action, draw one per prompt, or add none",
+    )
+    parser.add_argument(
+        "--no-background", action="store_true", help="Skip random backgrounds"
+    )
+    parser.add_argument("--no-camera", action="store_true", help="Skip random cameras")
+    parser.add_argument("--custom", default="", help="Tags appended to every prompt")
+    parser.add_argument(
+        "--token-budget", type=int, default=0, help="Max CLIP chunks, 0 = unlimited"
+    )
+    parser.add_argument(
+        "--dedupe-tags", action="store_true", help="Remove repeated tags"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Processes (default: all)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=20000, help="Prompts per work item"
+    )
+    parser.add_argument("--limit", type=int, help="Render only the first N prompts")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Report scaling on the first N prompts instead of writing output",
+    )
+    args = parser.parse_args()
+
+    spec = SweepSpec(
+        character_file=args.character_file,
+        style_file=args.styles,
+        preset=args.preset,
+        seed=args.seed,
+        action_mode=args.actions,
+        random_background=not args.no_background,
+        random_camera=not args.no_camera,
+        custom_positive=args.custom,
+        token_budget=args.token_budget,
+        dedupe_tags=args.dedupe_tags,
+    )
+    workers = args.workers or os.cpu_count() or 1
+
+    try:
+        total = len(Sweep(spec))
+        print(f"{total} prompts in the sweep.")
+        if args.benchmark:
+            benchmark(spec, args.benchmark, workers, args.chunk_size)
+            return
+        count = write_sweep(
+            spec, args.output_file, workers, args.chunk_size, args.limit
+        )
+    except FileNotFoundError as e:
+        print(f"Error: {e.filename} not found.")
+        sys.exit(1)
+
+    print(f"Done. {count} prompts written to {args.output_file}.")
+
+
+if __name__ == "__main__":
+    main()
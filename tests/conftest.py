@@ -0,0 +1,26 @@
+"""Shared fixtures."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="module")
+def package():
+    """The node package imported by path, as ComfyUI would load it."""
+    spec = importlib.util.spec_from_file_location(
+        "anime_prompts_test",
+        PACKAGE_DIR / "__init__.py",
+        submodule_search_locations=[str(PACKAGE_DIR)],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    yield module
+    for name in list(sys.modules):
+        if name.split(".")[0] == spec.name:
+            del sys.modules[name]
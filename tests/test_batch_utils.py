@@ -0,0 +1,72 @@
+"""Unit tests for batch post-processing helpers."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from core.batch_utils import SubsetView, collapse_duplicates, shard_indices
+
+
+class TestCollapseDuplicates:
+    """Tests for collapse_duplicates."""
+
+    def test_wraparound_batch(self):
+        """Test a batch that wrapped around a 3-line file."""
+        batch = ["a", "b", "c", "a", "b", "c", "a"]
+        unique, index_map = collapse_duplicates(batch)
+        assert unique == ["a", "b", "c"]
+        assert index_map == [0, 1, 2, 0, 1, 2, 0]
+        assert [unique[i] for i in index_map] == batch
+
+    def test_all_unique(self):
+        """Test the identity map when nothing repeats."""
+        unique, index_map = collapse_duplicates(["x", "y"])
+        assert unique == ["x", "y"]
+        assert index_map == [0, 1]
+
+    def test_empty(self):
+        """Test an empty batch."""
+        assert collapse_duplicates([]) == ([], [])
+
+
+class TestShardIndices:
+    """Tests for shard_indices."""
+
+    @pytest.mark.parametrize("mode", ["contiguous", "strided"])
+    @pytest.mark.parametrize(("total", "num_shards"), [(10, 3), (7, 7), (2, 5)])
+    def test_shards_cover_once(self, mode, total, num_shards):
+        """Test shards are disjoint and cover every index exactly once."""
+        covered = [
+            index
+            for shard_id in range(num_shards)
+            for index in shard_indices(total, shard_id, num_shards, mode)
+        ]
+        assert sorted(covered) == list(range(total))
+
+    def test_layouts(self):
+        """Test contiguous blocks and strided dealing."""
+        assert list(shard_indices(10, 1, 3)) == [3, 4, 5]
+        assert list(shard_indices(10, 1, 3, "strided")) == [1, 4, 7]
+        assert not shard_indices(2, 0, 5)
+
+    def test_invalid(self):
+        """Test out-of-range shard ids and unknown modes are rejected."""
+        with pytest.raises(ValueError):
+            shard_indices(10, 3, 3)
+        with pytest.raises(ValueError):
+            shard_indices(10, 0, 3, "random")
+
+
+class TestSubsetView:
+    """Tests for SubsetView."""
+
+    def test_view(self):
+        """Test indexing, slicing and iteration through the index list."""
+        view = SubsetView("abcdefg", range(1, 7, 2))
+        assert len(view) == 3
+        assert list(view) == ["b", "d", "f"]
+        assert view[-1] == "f"
+        assert list(view[1:]) == ["d", "f"]
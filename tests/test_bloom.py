@@ -0,0 +1,102 @@
+"""Unit tests for the persistent Bloom filter."""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.bloom import BloomFilter, bloom_size, content_key, take_unseen
+
+
+class TestBloomFilter:
+    """Tests for BloomFilter."""
+
+    def test_persists_across_reopen(self, tmp_path):
+        """Test keys and sizing survive closing and reopening the file."""
+        path = str(tmp_path / "history.bloom")
+        with BloomFilter(path, capacity=1000, error_rate=0.01) as bloom:
+            assert bloom.add(b"a")
+            assert not bloom.add(b"a")
+            num_bits = bloom.num_bits
+
+        # Creation parameters are ignored for an existing file
+        with BloomFilter(path, capacity=10, error_rate=0.5) as bloom:
+            assert b"a" in bloom
+            assert b"b" not in bloom
+            assert (bloom.num_bits, bloom.count) == (num_bits, 1)
+
+    def test_racing_create_keeps_existing_file(self, tmp_path):
+        """Test a late creator never replaces a filter already in use."""
+        path = str(tmp_path / "history.bloom")
+        with BloomFilter(path, capacity=1000, error_rate=0.01) as bloom:
+            bloom.add(b"a")
+            bloom.flush()
+            # Another process that saw no file before this one created it
+            BloomFilter._create(path, 1000, 0.01)
+        with BloomFilter(path) as bloom:
+            assert b"a" in bloom
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["history.bloom"]
+
+    def test_shared_file_counts_and_takes_once(self, tmp_path):
+        """Test two opens of one file (as two processes) share adds and count."""
+        path = str(tmp_path / "history.bloom")
+        keys = [str(i).encode() for i in range(500)]
+        added: list[bytes] = []
+        lock = threading.Lock()
+        with (
+            BloomFilter(path, capacity=1000, error_rate=0.001) as first,
+            BloomFilter(path) as second,
+        ):
+
+            def worker(bloom):
+                for key in keys:
+                    if bloom.add(key):
+                        with lock:
+                            added.append(key)
+
+            threads = [
+                threading.Thread(target=worker, args=(b,)) for b in (first, second)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert first.count == second.count == len(added)
+        assert sorted(added) == sorted(set(added))
+        with BloomFilter(path) as bloom:
+            assert bloom.count == len(added)
+
+    def test_false_positive_rate(self, tmp_path):
+        """Test the false-positive rate stays near the target when full."""
+        with BloomFilter(str(tmp_path / "fp.bloom"), 2000, 0.01) as bloom:
+            for i in range(2000):
+                bloom.add(f"in{i}".encode())
+            assert all(f"in{i}".encode() in bloom for i in range(2000))
+            false_positives = sum(f"out{i}".encode() in bloom for i in range(5000))
+        assert false_positives / 5000 < 0.03
+
+    def test_bloom_size(self):
+        """Test the textbook sizing (~9.6 bits and 7 hashes per item at 1%)."""
+        num_bits, num_hashes = bloom_size(1000, 0.01)
+        assert 9500 < num_bits < 9700
+        assert num_hashes == 7
+
+
+class TestHistoryHelpers:
+    """Tests for content keys and take_unseen."""
+
+    def test_content_key_ignores_formatting(self):
+        """Test tag order, case, underscores and weights don't change the key."""
+        assert content_key("1girl, (Pink_Hair:1.2), smile") == content_key(
+            "smile, pink hair, 1girl"
+        )
+        assert content_key("1girl, smile") != content_key("1girl, sad")
+
+    def test_take_unseen(self, tmp_path):
+        """Test seen items are skipped and taken items are recorded."""
+        with BloomFilter(str(tmp_path / "h.bloom"), 100, 0.001) as history:
+            history.add(content_key("b"))
+            items = ["a", "b", "c", "a", "d"]
+            assert take_unseen(items, content_key, history, 2) == ["a", "c"]
+            assert take_unseen(items, content_key, history, 5) == ["d"]
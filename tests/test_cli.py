@@ -0,0 +1,112 @@
+"""Tests for the command-line entry point (python -m <package>)."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+CHARS = "1girl, red hair\tAlice\n1girl, blue hair\tBea\nsmile, 笑顔\tCid\n"
+STYLES = "style by a\tA\nstyle by b\tB\n"
+
+
+@pytest.fixture
+def files(tmp_path):
+    """Character and style files outside the prompts directory."""
+    chars = tmp_path / "chars.txt"
+    chars.write_text(CHARS, encoding="utf-8")
+    styles = tmp_path / "styles.txt"
+    styles.write_text(STYLES, encoding="utf-8")
+    return str(chars), str(styles)
+
+
+def run_cli(*args):
+    """Run python -m <package> from the package's parent directory."""
+    return subprocess.run(
+        [sys.executable, "-m", PACKAGE_DIR.name, *map(str, args)],
+        cwd=PACKAGE_DIR.parent,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=False,
+    )
+
+
+def jsonl(output):
+    """Parse JSON lines."""
+    return [json.loads(line) for line in output.splitlines()]
+
+
+class TestCli:
+    """Tests for the subcommands."""
+
+    def test_batch_matches_node(self, package, files):
+        """Test each run equals the node's output at the advanced index."""
+        chars, _ = files
+        result = run_cli(
+            "batch", "--prompt_file", chars, "--batch_size", 2, "--seed", 9,
+            "--start_index", 1, "--preset", "dynamic", "--runs", 3,
+            "--format", "jsonl",
+        )  # fmt: skip
+        assert result.returncode == 0, result.stderr
+        node = package.AnimePromptBatch()
+        expected = [
+            node.load_batch(chars, 1 + 2 * run, 2, "dynamic", True, True, True, seed=9)
+            for run in range(3)
+        ]
+        for run, line in enumerate(jsonl(result.stdout)):
+            assert line["run"] == run
+            assert line["prompts"] == expected[run][0]
+            assert line["negative"] == expected[run][1]
+
+    def test_combiner_and_rednote_match_nodes(self, package, files):
+        """Test text output is the nodes' prompts, one per line."""
+        chars, styles = files
+        result = run_cli(
+            "combiner", "--character_file", chars, "--style_file", styles,
+            "--char_count", 2, "--style_count", 2, "--seed", 3,
+        )  # fmt: skip
+        assert result.returncode == 0, result.stderr
+        prompts = package.AnimePromptCombiner().combine_prompts(
+            chars, styles, 0, 0, 2, 2, "dynamic", True, True, True, seed=3
+        )[0]
+        assert result.stdout == "".join(prompt + "\n" for prompt in prompts)
+
+        result = run_cli(
+            "rednote", "--prompt_file", chars, "--style_file", styles,
+            "--mode", "random", "--batch_size", 2, "--seed", 5,
+        )  # fmt: skip
+        assert result.returncode == 0, result.stderr
+        prompts = package.AnimePromptRedNote().generate_rednote(
+            chars, styles, "Illustrious (Tags)", 0, 2, "RedNote", "random",
+            0.5, True, True, True, True, seed=5,
+        )[0]  # fmt: skip
+        assert result.stdout == "".join(prompt + "\n" for prompt in prompts)
+
+    def test_workers_identical(self, files, tmp_path):
+        """Test output files are byte-identical for any worker count."""
+        chars, _ = files
+        outputs = []
+        for workers in (1, 2):
+            output = tmp_path / f"loader_{workers}.txt"
+            result = run_cli(
+                "loader", "--prompt_file", chars, "--mode", "random",
+                "--seed", 1, "--seed-step", 1, "--runs", 20,
+                "--workers", workers, "-o", output,
+            )  # fmt: skip
+            assert result.returncode == 0, result.stderr
+            outputs.append(output.read_bytes())
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0].decode("utf-8").splitlines()) == 20
+
+    def test_errors(self, files):
+        """Test invalid inputs and node errors exit with status 1."""
+        result = run_cli("batch", "--batch_size", 0)
+        assert result.returncode == 1
+        assert "batch_size" in result.stderr
+        result = run_cli("batch", "--prompt_file", "missing_file.txt")
+        assert result.returncode == 1
+        assert "missing_file.txt not found" in result.stderr
@@ -0,0 +1,94 @@
+"""Unit tests for token estimation and layer composition."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.composer import (
+    LAYER_ACTION,
+    LAYER_BACKGROUND,
+    LAYER_CAMERA,
+    LAYER_REQUIRED,
+    compose_layers,
+)
+from core.token_utils import count_chunks, estimate_tokens
+
+
+class TestEstimateTokens:
+    """Tests for the offline CLIP token estimator."""
+
+    def test_commas_count_as_tokens(self):
+        """Test each comma adds one token."""
+        assert estimate_tokens("red, blue") == estimate_tokens("red blue") + 1
+
+    def test_digits_split(self):
+        """Test digits are counted individually like CLIP does."""
+        assert estimate_tokens("1.25") == 4
+
+    def test_empty(self):
+        """Test empty prompt."""
+        assert estimate_tokens("") == 0
+
+    def test_count_chunks(self):
+        """Test chunk boundaries at 75 tokens."""
+        assert count_chunks(0) == 1
+        assert count_chunks(75) == 1
+        assert count_chunks(76) == 2
+
+
+class TestComposeLayers:
+    """Tests for compose_layers."""
+
+    def test_join_without_budget(self):
+        """Test layers are joined like the original formula."""
+        layers = [("a, b", LAYER_REQUIRED), ("", LAYER_ACTION), ("c", LAYER_CAMERA)]
+        prompt, tokens = compose_layers(layers)
+        assert prompt == "a, b, c"
+        assert tokens == estimate_tokens(prompt)
+
+    def test_drops_lowest_priority_first(self):
+        """Test camera goes before background, background before action."""
+        filler = ", ".join(["tag"] * 33)  # 65 tokens
+        layers = [
+            (filler, LAYER_REQUIRED),
+            ("walking", LAYER_ACTION),
+            ("city street at night", LAYER_BACKGROUND),
+            ("from above, depth of field", LAYER_CAMERA),
+        ]
+        prompt, tokens = compose_layers(layers, max_chunks=1)
+        assert prompt == f"{filler}, walking, city street at night"
+        assert tokens == estimate_tokens(prompt)
+        assert count_chunks(tokens) == 1
+
+    def test_required_layers_never_dropped(self):
+        """Test required layers are kept even when over budget."""
+        filler = ", ".join(["tag"] * 50)
+        prompt, tokens = compose_layers(
+            [(filler, LAYER_REQUIRED), ("walking", LAYER_ACTION)], max_chunks=1
+        )
+        assert prompt == filler
+        assert tokens == 99
+
+    def test_dedupe_across_layers(self):
+        """Test dedupe runs before the budget and drops emptied layers."""
+        layers = [
+            ("masterpiece, 8k", LAYER_REQUIRED),
+            ("1girl, Masterpiece", LAYER_REQUIRED),
+            ("8k", LAYER_CAMERA),
+        ]
+        prompt, tokens = compose_layers(layers, dedupe=True)
+        assert prompt == "masterpiece, 8k, 1girl"
+        assert tokens == estimate_tokens(prompt)
+
+    def test_dedupe_keeps_tags_of_dropped_layers(self):
+        """Test a tag shared with a dropped layer stays in the prompt."""
+        filler = ", ".join(f"tag{i}" for i in range(30))
+        layers = [
+            (filler, LAYER_REQUIRED),
+            ("sitting, smile", LAYER_ACTION),
+            ("smile, my custom", LAYER_REQUIRED),
+        ]
+        prompt, tokens = compose_layers(layers, max_chunks=1, dedupe=True)
+        assert prompt == f"{filler}, smile, my custom"
+        assert tokens == estimate_tokens(prompt)
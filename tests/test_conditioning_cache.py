@@ -0,0 +1,160 @@
+"""Unit tests for the conditioning cache."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.conditioning_cache import ConditioningCache, make_cache_key
+
+
+class FakeEncoder:
+    """CPU stand-in for a CLIP encoder that counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text: str):
+        self.calls += 1
+        return [[f"cond:{text}", {"pooled_output": len(text)}]]
+
+
+def _encode(cache: ConditioningCache, encoder: FakeEncoder, text: str):
+    return cache.get_or_encode(make_cache_key(text), lambda: encoder(text))
+
+
+class TestConditioningCache:
+    """Tests for ConditioningCache."""
+
+    def test_hit_skips_encoder(self):
+        """Test a repeated prompt is encoded once."""
+        cache = ConditioningCache(max_entries=4)
+        encoder = FakeEncoder()
+        first = _encode(cache, encoder, "negative")
+        second = _encode(cache, encoder, "negative")
+        assert first == second
+        assert encoder.calls == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = ConditioningCache(max_entries=2)
+        encoder = FakeEncoder()
+        _encode(cache, encoder, "a")
+        _encode(cache, encoder, "b")
+        _encode(cache, encoder, "a")  # "b" becomes least recent
+        _encode(cache, encoder, "c")
+        assert len(cache) == 2
+        _encode(cache, encoder, "a")
+        assert encoder.calls == 3
+        _encode(cache, encoder, "b")
+        assert encoder.calls == 4
+
+    def test_disk_spill(self, tmp_path):
+        """Test evicted entries are reloaded from disk instead of re-encoded."""
+        cache = ConditioningCache(max_entries=1, spill_dir=str(tmp_path))
+        encoder = FakeEncoder()
+        _encode(cache, encoder, "a")
+        _encode(cache, encoder, "b")  # spills "a"
+        assert _encode(cache, encoder, "a") == encoder("a")
+        assert encoder.calls == 3  # two misses plus the direct call above
+        assert cache.stats()["disk_hits"] == 1
+
+        # A fresh cache (e.g. after a restart) finds the spilled entries
+        restarted = ConditioningCache(max_entries=4, spill_dir=str(tmp_path))
+        _encode(restarted, encoder, "a")
+        assert restarted.stats()["disk_hits"] == 1
+
+    def test_namespace_separates_keys(self):
+        """Test equal prompts from different encoders don't collide."""
+        assert make_cache_key("x", "model-a") != make_cache_key("x", "model-b")
+
+    def test_spill_size_is_bounded(self, tmp_path):
+        """Test the least recently used spill files are deleted over the cap."""
+        cache = ConditioningCache(max_entries=1, spill_dir=str(tmp_path))
+        encoder = FakeEncoder()
+        _encode(cache, encoder, "a")
+        _encode(cache, encoder, "b")  # spills "a"
+        size = sum(f.stat().st_size for f in tmp_path.glob("*.pkl"))
+        cache.configure(1, str(tmp_path), max_spill_bytes=size * 2)
+        for text in "cdefg":
+            _encode(cache, encoder, text)
+        spilled = sum(f.stat().st_size for f in tmp_path.glob("*.pkl"))
+        assert 0 < spilled <= size * 2
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class FakePatcher:
+    """Stand-in for ComfyUI's ModelPatcher."""
+
+    def __init__(self, model, patches=None, patches_uuid=None):
+        self.model = model
+        self.patches = patches or {}
+        self.patches_uuid = patches_uuid
+
+
+class FakeClip:
+    """Stand-in for ComfyUI's CLIP object."""
+
+    def __init__(self, patcher, layer_idx=None):
+        self.patcher = patcher
+        self.layer_idx = layer_idx
+
+    def tokenize(self, text):
+        return text
+
+    def encode_from_tokens_scheduled(self, tokens):
+        return self.patcher.model(tokens)
+
+
+class TestEncoderNamespace:
+    """Tests for the CachedCLIPTextEncode encoder identity."""
+
+    def test_model_identity(self, package):
+        """Test keys follow the loaded model, never a reused id()."""
+        namespace_of = package.nodes.text_encode_cache.encoder_namespace
+        model = FakeEncoder()
+        clip = FakeClip(FakePatcher(model))
+        clone = FakeClip(FakePatcher(model))
+        assert namespace_of(clip) == namespace_of(clone)
+        assert namespace_of(clip)[1] is False
+
+        seen = {namespace_of(clip)[0]}
+        for _ in range(20):
+            # New models created after older ones are freed get new names
+            seen.add(namespace_of(FakeClip(FakePatcher(FakeEncoder())))[0])
+        assert len(seen) == 21
+
+    def test_clip_skip_and_patches(self, package):
+        """Test clip skip and LoRA patches change the namespace."""
+        namespace_of = package.nodes.text_encode_cache.encoder_namespace
+        model = FakeEncoder()
+        base = namespace_of(FakeClip(FakePatcher(model)), "ckpt")
+        assert base == ("ckpt", True)
+        skipped = namespace_of(FakeClip(FakePatcher(model), layer_idx=-2), "ckpt")
+        assert skipped == ("ckpt|skip=-2", True)
+        lora = FakePatcher(model, patches={"w": [1.0]}, patches_uuid="u1")
+        assert namespace_of(FakeClip(lora), "ckpt") == ("ckpt|patches=u1", False)
+
+
+class TestCachedCLIPTextEncode:
+    """Tests for the CachedCLIPTextEncode node."""
+
+    def test_settings_get_separate_caches(self, package):
+        """Test nodes with different limits never resize each other's cache."""
+        module = package.nodes.text_encode_cache
+        encoder = FakeEncoder()
+        clip = FakeClip(FakePatcher(encoder))
+        node = module.CachedCLIPTextEncode()
+        for text in ("a", "b", "c"):
+            node.encode(clip, text, max_entries=8)
+        node.encode(clip, "d", max_entries=1)
+        big = module._cache_for(8, None, 2048 << 20)
+        assert (big.max_entries, len(big)) == (8, 3)
+        assert module._cache_for(1, None, 2048 << 20).max_entries == 1
+
+        _, stats = node.encode(clip, "a", max_entries=8)
+        assert "hits=1 " in stats
+        assert encoder.calls == 4
@@ -0,0 +1,139 @@
+"""Unit tests for SQLite corpus databases."""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.corpus_cache import CorpusCache
+from core.corpus_db import DbEntries, connect, import_prompt_file
+from core.file_utils import PromptEntry, parse_prompt_file
+from core.tag_index import TagIndex
+
+TEXT = (
+    "1girl, pink hair, smile\tAlice\n"
+    "\n"
+    "1girl, (Pink_Hair:1.2), crying\tベアトリス\n"
+    "1boy, light pink hair\tCid\n"
+    "1girl, blue hair, sad\thatsune miku\n"
+)
+
+QUERIES = [
+    "pink hair",
+    "1girl AND NOT pink hair",
+    "pink hair AND (sad OR crying)",
+    "NOT 1girl",
+    '"unknown tag" OR smile',
+]
+
+
+@pytest.fixture
+def corpus_db(tmp_path):
+    """Imported corpus database and its source file."""
+    source = tmp_path / "corpus.txt"
+    source.write_text(TEXT, encoding="utf-8")
+    db_path = str(tmp_path / "corpus.db")
+    import_prompt_file(str(source), db_path)
+    return str(source), db_path
+
+
+class TestDbEntries:
+    """Tests for importing and reading entries."""
+
+    def test_round_trip(self, corpus_db):
+        """Test rows equal the parsed file and rowid i is entry i."""
+        source, db_path = corpus_db
+        entries = DbEntries(db_path)
+        expected = parse_prompt_file(source)
+        assert len(entries) == 4
+        assert list(entries) == expected
+        assert entries[-1] == PromptEntry("1girl, blue hair, sad", "hatsune miku")
+        assert entries[1:3] == expected[1:3]
+        assert entries[::2] == expected[::2]
+        with pytest.raises(IndexError):
+            entries[4]
+
+    def test_reimport_replaces(self, corpus_db, tmp_path):
+        """Test a re-import replaces the rows instead of appending."""
+        _, db_path = corpus_db
+        source = tmp_path / "small.txt"
+        source.write_text("solo\tDee\n", encoding="utf-8")
+        assert import_prompt_file(str(source), db_path) == 1
+        assert list(DbEntries(db_path)) == [PromptEntry("solo", "Dee")]
+
+    def test_wal_mode(self, corpus_db):
+        """Test the database is left in WAL mode."""
+        _, db_path = corpus_db
+        connection = sqlite3.connect(db_path)
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        connection.close()
+
+    def test_connection_per_thread(self, corpus_db):
+        """Test connections are reused within a thread, not across threads."""
+        _, db_path = corpus_db
+        assert connect(db_path) is connect(db_path)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(connect(db_path)))
+        thread.start()
+        thread.join()
+        assert other[0] is not connect(db_path)
+
+    def test_close_releases_every_thread(self, corpus_db):
+        """Test close() closes other threads' connections and reads reopen."""
+        _, db_path = corpus_db
+        entries = DbEntries(db_path)
+        thread = threading.Thread(target=lambda: entries[0])
+        thread.start()
+        thread.join()
+        connections = [connection for _, connection in entries._connections]
+        assert len(connections) == 2
+        entries.close()
+        for connection in connections:
+            with pytest.raises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+        assert entries[3].character_name == "hatsune miku"
+
+
+class TestQueries:
+    """Tests for FTS-backed tag queries."""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_tag_index(self, corpus_db, query):
+        """Test SQL tag queries select exactly what TagIndex selects."""
+        source, db_path = corpus_db
+        index = TagIndex.from_entries(parse_prompt_file(source))
+        assert list(DbEntries(db_path).query(query)) == list(index.query(query))
+
+    def test_whole_tags_only(self, corpus_db):
+        """Test a tag does not match longer tags containing its words."""
+        _, db_path = corpus_db
+        assert list(DbEntries(db_path).query("pink hair")) == [0, 1]
+
+    def test_invalid_query(self, corpus_db):
+        """Test malformed queries raise ValueError."""
+        _, db_path = corpus_db
+        entries = DbEntries(db_path)
+        with pytest.raises(ValueError):
+            entries.query("pink hair AND")
+
+
+class TestCorpusCacheDb:
+    """Tests for database sources in CorpusCache."""
+
+    def test_db_source(self, corpus_db):
+        """Test a .db source is served as DbEntries and reloaded on re-import."""
+        source, db_path = corpus_db
+        cache = CorpusCache()
+        corpus = cache.get(db_path)
+        assert isinstance(corpus.entries, DbEntries)
+        assert cache.get(db_path) is corpus
+
+        Path(source).write_text("solo\tDee\n", encoding="utf-8")
+        import_prompt_file(source, db_path)
+        assert len(cache.get(db_path)) == 1
+        # The old version's connections are closed when it is replaced
+        assert corpus.entries._connections == []
@@ -0,0 +1,85 @@
+"""Unit tests for persistent coverage bitmaps."""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.coverage import CoverageMap, coverage_path
+
+
+class TestCoverageMap:
+    """Tests for CoverageMap."""
+
+    def test_takes_each_entry_once_per_lap(self, tmp_path):
+        """Test a lap takes every entry in order, then a new lap starts."""
+        with CoverageMap(str(tmp_path / "c.coverage"), 70) as coverage:
+            taken = [coverage.take() for _ in range(70)]
+            assert [take.index for take in taken] == list(range(70))
+            assert taken[-1].remaining == 0
+            assert all(take.laps == 0 for take in taken)
+            # Bits past the end (70..127) are never taken
+            take = coverage.take()
+            assert (take.index, take.remaining, take.laps) == (0, 69, 1)
+
+    def test_persists_across_reopen(self, tmp_path):
+        """Test used entries and the cursor survive closing the file."""
+        path = str(tmp_path / "c.coverage")
+        with CoverageMap(path, 200) as coverage:
+            for _ in range(130):
+                coverage.take()
+        with CoverageMap(path, 200) as coverage:
+            assert 129 in coverage
+            assert 130 not in coverage
+            assert coverage.remaining() == 70
+            assert coverage.take().index == 130
+            coverage.reset()
+            assert coverage.remaining() == 200
+            assert coverage.take().index == 0
+
+    def test_racing_create_keeps_existing_file(self, tmp_path):
+        """Test a late creator never replaces a map already in use."""
+        path = str(tmp_path / "c.coverage")
+        with CoverageMap(path, 100) as coverage:
+            coverage.take()
+            # Another process that saw no file before this one created it
+            CoverageMap._create(path, 100)
+            assert coverage.take().index == 1
+        with CoverageMap(path, 100) as coverage:
+            assert coverage.remaining() == 98
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["c.coverage"]
+
+    def test_size_mismatch(self, tmp_path):
+        """Test an existing file for another corpus size is rejected."""
+        path = str(tmp_path / "c.coverage")
+        CoverageMap(path, 10).close()
+        with pytest.raises(ValueError, match="covers 10 entries"):
+            CoverageMap(path, 11)
+
+    def test_concurrent_takes_are_unique(self, tmp_path):
+        """Test threads sharing a map never take the same entry."""
+        results: list[int] = []
+        lock = threading.Lock()
+        with CoverageMap(str(tmp_path / "c.coverage"), 1000) as coverage:
+
+            def worker():
+                for _ in range(250):
+                    index = coverage.take().index
+                    with lock:
+                        results.append(index)
+
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert coverage.remaining() == 0
+        assert sorted(results) == list(range(1000))
+
+    def test_coverage_path(self):
+        """Test the key changes with the entry count but not the spelling."""
+        assert coverage_path("prompts/a.txt", 5) == coverage_path("prompts/./a.txt", 5)
+        assert coverage_path("prompts/a.txt", 5) != coverage_path("prompts/a.txt", 6)
@@ -11,7 +11,18 @@ import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core.file_utils import PromptEntry, apply_suffix, parse_prompt_file
+from core.constants import PROMPT_DIR
+from core.file_utils import (
+    PromptEntry,
+    apply_suffix,
+    get_corpus_source,
+    get_flux_companion_path,
+    iter_line_ranges,
+    load_flux_companion,
+    parse_prompt_file,
+    read_line_range,
+    write_flux_companion,
+)
 
 
 class TestApplySuffix:
@@ -103,3 +114,94 @@ class TestParsePromptFile:
         """Test FileNotFoundError is raised for missing files."""
         with pytest.raises(FileNotFoundError):
             parse_prompt_file("/nonexistent/file.txt")
+
+
+class TestGetCorpusSource:
+    """Tests for get_corpus_source."""
+
+    def test_glob_in_prompt_dir(self):
+        """Test a glob resolves inside the prompts directory."""
+        source = get_corpus_source("a.txt", " chars_*.txt ")
+        assert source == os.path.join(PROMPT_DIR, "chars_*.txt")
+        assert get_corpus_source("a.txt") == os.path.join(PROMPT_DIR, "a.txt")
+
+    @pytest.mark.parametrize(
+        "prompt_glob", ["/etc/pass*d", "../*.txt", "sub/../../core/*.py"]
+    )
+    def test_glob_escaping_prompt_dir(self, prompt_glob):
+        """Test absolute and ".." globs are rejected."""
+        with pytest.raises(PermissionError, match="outside the prompts directory"):
+            get_corpus_source("a.txt", prompt_glob)
+
+
+class TestFluxCompanion:
+    """Tests for the pre-cleaned Flux companion files."""
+
+    def test_roundtrip(self, tmp_path):
+        """Test a fresh companion is loaded with one entry per corpus entry."""
+        source = tmp_path / "corpus.txt"
+        source.write_text("1girl, pink_hair\tMiku\n\n1girl\t\n", encoding="utf-8")
+        companion = get_flux_companion_path(str(source))
+        assert companion.endswith(".flux.tsv")
+
+        write_flux_companion(
+            companion, iter(["pink hair\tMiku", "\t"]), os.stat(source)
+        )
+
+        entries = load_flux_companion(str(source), expected_count=2)
+        assert entries == [
+            PromptEntry(tags="pink hair", character_name="Miku"),
+            PromptEntry(tags="", character_name=""),
+        ]
+
+    def test_stale_companion_is_ignored(self, tmp_path):
+        """Test a companion built from a different source size is rejected."""
+        source = tmp_path / "corpus.txt"
+        source.write_text("1girl\tMiku\n", encoding="utf-8")
+        companion = get_flux_companion_path(str(source))
+        write_flux_companion(companion, iter(["\tMiku"]), os.stat(source))
+
+        source.write_text("1girl\tMiku\n2girls\tRin\n", encoding="utf-8")
+        assert load_flux_companion(str(source), expected_count=2) is None
+
+    def test_same_size_edit_is_stale(self, tmp_path):
+        """Test an edit that keeps the source size still invalidates."""
+        source = tmp_path / "corpus.txt"
+        source.write_text("1girl\tMiku\n", encoding="utf-8")
+        companion = get_flux_companion_path(str(source))
+        write_flux_companion(companion, iter(["\tMiku"]), os.stat(source))
+        assert load_flux_companion(str(source), expected_count=1) is not None
+
+        stat = os.stat(source)
+        source.write_text("2girl\tMiku\n", encoding="utf-8")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_flux_companion(str(source), expected_count=1) is None
+
+    def test_missing_companion(self, tmp_path):
+        """Test None is returned when no companion exists."""
+        source = tmp_path / "corpus.txt"
+        source.write_text("1girl\n", encoding="utf-8")
+        assert load_flux_companion(str(source), expected_count=1) is None
+
+
+class TestLineRanges:
+    """Tests for line-aligned byte ranges."""
+
+    def test_ranges_cover_file_on_line_boundaries(self, tmp_path):
+        """Test ranges are contiguous and reassemble every line."""
+        source = tmp_path / "corpus.txt"
+        lines = [f"tag{i}, {'x' * (i % 13)}\tname\n" for i in range(200)]
+        lines.append("last line without newline")
+        source.write_text("".join(lines), encoding="utf-8")
+
+        ranges = list(iter_line_ranges(str(source), 100))
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == source.stat().st_size
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:], strict=False))
+
+        read = [
+            line
+            for start, end in ranges
+            for line in read_line_range(str(source), start, end)
+        ]
+        assert read == lines
@@ -0,0 +1,209 @@
+"""Unit and stress tests for per-call prompt generation."""
+
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.bloom import BloomFilter, take_unseen
+from core.constants import ACTIONS, BACKGROUNDS, CAMERA_EFFECTS
+from core.corpus_cache import CorpusCache
+from core.generators import (
+    PARALLEL_THRESHOLD,
+    LayerDraw,
+    draw_layers,
+    generate_prompts,
+    render_prompt,
+)
+from core.rwlock import ReadWriteLock
+
+HEADS = [
+    ("masterpiece", f"1girl, tag{i}, smile") for i in range(PARALLEL_THRESHOLD * 2)
+]
+
+
+def generate(seed: int, threads: int = 0, count: int = len(HEADS)):
+    """Generate a batch with every random layer on."""
+    return generate_prompts(
+        HEADS[:count], seed, True, True, True, "extra", 0, True, threads
+    )
+
+
+class TestGenerators:
+    """Tests for planning and rendering prompts."""
+
+    def test_draw_order_matches_legacy_loop(self):
+        """Test draws follow the action, background, camera per item order."""
+        rng = random.Random(7)
+        expected = []
+        for _ in range(5):
+            expected.append(
+                LayerDraw(
+                    rng.choice(ACTIONS),
+                    rng.choice(BACKGROUNDS),
+                    rng.choice(CAMERA_EFFECTS),
+                )
+            )
+        assert draw_layers(random.Random(7), 5, True, True, True) == expected
+
+    def test_disabled_layers_draw_nothing(self):
+        """Test disabled layers are None and consume no random numbers."""
+        draws = draw_layers(random.Random(7), 3, False, True, False)
+        assert all(d.action is None and d.camera is None for d in draws)
+        rng = random.Random(7)
+        assert [d.background for d in draws] == [
+            rng.choice(BACKGROUNDS) for _ in range(3)
+        ]
+
+    def test_render_skips_empty_layers(self):
+        """Test empty head texts and the custom prompt are left out."""
+        prompt, tokens = render_prompt(
+            ("", "1girl, smile"), LayerDraw(None, "beach", None), ""
+        )
+        assert prompt == "1girl, smile, beach"
+        assert tokens > 0
+
+    def test_ignores_global_random_state(self):
+        """Test generation neither reads nor moves the random module."""
+        random.seed(1)
+        state = random.getstate()
+        first = generate(42, count=8)
+        random.seed(99)
+        assert generate(42, count=8) == first
+        random.setstate(state)
+        generate(42, count=8)
+        assert random.getstate() == state
+
+    def test_positions_render_subset_of_full_run(self):
+        """Test a subset with positions matches those items of the full run."""
+        full = generate(3, count=20)
+        positions = range(2, 20, 3)
+        subset = generate_prompts(
+            [HEADS[i] for i in positions],
+            3,
+            True,
+            True,
+            True,
+            "extra",
+            0,
+            True,
+            positions=positions,
+        )
+        assert subset == (
+            [full[0][i] for i in positions],
+            [full[1][i] for i in positions],
+        )
+
+    def test_threaded_render_matches_serial(self):
+        """Test the thread-pool path returns the serial output in order."""
+        for seed in range(5):
+            assert generate(seed, threads=4) == generate(seed)
+
+
+class TestConcurrency:
+    """Stress tests for concurrent node-style calls."""
+
+    def test_concurrent_calls_are_deterministic(self):
+        """Test calls racing on many threads each match their serial run."""
+        seeds = list(range(24))
+        expected = {seed: generate(seed, count=64) for seed in seeds}
+        barrier = threading.Barrier(8)
+
+        def run(seed):
+            if seed < 8:
+                barrier.wait()
+            # Interleave a global reseed as an unrelated node would
+            random.seed(seed)
+            return generate(seed, threads=2 if seed % 2 else 0, count=64)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = dict(zip(seeds, pool.map(run, seeds), strict=True))
+        assert results == expected
+
+    def test_corpus_cache_builds_once(self, tmp_path):
+        """Test racing lookups parse a file and build a structure once."""
+        path = tmp_path / "corpus.txt"
+        path.write_text("a, b\tAlice\nc\tBob\n", encoding="utf-8")
+        cache = CorpusCache()
+        builds = []
+        barrier = threading.Barrier(8)
+
+        def run(_):
+            barrier.wait()
+            corpus = cache.get(str(path))
+            value = corpus.derived("count", lambda e: builds.append(1) or len(e))
+            return corpus, value
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(run, range(8)))
+        assert len({id(corpus) for corpus, _ in results}) == 1
+        assert {value for _, value in results} == {2}
+        assert len(builds) == 1
+
+    def test_nested_derived_build(self, tmp_path):
+        """Test a build may request another derived structure."""
+        path = tmp_path / "corpus.txt"
+        path.write_text("a\tAlice\n", encoding="utf-8")
+        corpus = CorpusCache().get(str(path))
+        inner = corpus.derived("outer", lambda e: corpus.derived("inner", len) + 1)
+        assert inner == 2
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        """Test a hit refreshes recency so the other file is evicted."""
+        paths = []
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}.txt"
+            path.write_text(f"{name}\t{name}\n", encoding="utf-8")
+            paths.append(str(path))
+        cache = CorpusCache(max_files=2)
+        first = cache.get(paths[0])
+        cache.get(paths[1])
+        cache.get(paths[0])
+        cache.get(paths[2])
+        assert cache.get(paths[0]) is first
+
+    def test_take_unseen_is_atomic(self, tmp_path):
+        """Test threads sharing a history never take the same key twice."""
+        keys = [i.to_bytes(4, "little") for i in range(400)]
+        with BloomFilter(str(tmp_path / "h.bloom"), 10_000, 0.0001) as history:
+            barrier = threading.Barrier(4)
+
+            def run(_):
+                barrier.wait()
+                return take_unseen(keys, lambda key: key, history, len(keys))
+
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                taken = [key for batch in pool.map(run, range(4)) for key in batch]
+        assert len(taken) == len(set(taken))
+
+
+class TestReadWriteLock:
+    """Tests for ReadWriteLock."""
+
+    def test_readers_share_writers_exclude(self):
+        """Test readers overlap while a writer waits for them to leave."""
+        lock = ReadWriteLock()
+        events = []
+        readers_in = threading.Barrier(3)
+
+        def reader():
+            with lock.read():
+                readers_in.wait()
+                events.append("read")
+
+        def writer():
+            with lock.write():
+                events.append("write")
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        readers_in.wait()
+        late = threading.Thread(target=writer)
+        late.start()
+        for thread in [*threads, late]:
+            thread.join(timeout=5)
+        assert events == ["read", "read", "write"]
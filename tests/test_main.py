@@ -0,0 +1,64 @@
+"""Tests for the CSV to TXT prompt converter (main.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.file_utils import apply_suffix, parse_prompt_file
+from main import generate_prompts
+
+
+def convert(tmp_path, csv_text, **kwargs):
+    """Convert CSV text and return the output lines."""
+    source = tmp_path / "tags.csv"
+    source.write_text(csv_text, encoding="utf-8", newline="")
+    output = tmp_path / "out.txt"
+    count = generate_prompts(str(source), str(output), **kwargs)
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert count == len(lines)
+    return lines
+
+
+class TestGeneratePrompts:
+    """Tests for generate_prompts."""
+
+    def test_quoted_commas(self, tmp_path):
+        """Test a quoted field keeps its commas as one tag list."""
+        lines = convert(
+            tmp_path,
+            '"1girl, red hair, smile",x\r\n"solo, (blue eyes:1.2)",y\r\n',
+            suffix="8k",
+        )
+        assert lines == [
+            apply_suffix("1girl, red hair, smile", "8k"),
+            apply_suffix("solo, (blue eyes:1.2)", "8k"),
+        ]
+
+    def test_quoted_newlines(self, tmp_path):
+        """Test line breaks and tabs in a field never split the prompt line."""
+        lines = convert(
+            tmp_path,
+            '"1girl,\nred hair,\r\n smile",x\n"solo\ttag",y\n',
+            suffix="",
+        )
+        assert lines == ["1girl, red hair, smile", "solo tag"]
+        entries = parse_prompt_file(str(tmp_path / "out.txt"))
+        assert [entry.character_name for entry in entries] == ["", ""]
+
+    def test_column_by_name(self, tmp_path):
+        """Test a header name selects the column and empty cells are skipped."""
+        lines = convert(
+            tmp_path,
+            'id,prompt\n1,"a, b"\n2,\n3,c\n',
+            suffix=", masterpiece",
+            column="prompt",
+        )
+        assert lines == [
+            apply_suffix("a, b", ", masterpiece"),
+            apply_suffix("c", ", masterpiece"),
+        ]
+        with pytest.raises(KeyError):
+            convert(tmp_path, "id,prompt\n1,a\n", column="tags")
@@ -0,0 +1,94 @@
+"""Unit tests for keyword matching and corpus filtering."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.corpus_filter import CorpusFilter, FilterStats, filter_file
+from core.matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """Tests for the word-level Aho-Corasick matcher."""
+
+    def test_whole_words_only(self):
+        """Test keywords don't match inside longer words."""
+        matcher = KeywordMatcher(["red", "hat"])
+        assert not matcher.search("tired, that girl, chat")
+        assert matcher.search("red eyes")
+
+    def test_multi_word_and_overlapping(self):
+        """Test overlapping keywords are all reported."""
+        matcher = KeywordMatcher(["blue hair", "hair", "long blue hair"])
+        found = matcher.find("1girl, long blue hair")
+        assert {matcher.keywords[i] for i in found} == {
+            "blue hair",
+            "hair",
+            "long blue hair",
+        }
+
+    def test_fail_links(self):
+        """Test a partial match falls back to a shorter keyword."""
+        matcher = KeywordMatcher(["a b c", "b d"])
+        assert {matcher.keywords[i] for i in matcher.find("a b d")} == {"b d"}
+
+    def test_does_not_span_tags(self):
+        """Test a keyword never matches across a comma."""
+        matcher = KeywordMatcher(["blue hair"])
+        assert not matcher.search("blue, hair")
+
+    def test_case_and_underscores(self):
+        """Test case and underscores are folded."""
+        matcher = KeywordMatcher(["Blue Hair"])
+        assert matcher.search("BLUE_HAIR, smile")
+
+
+class TestCorpusFilter:
+    """Tests for CorpusFilter."""
+
+    def test_keep_and_purge(self):
+        """Test keep/purge rules and per-keyword counts."""
+        corpus_filter = CorpusFilter(keep=["pink", "cute"], purge=["wings", "hat"])
+        lines = [
+            "1girl, pink hair\tA\n",
+            "1girl, pink hair, wings, witch hat\tB\n",
+            "1girl, green hair\tC\n",
+            "1girl, cute, wings\tD\n",
+        ]
+        stats = FilterStats()
+        kept = list(corpus_filter.filter_lines(lines, stats))
+        assert kept == [lines[0]]
+        assert stats.total == 4
+        assert stats.kept == 1
+        assert stats.missing_keep == 1
+        assert stats.dropped_by == {"wings": 2, "hat": 1}
+
+    def test_names_are_not_matched(self):
+        """Test only the tags column is matched."""
+        corpus_filter = CorpusFilter(purge=["princess"])
+        stats = FilterStats()
+        lines = ["1girl, crown\tPrincess Peach\n"]
+        assert list(corpus_filter.filter_lines(lines, stats)) == lines
+
+    def test_filter_file_parallel_matches_serial(self, tmp_path):
+        """Test chunked parallel filtering keeps order and counts."""
+        source = tmp_path / "corpus.txt"
+        lines = [
+            f"1girl, tag{i % 7}, {'wings' if i % 5 == 0 else 'smile'}\n"
+            for i in range(500)
+        ]
+        source.write_text("".join(lines), encoding="utf-8")
+
+        serial_out = tmp_path / "serial.txt"
+        parallel_out = tmp_path / "parallel.txt"
+        serial = filter_file(str(source), str(serial_out), [], ["wings"], workers=1)
+        parallel = filter_file(
+            str(source), str(parallel_out), [], ["wings"], workers=2, chunk_bytes=512
+        )
+
+        expected = [line for line in lines if "wings" not in line]
+        assert serial_out.read_text(encoding="utf-8") == "".join(expected)
+        assert parallel_out.read_text(encoding="utf-8") == "".join(expected)
+        assert parallel == serial
+        assert parallel.dropped_by == {"wings": 100}
@@ -0,0 +1,83 @@
+"""Unit tests for MinHash signatures and near-duplicate detection."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.minhash import (
+    MinHasher,
+    dedupe_file,
+    estimate_jaccard,
+    lsh_params,
+    tag_shingles,
+)
+
+
+class TestMinHash:
+    """Tests for shingling and signatures."""
+
+    def test_shingles_ignore_order_and_format(self):
+        """Test tag order, case, underscores and weights are folded."""
+        assert tag_shingles("1girl, (Blue_Hair:1.2), smile") == tag_shingles(
+            "smile, blue hair, 1girl"
+        )
+
+    def test_signature_estimates_jaccard(self):
+        """Test the estimate tracks the true similarity."""
+        hasher = MinHasher(num_perm=256)
+        a = {f"tag{i}" for i in range(20)}
+        b = {f"tag{i}" for i in range(5, 25)}  # Jaccard 15/25 = 0.6
+        similarity = estimate_jaccard(hasher.signature(a), hasher.signature(b))
+        assert abs(similarity - 0.6) < 0.12
+        assert estimate_jaccard(hasher.signature(a), hasher.signature(a)) == 1.0
+
+    def test_signatures_are_seeded(self):
+        """Test equal seeds give equal signatures."""
+        tags = {"1girl", "smile"}
+        assert MinHasher(seed=3).signature(tags) == MinHasher(seed=3).signature(tags)
+
+    def test_lsh_params(self):
+        """Test bands x rows covers the signature at or below the threshold."""
+        bands, rows = lsh_params(0.8, 64)
+        assert bands * rows == 64
+        assert (1 / bands) ** (1 / rows) <= 0.8
+
+
+class TestDedupeFile:
+    """Tests for corpus deduplication."""
+
+    def test_drops_near_duplicates(self, tmp_path):
+        """Test reordered and one-tag variants collapse onto the first line."""
+        base = [f"tag{i}" for i in range(12)]
+        lines = [
+            ", ".join(base) + "\tAlice\n",
+            ", ".join(reversed(base)) + "\tBob\n",
+            ", ".join(base[:-1] + ["other"]) + "\n",
+            "\n",
+            "cat, dog, bird\n",
+        ]
+        source = tmp_path / "in.txt"
+        source.write_text("".join(lines), encoding="utf-8")
+        output = tmp_path / "out.txt"
+        clusters = tmp_path / "clusters.tsv"
+
+        stats = dedupe_file(
+            str(source), str(output), str(clusters), threshold=0.7, workers=1
+        )
+
+        assert (stats.total, stats.kept, stats.duplicates) == (4, 2, 2)
+        assert output.read_text(encoding="utf-8") == lines[0] + lines[4]
+        assert clusters.read_text(encoding="utf-8") == "2\t1\n3\t1\n"
+
+    def test_chunking_does_not_change_output(self, tmp_path):
+        """Test small ranges give the same result as one range."""
+        source = tmp_path / "in.txt"
+        source.write_text(
+            "".join(f"a, b, c, d{i % 7}\n" for i in range(50)), encoding="utf-8"
+        )
+        whole, split = tmp_path / "whole.txt", tmp_path / "split.txt"
+        dedupe_file(str(source), str(whole), threshold=0.9, workers=1)
+        dedupe_file(str(source), str(split), threshold=0.9, workers=1, chunk_bytes=16)
+        assert whole.read_text() == split.read_text()
+        assert len(whole.read_text().splitlines()) == 7
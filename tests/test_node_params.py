@@ -0,0 +1,60 @@
+"""Unit tests for text-to-input coercion."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.node_params import coerce_inputs
+
+INPUT_TYPES = {
+    "required": {
+        "prompt_file": (["a.txt", "b.txt"], {"default": "a.txt"}),
+        "batch_size": ("INT", {"default": 4, "min": 1, "max": 1000}),
+        "random_action": ("BOOLEAN", {"default": True}),
+        "query": ("STRING", {"multiline": False}),
+    },
+    "optional": {
+        "custom_positive": ("STRING", {"default": ""}),
+        "strength": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 2.0}),
+        "clip": ("CLIP",),
+    },
+}
+
+
+class TestCoerceInputs:
+    """Tests for coerce_inputs."""
+
+    def test_defaults_and_conversion(self):
+        """Test values are typed and missing inputs take defaults."""
+        kwargs = coerce_inputs(
+            INPUT_TYPES,
+            {"query": "pink hair", "batch_size": "12", "random_action": "off"},
+        )
+        assert kwargs == {
+            "prompt_file": "a.txt",
+            "batch_size": 12,
+            "random_action": False,
+            "query": "pink hair",
+            "custom_positive": "",
+            "strength": 1.0,
+        }
+
+    @pytest.mark.parametrize(
+        ("params", "message"),
+        [
+            ({"query": "x", "batch_size": "0"}, "between"),
+            ({"query": "x", "batch_size": "two"}, "number"),
+            ({"query": "x", "prompt_file": "c.txt"}, "one of"),
+            ({"query": "x", "random_action": "maybe"}, "true or false"),
+            ({"query": "x", "seed": "1"}, "Unknown parameter"),
+            ({"query": "x", "clip": "1"}, "can't be set"),
+            ({}, "Missing parameter: query"),
+        ],
+    )
+    def test_rejects_bad_values(self, params, message):
+        """Test invalid or missing parameters raise ValueError."""
+        with pytest.raises(ValueError, match=message):
+            coerce_inputs(INPUT_TYPES, params)
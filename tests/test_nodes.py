@@ -0,0 +1,40 @@
+"""Tests for node-level ComfyUI hooks."""
+
+import importlib
+import math
+
+
+class TestIsChanged:
+    """Tests for IS_CHANGED, which decides whether ComfyUI re-runs a node."""
+
+    def test_loader_unused_first(self, package):
+        """Test unused_first always re-runs and other modes stay cacheable."""
+        is_changed = package.AnimePromptLoader.IS_CHANGED
+        assert math.isnan(is_changed(mode="unused_first", index=0, seed=1))
+        assert is_changed(mode="sequential", index=0) == is_changed(mode="random")
+
+    def test_batch_skip_seen(self, package):
+        """Test skip_seen always re-runs, also for Query and Similar."""
+        for node_cls in (
+            package.AnimePromptBatch,
+            package.AnimePromptQuery,
+            package.AnimePromptSimilar,
+        ):
+            assert math.isnan(node_cls.IS_CHANGED(skip_seen=True, batch_size=4))
+            assert node_cls.IS_CHANGED(skip_seen=False) == node_cls.IS_CHANGED()
+
+
+class TestCorpusErrors:
+    """Tests for corpus files the nodes can't read."""
+
+    def test_undecodable_member(self, package, tmp_path, monkeypatch):
+        """Test a member that isn't UTF-8 gives an error output, not a crash."""
+        file_utils = importlib.import_module(f"{package.__name__}.core.file_utils")
+        monkeypatch.setattr(file_utils, "PROMPT_DIR", str(tmp_path))
+        (tmp_path / "a.txt").write_text("1girl\tAlice\n", encoding="utf-8")
+        (tmp_path / "b.txt").write_bytes(b"\xff\xfe\x00bad\n")
+        loader = package.AnimePromptLoader()
+        result = loader.load_prompt(
+            "a.txt", 0, "sequential", "none", False, False, False, prompt_glob="*"
+        )
+        assert result[0].startswith("Error: ")
@@ -0,0 +1,121 @@
+"""Unit tests for batch window prefetching."""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.prefetch import WindowPrefetcher, prefetch_windows
+
+
+class Recorder:
+    """Window function that records the positions it computed."""
+
+    def __init__(self) -> None:
+        self.computed: list[tuple[str, int]] = []
+        self.lock = threading.Lock()
+
+    def window(self, stream: str):
+        def compute(start: int) -> tuple[str, int]:
+            with self.lock:
+                self.computed.append((stream, start))
+            return stream, start
+
+        return compute
+
+
+def drain(prefetcher: WindowPrefetcher) -> None:
+    """Wait for every queued window."""
+    for future in list(prefetcher._windows.values()):
+        future.exception()
+
+
+class TestWindowPrefetcher:
+    """Tests for WindowPrefetcher."""
+
+    def test_next_window_is_prefetched(self):
+        """Test stepping through windows hits the cache after the first."""
+        prefetcher = WindowPrefetcher()
+        recorder = Recorder()
+        for start in (0, 10, 20):
+            assert prefetcher.get("a", start, 10, recorder.window("a")) == ("a", start)
+            drain(prefetcher)
+        stats = prefetcher.stats()
+        assert (stats.hits, stats.misses) == (2, 1)
+        assert stats.hit_rate == 2 / 3
+        # Each window is computed once, plus the prefetched one after the last
+        assert sorted(recorder.computed) == [("a", 0), ("a", 10), ("a", 20), ("a", 30)]
+
+    def test_stream_change_discards(self):
+        """Test windows of an old stream are never served."""
+        prefetcher = WindowPrefetcher()
+        recorder = Recorder()
+        prefetcher.get("a", 0, 10, recorder.window("a"))
+        drain(prefetcher)
+        assert prefetcher.get("b", 10, 10, recorder.window("b")) == ("b", 10)
+        stats = prefetcher.stats()
+        assert (stats.hits, stats.misses, stats.discarded) == (0, 2, 1)
+
+    def test_jump_is_a_miss(self):
+        """Test a position other than the prefetched one is computed directly."""
+        prefetcher = WindowPrefetcher(max_windows=1)
+        recorder = Recorder()
+        prefetcher.get("a", 0, 10, recorder.window("a"))
+        drain(prefetcher)
+        assert prefetcher.get("a", 50, 10, recorder.window("a")) == ("a", 50)
+        stats = prefetcher.stats()
+        # The unused window at 10 is evicted by the one at 60
+        assert (stats.hits, stats.misses, stats.discarded) == (0, 2, 1)
+
+    def test_failed_prefetch_recomputes(self):
+        """Test a window that failed in the background is recomputed."""
+        prefetcher = WindowPrefetcher()
+        calls = []
+
+        def compute(start):
+            calls.append(start)
+            if len(calls) == 2:
+                raise RuntimeError("transient")
+            return start
+
+        prefetcher.get("a", 0, 1, compute)
+        drain(prefetcher)
+        assert prefetcher.get("a", 1, 1, compute) == 1
+        assert prefetcher.stats().misses == 2
+
+
+class Node:
+    """Minimal node with a prefetched window function."""
+
+    @prefetch_windows(
+        lambda arguments: arguments["corpus"].version,
+        bypass_if=lambda arguments: arguments["record"],
+    )
+    def run(self, corpus, start_index, batch_size, seed=0, record=False):
+        return [seed * 1000 + i for i in range(start_index, start_index + batch_size)]
+
+
+class TestPrefetchWindows:
+    """Tests for the prefetch_windows decorator."""
+
+    def test_same_output(self):
+        """Test prefetched calls return what plain calls return."""
+        node, corpus = Node(), SimpleNamespace(version=1)
+        for start in (0, 4, 8):
+            result = node.run(corpus, start, 4, seed=2, prefetch=True)
+            drain(node._prefetcher)
+            assert result == node.run(corpus, start, 4, seed=2)
+        assert node._prefetcher.stats().hits == 2
+
+    def test_source_and_bypass(self):
+        """Test a new source starts a new stream and bypassed calls skip it."""
+        node, corpus = Node(), SimpleNamespace(version=1)
+        node.run(corpus, 0, 4, prefetch=True)
+        drain(node._prefetcher)
+        corpus.version = 2
+        node.run(corpus, 4, 4, prefetch=True)
+        assert node._prefetcher.stats().hits == 0
+        node.run(corpus, 8, 4, record=True, prefetch=True)
+        assert node._prefetcher.stats().misses == 2
@@ -0,0 +1,54 @@
+"""Unit tests for RedNote aesthetic scoring and selection."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.file_utils import PromptEntry
+from core.rednote_utils import filter_characters, score_entries
+
+ENTRIES = [
+    PromptEntry("1girl, black hair", "A"),
+    PromptEntry("1girl, Pink_Hair, (frills:1.2), lace", "B"),
+    PromptEntry("1girl, pink hair, large breasts", "C"),
+    PromptEntry("1girl, pink hair", "D"),
+    PromptEntry("1girl, pastel colors", "E"),
+]
+AESTHETIC = {"pink": 1.0, "frills": 1.0, "lace": 0.5, "pastel": 1.5}
+EXCLUDE = {"large breasts": float("inf")}
+
+
+class TestScoreEntries:
+    """Tests for score_entries."""
+
+    def test_weights_and_exclusions(self):
+        """Test weights add up per keyword and exclusions give -inf."""
+        scores = score_entries(ENTRIES, AESTHETIC, EXCLUDE)
+        assert list(scores) == [0.0, 2.5, float("-inf"), 1.0, 1.5]
+
+    def test_keyword_counted_once(self):
+        """Test a keyword repeated in one entry only scores once."""
+        entries = [PromptEntry("pink hair, pink eyes, pink dress", "")]
+        assert list(score_entries(entries, {"pink": 1.0}, {})) == [1.0]
+
+
+class TestFilterCharacters:
+    """Tests for filter_characters."""
+
+    def test_top_n(self):
+        """Test the best N come back best first, excluded never."""
+        scores = score_entries(ENTRIES, AESTHETIC, EXCLUDE)
+        assert filter_characters(ENTRIES, top_n=2, scores=scores) == [1, 4]
+        assert filter_characters(ENTRIES, top_n=10, scores=scores) == [1, 4, 3, 0]
+
+    def test_threshold(self):
+        """Test min_score keeps every entry at or above it."""
+        scores = score_entries(ENTRIES, AESTHETIC, EXCLUDE)
+        assert filter_characters(ENTRIES, min_score=1.0, scores=scores) == [1, 4, 3]
+        assert filter_characters(ENTRIES, top_n=1, min_score=1.0, scores=scores) == [1]
+
+    def test_ties_keep_corpus_order(self):
+        """Test equal scores are ordered by position in the file."""
+        entries = [PromptEntry("pink", str(i)) for i in range(5)]
+        assert filter_characters(entries, top_n=3) == [0, 1, 2]
@@ -0,0 +1,110 @@
+"""Tests for the HTTP endpoints (api/routes.py)."""
+
+import asyncio
+import importlib
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def routes(package):
+    """The routes module of the package loaded by path."""
+    return importlib.import_module(f"{package.__name__}.api.routes")
+
+
+def get_all(routes, *requests):
+    """GET each (path, params) on a fresh app; return (status, body) pairs."""
+
+    async def run():
+        async with TestClient(TestServer(routes.create_app())) as client:
+            responses = []
+            for path, params in requests:
+                response = await client.get(path, params=params)
+                responses.append((response.status, await response.text()))
+            return responses
+
+    return asyncio.run(run())
+
+
+def ndjson(body):
+    """Parse NDJSON lines."""
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class TestRoutes:
+    """Tests for the batch-style endpoints."""
+
+    def test_batch_matches_node(self, package, routes):
+        """Test the stream holds the node's outputs, one line per item."""
+        prompt_file = package.AnimePromptBatch.INPUT_TYPES()["required"]["prompt_file"][
+            0
+        ][0]
+        params = {"prompt_file": prompt_file, "batch_size": "3", "seed": "7"}
+        [(status, body)] = get_all(routes, ("/anime_prompts/batch", params))
+        assert status == 200
+        prompts, negative, token_counts, index_map = (
+            package.AnimePromptBatch().load_batch(
+                prompt_file, 0, 3, "standard", True, True, True, seed=7
+            )
+        )
+        lines = ndjson(body)
+        assert lines[0] == {"negative": negative}
+        assert [line["prompts"] for line in lines[1:]] == prompts
+        assert [line["token_count"] for line in lines[1:]] == token_counts
+        assert [line["index"] for line in lines[1:]] == [0, 1, 2]
+
+    def test_invalid_arguments(self, routes):
+        """Test bad values and unknown choices answer 400 with a message."""
+        responses = get_all(
+            routes,
+            ("/anime_prompts/batch", {"batch_size": "0"}),
+            ("/anime_prompts/batch", {"seed": "seven"}),
+            ("/anime_prompts/batch", {"prompt_file": "../../etc/passwd"}),
+            ("/anime_prompts/query", {"query": "(smile"}),
+        )
+        for status, body in responses:
+            assert status == 400
+            assert json.loads(body)["error"]
+
+    @pytest.mark.parametrize("prompt_glob", ["/etc/pass*d", "../*.txt", "../core/*.py"])
+    def test_glob_traversal(self, routes, prompt_glob):
+        """Test a glob outside prompts/ is refused, never read."""
+        responses = get_all(
+            routes,
+            ("/anime_prompts/batch", {"prompt_glob": prompt_glob}),
+            ("/anime_prompts/query", {"prompt_glob": prompt_glob, "query": "solo"}),
+            ("/anime_prompts/similar", {"prompt_glob": prompt_glob}),
+        )
+        for status, body in responses:
+            assert status == 400
+            assert "outside the prompts directory" in json.loads(body)["error"]
+
+    def test_prefetch_across_requests(self, package, routes):
+        """Test prefetch=true serves the next window of a stepping client."""
+        prompt_file = package.AnimePromptBatch.INPUT_TYPES()["required"]["prompt_file"][
+            0
+        ][0]
+
+        async def run():
+            async with TestClient(TestServer(routes.create_app())) as client:
+                for start in (0, 2, 4):
+                    params = {
+                        "prompt_file": prompt_file,
+                        "start_index": str(start),
+                        "batch_size": "2",
+                        "prefetch": "true",
+                    }
+                    response = await client.get("/anime_prompts/batch", params=params)
+                    assert response.status == 200
+                    await response.read()
+                response = await client.get("/anime_prompts/prefetch")
+                return await response.json()
+
+        before = routes.prefetch_stats()
+        stats = asyncio.run(run())
+        assert stats["hits"] - before.hits == 2
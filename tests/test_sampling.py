@@ -0,0 +1,54 @@
+"""Unit tests for streaming reservoir sampling."""
+
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.sampling import reservoir_sample, weighted_reservoir_sample
+
+
+class TestReservoirSample:
+    """Tests for Algorithm L."""
+
+    def test_reproducible(self):
+        """Test the same seed picks the same items."""
+        first = reservoir_sample(range(10000), 50, random.Random(7))
+        second = reservoir_sample(range(10000), 50, random.Random(7))
+        assert first == second
+        assert len(set(first)) == 50
+
+    def test_short_input(self):
+        """Test fewer items than k returns them all."""
+        assert reservoir_sample(iter("abc"), 5, random.Random(0)) == ["a", "b", "c"]
+
+    def test_roughly_uniform(self):
+        """Test every position is picked about equally often."""
+        counts = Counter()
+        rng = random.Random(1)
+        for _ in range(2000):
+            counts.update(reservoir_sample(range(20), 5, rng))
+        # Expected 500 picks per item
+        assert all(400 < counts[i] < 600 for i in range(20))
+
+
+class TestWeightedReservoirSample:
+    """Tests for A-Res."""
+
+    def test_zero_weight_never_picked(self):
+        """Test non-positive weights are excluded."""
+        items = [("a", 0.0), ("b", 1.0), ("c", -1.0), ("d", 1.0)]
+        assert sorted(weighted_reservoir_sample(items, 3, random.Random(0))) == [
+            "b",
+            "d",
+        ]
+
+    def test_heavier_items_win_more_often(self):
+        """Test selection frequency follows the weights."""
+        rng = random.Random(3)
+        counts = Counter()
+        for _ in range(2000):
+            counts.update(weighted_reservoir_sample([("x", 9.0), ("y", 1.0)], 1, rng))
+        assert counts["x"] > 1600
@@ -0,0 +1,115 @@
+"""Unit tests for cross-process shared corpora."""
+
+import gc
+import json
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import shared_corpus
+from core.corpus_cache import CorpusCache
+from core.file_utils import PromptEntry, parse_prompt_file
+from core.shared_corpus import PackedEntries, attach_corpus, pack_corpus
+
+pytestmark = pytest.mark.skipif(
+    not shared_corpus.is_supported(), reason="needs fcntl file locks"
+)
+
+TEXT = "1girl, pink hair\tAlice\n\nsmile, 笑顔\n(blue eyes:1.2)\tベアトリス\n"
+
+
+@pytest.fixture
+def corpus_file(tmp_path, monkeypatch):
+    """Prompt file with a private shared directory."""
+    monkeypatch.setattr(shared_corpus, "SHARED_DIR", str(tmp_path / "shared"))
+    path = tmp_path / "corpus.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    return str(path)
+
+
+def registry(tmp_path):
+    """Read the registry file."""
+    with open(tmp_path / "shared" / "registry.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _attach_in_child(path, ready, release):
+    entries = attach_corpus(path)
+    ready.put((len(entries), os.stat(entries.path).st_ino))
+    release.get()
+
+
+class TestPackedEntries:
+    """Tests for the packed format."""
+
+    def test_round_trip(self, corpus_file, tmp_path):
+        """Test packed entries equal the parsed ones."""
+        packed = str(tmp_path / "c.corpus")
+        assert pack_corpus(corpus_file, packed) == 3
+        entries = PackedEntries(packed)
+        expected = parse_prompt_file(corpus_file)
+        assert list(entries) == expected
+        assert entries[-1] == PromptEntry("(blue eyes:1.2)", "ベアトリス")
+        assert entries[1:] == expected[1:]
+        with pytest.raises(IndexError):
+            entries[3]
+        entries.close()
+
+    def test_empty_corpus(self, tmp_path):
+        """Test an empty file packs to an empty sequence."""
+        source = tmp_path / "empty.txt"
+        source.write_text("\n", encoding="utf-8")
+        packed = str(tmp_path / "e.corpus")
+        assert pack_corpus(str(source), packed) == 0
+        assert len(PackedEntries(packed)) == 0
+
+
+class TestAttachCorpus:
+    """Tests for the registry and reference counting."""
+
+    def test_reused_within_process(self, corpus_file, tmp_path):
+        """Test a process maps a file version once and registers itself."""
+        entries = attach_corpus(corpus_file)
+        assert attach_corpus(corpus_file) is entries
+        name = os.path.basename(entries.path)
+        assert registry(tmp_path) == {name: [os.getpid()]}
+
+    def test_last_process_deletes_file(self, corpus_file, tmp_path):
+        """Test the packed file lives until its last process detaches."""
+        entries = attach_corpus(corpus_file)
+        path = entries.path
+        context = multiprocessing.get_context("fork")
+        ready, release = context.Queue(), context.Queue()
+        child = context.Process(
+            target=_attach_in_child, args=(corpus_file, ready, release)
+        )
+        child.start()
+        try:
+            # The child maps the parent's file instead of packing its own
+            assert ready.get(timeout=30) == (3, os.stat(path).st_ino)
+            name = os.path.basename(path)
+            assert sorted(registry(tmp_path)[name]) == sorted([os.getpid(), child.pid])
+
+            del entries
+            gc.collect()
+            assert os.path.exists(path)
+        finally:
+            release.put(None)
+            child.join(timeout=30)
+
+        # The child exited; the next registry access prunes it
+        attach_corpus(corpus_file)
+        gc.collect()
+        assert not os.path.exists(path)
+        assert registry(tmp_path) == {}
+
+    def test_corpus_cache_shared(self, corpus_file):
+        """Test a shared CorpusCache serves packed entries."""
+        corpus = CorpusCache(shared=True).get(corpus_file)
+        assert isinstance(corpus.entries, PackedEntries)
+        assert list(corpus.entries) == parse_prompt_file(corpus_file)
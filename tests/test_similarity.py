@@ -0,0 +1,46 @@
+"""Unit tests for the tag-set similarity index."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.similarity import SimilarityIndex, jaccard
+
+BASE = [f"tag{i}" for i in range(10)]
+ENTRIES = [
+    ", ".join(BASE),
+    ", ".join(BASE[:9] + ["other"]),  # 9/11 with entry 0
+    ", ".join(reversed(BASE)),  # identical set to entry 0
+    "cat, dog, bird",
+    ", ".join(BASE[:5] + ["x1", "x2", "x3", "x4", "x5"]),  # 5/15 with entry 0
+]
+
+
+class TestSimilarityIndex:
+    """Tests for SimilarityIndex lookups."""
+
+    def test_similar_to_entry(self):
+        """Test neighbours come back most similar first, seed excluded."""
+        index = SimilarityIndex(ENTRIES)
+        results = index.similar_to_entry(0, 3)
+        assert [entry_id for entry_id, _ in results] == [2, 1, 4]
+        assert results[0][1] == 1.0
+        assert abs(results[1][1] - 9 / 11) < 1e-9
+
+    def test_similar_to_tags(self):
+        """Test free-text queries are normalized like corpus tags."""
+        index = SimilarityIndex(ENTRIES)
+        results = index.similar_to_tags("Dog, (cat:1.2), Bird", 1)
+        assert results == [(3, 1.0)]
+
+    def test_falls_back_to_shared_tags(self):
+        """Test weak neighbours are still found when nothing collides."""
+        index = SimilarityIndex(ENTRIES)
+        results = index.similar_to_tags("cat, fish, tree, rock, sun, moon", 5)
+        assert [entry_id for entry_id, _ in results] == [3]
+
+    def test_jaccard(self):
+        """Test exact Jaccard similarity."""
+        assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+        assert jaccard(set(), set()) == 0.0
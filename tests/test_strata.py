@@ -0,0 +1,63 @@
+"""Unit tests for stratified selection."""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.strata import StrataIndex
+
+# 6 pink, 2 black, 1 untagged, 1 blonde
+TAGS = [
+    "1girl, pink hair",
+    "1girl, Pink_Hair, long hair",
+    "1girl, (pink hair:1.2)",
+    "1girl, pink hair",
+    "1girl, pink hair",
+    "1girl, pink hair",
+    "1girl, black hair",
+    "1girl, black hair, pink hair",
+    "1girl, smile",
+    "1girl, blonde hair",
+]
+
+
+def stratum_label(index: StrataIndex, entry_id: int) -> str:
+    """Find the label of the stratum holding an entry."""
+    for label, members in zip(index.labels, index.members, strict=True):
+        if entry_id in members:
+            return label
+    raise KeyError(entry_id)
+
+
+class TestStrataIndex:
+    """Tests for StrataIndex bucketing and draws."""
+
+    def test_bucketing(self):
+        """Test entries join the stratum of their first listed tag."""
+        index = StrataIndex.build(TAGS, "hair_color")
+        assert index.labels == ["black", "blonde", "pink", "other"]
+        assert list(index.members[0]) == [6, 7]
+        assert list(index.members[3]) == [8]
+
+    def test_round_robin_is_balanced(self):
+        """Test every stratum gets an equal share of a batch."""
+        index = StrataIndex.build(TAGS, "hair_color")
+        batch = index.draw_batch(0, 8, seed=1)
+        counts = Counter(stratum_label(index, entry_id) for entry_id in batch)
+        assert counts == {"black": 2, "blonde": 2, "pink": 2, "other": 2}
+
+    def test_proportional_follows_sizes(self):
+        """Test shares follow stratum sizes over a long run."""
+        index = StrataIndex.build(TAGS, "hair_color")
+        batch = index.draw_batch(0, 1000, seed=1, mode="proportional")
+        counts = Counter(stratum_label(index, entry_id) for entry_id in batch)
+        assert abs(counts["pink"] - 600) <= 2
+        assert abs(counts["black"] - 200) <= 2
+
+    def test_draws_are_reproducible_per_position(self):
+        """Test a window of positions matches the same slice of a longer run."""
+        index = StrataIndex.build(TAGS, "hair_color")
+        full = index.draw_batch(0, 20, seed=7)
+        assert index.draw_batch(5, 10, seed=7) == full[5:15]
@@ -0,0 +1,93 @@
+"""Unit tests for the inverted tag index and corpus cache."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.corpus_cache import CorpusCache
+from core.tag_index import TagIndex
+
+ENTRIES = [
+    "1girl, pink hair, sad",
+    "1girl, Pink_Hair, crying, blue hair",
+    "1girl, pink hair, (crying:1.2)",
+    "1girl, blue hair, smile",
+    "hu tao \\(genshin impact\\), smile",
+]
+
+
+class TestTagIndex:
+    """Tests for TagIndex queries."""
+
+    def test_boolean_query(self):
+        """Test AND, OR, NOT and parentheses."""
+        index = TagIndex.build(ENTRIES)
+        matches = index.query("pink hair AND (sad OR crying) AND NOT blue hair")
+        assert list(matches) == [0, 2]
+
+    def test_precedence_and_commas(self):
+        """Test NOT > AND > OR, and commas acting as AND."""
+        index = TagIndex.build(ENTRIES)
+        assert list(index.query("sad OR crying AND blue hair")) == [0, 1]
+        assert list(index.query("1girl, smile")) == [3]
+
+    def test_quoted_and_unknown_tags(self):
+        """Test quoted tags with brackets, and tags missing from the corpus."""
+        index = TagIndex.build(ENTRIES)
+        assert list(index.query('"hu tao (genshin impact)"')) == [4]
+        assert len(index.query("green hair")) == 0
+        assert list(index.query("NOT green hair")) == [0, 1, 2, 3, 4]
+
+    def test_dense_postings_use_bitmaps(self):
+        """Test bitmap and array postings give the same answers."""
+        texts = [
+            f"common, t{i % 7}" + (", rare" if i % 50 == 0 else "") for i in range(500)
+        ]
+        index = TagIndex.build(texts)
+        assert isinstance(index.posting("common"), int)
+        assert not isinstance(index.posting("rare"), int)
+
+        matches = index.query("(t3 OR t5) AND NOT rare")
+        expected = [i for i in range(500) if i % 7 in (3, 5) and i % 50]
+        assert list(matches) == expected
+        assert [matches[r] for r in range(len(matches))] == expected
+        assert matches[-1] == expected[-1]
+        assert index.count("Common") == 500
+
+    @pytest.mark.parametrize(
+        "query", ["", "pink hair AND", "(sad OR crying", "sad)", "NOT"]
+    )
+    def test_malformed_queries(self, query):
+        """Test syntax errors raise ValueError."""
+        with pytest.raises(ValueError):
+            TagIndex.build(ENTRIES).query(query)
+
+
+class TestCorpusCache:
+    """Tests for the parsed corpus cache."""
+
+    def test_reuses_until_file_changes(self, tmp_path):
+        """Test derived structures are rebuilt only for a new file version."""
+        path = tmp_path / "corpus.txt"
+        path.write_text("a, b\tAlice\n", encoding="utf-8")
+        cache = CorpusCache()
+
+        corpus = cache.get(str(path))
+        builds = []
+        corpus.derived("count", lambda entries: builds.append(1) or len(entries))
+        assert cache.get(str(path)) is corpus
+        assert corpus.derived("count", lambda entries: builds.append(1)) == 1
+        assert len(builds) == 1
+
+        path.write_text("a, b\tAlice\nc\tBob\n", encoding="utf-8")
+        os.utime(path, ns=(0, 0))
+        reloaded = cache.get(str(path))
+        assert reloaded is not corpus
+        assert [entry.character_name for entry in reloaded.entries] == [
+            "Alice",
+            "Bob",
+        ]
@@ -0,0 +1,98 @@
+"""Unit tests for core tag utilities."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.tag_utils import (
+    clean_tag,
+    dedupe_prompt,
+    dedupe_tag_lists,
+    normalize_tag,
+    split_tags,
+)
+
+
+class TestCleanTag:
+    """Tests for the Flux/Natural Language cleaner."""
+
+    def test_strips_weights_and_parens(self):
+        """Test weights and brackets are removed."""
+        assert clean_tag("(solo:1.5), {sparkling eyes}") == "solo, sparkling eyes"
+
+    def test_underscores_and_1girl(self):
+        """Test underscores become spaces and 1girl is dropped."""
+        assert clean_tag("1girl,collar_bone,pink hair") == "collar bone, pink hair"
+
+    def test_lora_triggers(self):
+        """Test lora trigger labels are removed."""
+        assert clean_tag("Lora Trigger: cute style") == "cute style"
+
+    def test_empty(self):
+        """Test empty input."""
+        assert clean_tag("") == ""
+
+
+class TestSplitTags:
+    """Tests for split_tags."""
+
+    def test_simple(self):
+        """Test plain comma splitting with whitespace cleanup."""
+        assert split_tags("a,b , ,c") == ["a", "b", "c"]
+
+    def test_weighted_group_kept(self):
+        """Test commas inside weighted groups don't split."""
+        assert split_tags("(a, b:1.2), c") == ["(a, b:1.2)", "c"]
+
+    def test_escaped_parens(self):
+        """Test escaped brackets are literal."""
+        assert split_tags("hibiki \\(kancolle\\),x") == ["hibiki \\(kancolle\\)", "x"]
+
+
+class TestNormalizeTag:
+    """Tests for normalize_tag."""
+
+    def test_case_and_underscores(self):
+        """Test case and underscores are folded."""
+        assert normalize_tag("Collar_Bone") == ("collar bone", 1.0)
+
+    def test_explicit_weight(self):
+        """Test explicit weight syntax."""
+        assert normalize_tag("(solo:1.5)") == ("solo", 1.5)
+
+    def test_implicit_weight(self):
+        """Test nested parentheses multiply by 1.1."""
+        assert normalize_tag("((smile))") == ("smile", 1.21)
+
+    def test_escaped_parens_not_weight(self):
+        """Test escaped brackets are part of the key, not weights."""
+        assert normalize_tag("\\(fate\\)") == ("(fate)", 1.0)
+
+    def test_separate_groups_not_unwrapped(self):
+        """Test "(a) (b)" is not treated as one weighted group."""
+        assert normalize_tag("(a) (b)") == ("(a) (b)", 1.0)
+
+
+class TestDedupe:
+    """Tests for duplicate tag elimination."""
+
+    def test_keeps_first_position(self):
+        """Test the first occurrence keeps its place."""
+        assert dedupe_prompt("8k, masterpiece, 1girl, 8K, Masterpiece") == (
+            "8k, masterpiece, 1girl"
+        )
+
+    def test_keeps_highest_weight(self):
+        """Test a higher-weight duplicate replaces the earlier text."""
+        assert dedupe_prompt("messy_hair, solo, (messy hair:1.3), (solo:0.8)") == (
+            "(messy hair:1.3), solo"
+        )
+
+    def test_across_lists(self):
+        """Test duplicates are removed across layers."""
+        assert dedupe_tag_lists([["a", "b"], ["B", "(a:1.2)"], ["c"]]) == [
+            ["(a:1.2)", "b"],
+            [],
+            ["c"],
+        ]
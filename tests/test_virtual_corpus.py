@@ -0,0 +1,183 @@
+"""Unit tests for virtual multi-file corpora."""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import corpus_cache, virtual_corpus
+from core.corpus_cache import CorpusCache
+from core.file_utils import parse_prompt_file
+from core.virtual_corpus import (
+    VirtualEntries,
+    count_entries,
+    file_version,
+    is_virtual_source,
+    resolve_sources,
+)
+
+FILES = {
+    "chars_a.txt": "1girl, red hair\tAlice\n\nsmile\tBea\n",
+    "chars_b.txt": "",
+    "chars_c.txt": "1boy\tCid\n(blue eyes:1.2)\tベアトリス\nsolo\tDee\n",
+}
+
+
+@pytest.fixture
+def shards(tmp_path):
+    """Three character files, one of them empty."""
+    for name, text in FILES.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return tmp_path
+
+
+def concatenated(directory, names):
+    """Entries of several files parsed one after another."""
+    return [
+        entry for name in names for entry in parse_prompt_file(str(directory / name))
+    ]
+
+
+class TestResolveSources:
+    """Tests for glob and manifest resolution."""
+
+    def test_is_virtual_source(self):
+        """Test plain file paths are not virtual sources."""
+        assert not is_virtual_source("/prompts/chars.txt")
+        assert is_virtual_source("/prompts/chars_*.txt")
+        assert is_virtual_source("/prompts/all.manifest")
+
+    def test_glob_sorted(self, shards):
+        """Test a glob matches files in path order."""
+        files = resolve_sources(str(shards / "chars_*.txt"))
+        assert [os.path.basename(f) for f in files] == sorted(FILES)
+
+    def test_manifest(self, shards):
+        """Test manifest lines are relative, commented and de-duplicated."""
+        manifest = shards / "all.manifest"
+        manifest.write_text("# newest first\nchars_c.txt\n\nchars_*.txt\n")
+        files = resolve_sources(str(manifest))
+        assert [os.path.basename(f) for f in files] == [
+            "chars_c.txt",
+            "chars_a.txt",
+            "chars_b.txt",
+        ]
+
+    def test_skips_companions_and_databases(self, shards):
+        """Test a broad glob keeps only the .txt prompt files."""
+        (shards / "chars_a.flux.tsv").write_text("Alice\tcaption\n", encoding="utf-8")
+        (shards / "chars.db").write_bytes(b"SQLite format 3\0")
+        files = resolve_sources(str(shards / "chars*"))
+        assert [os.path.basename(f) for f in files] == sorted(FILES)
+        manifest = shards / "all.manifest"
+        manifest.write_text("chars.db\nchars_a.flux.tsv\nchars_b.txt\n")
+        assert [os.path.basename(f) for f in resolve_sources(str(manifest))] == [
+            "chars_b.txt"
+        ]
+
+    def test_no_match(self, shards):
+        """Test an empty match and a missing manifest raise FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            resolve_sources(str(shards / "styles_*.txt"))
+        with pytest.raises(FileNotFoundError):
+            resolve_sources(str(shards / "missing.manifest"))
+
+    def test_members_outside_directory(self, shards):
+        """Test manifest entries, patterns and symlinks can't escape."""
+        outside = shards / "outside"
+        outside.mkdir()
+        (outside / "secret.txt").write_text("secret\tS\n")
+        inner = shards / "inner"
+        inner.mkdir()
+        (inner / "sub").mkdir()
+        (inner / "up.manifest").write_text("../outside/secret.txt\n")
+        with pytest.raises(PermissionError):
+            resolve_sources(str(inner / "up.manifest"))
+        with pytest.raises(PermissionError):
+            resolve_sources(str(inner / "*" / ".." / ".." / "outside" / "*.txt"))
+        (inner / "link.txt").symlink_to(outside / "secret.txt")
+        with pytest.raises(PermissionError):
+            resolve_sources(str(inner / "*.txt"))
+
+
+class TestVirtualEntries:
+    """Tests for prefix-sum indexing across files."""
+
+    def test_count_entries_cached(self, shards):
+        """Test counts skip blank lines and are cached per file version."""
+        path = shards / "chars_a.txt"
+        assert count_entries(str(path)) == 2
+        assert virtual_corpus._counts[file_version(str(path))] == 2
+        path.write_text("one\ttwo\n", encoding="utf-8")
+        assert count_entries(str(path)) == 1
+
+    def test_matches_concatenation(self, shards):
+        """Test global indexing equals parsing the files back to back."""
+        files = resolve_sources(str(shards / "chars_*.txt"))
+        loaded = []
+
+        def load(path):
+            loaded.append(os.path.basename(path))
+            return parse_prompt_file(path)
+
+        entries = VirtualEntries(files, [count_entries(f) for f in files], load)
+        expected = concatenated(shards, sorted(FILES))
+        assert len(entries) == 5
+        # Only the file holding the entry is loaded
+        assert entries[3] == expected[3]
+        assert loaded == ["chars_c.txt"]
+        assert entries.locate(2) == (2, 0)
+        assert entries.locate(-1) == (2, 2)
+        assert [entries[i] for i in range(5)] == expected
+        assert entries[1:4] == expected[1:4]
+        assert list(entries) == expected
+        with pytest.raises(IndexError):
+            entries[5]
+
+
+class TestCorpusCacheVirtual:
+    """Tests for virtual sources in CorpusCache."""
+
+    def test_union_and_rebuild(self, shards):
+        """Test a glob corpus spans its files and rebuilds on member changes."""
+        cache = CorpusCache(max_files=8)
+        pattern = str(shards / "chars_*.txt")
+        corpus = cache.get(pattern)
+        assert list(corpus.entries) == concatenated(shards, sorted(FILES))
+        assert cache.get(pattern) is corpus
+
+        (shards / "chars_b.txt").write_text("new\tEve\n", encoding="utf-8")
+        rebuilt = cache.get(pattern)
+        assert rebuilt is not corpus
+        assert len(rebuilt) == 6
+        assert rebuilt.entries[2].character_name == "Eve"
+
+        (shards / "chars_d.txt").write_text("last\tFay\n", encoding="utf-8")
+        assert cache.get(pattern).entries[-1].character_name == "Fay"
+
+    def test_members_do_not_evict(self, tmp_path, monkeypatch):
+        """Test random access over many members parses each one once."""
+        names = [f"part_{i:02}.txt" for i in range(10)]
+        for i, name in enumerate(names):
+            (tmp_path / name).write_text(f"tag{i}a\tA\ntag{i}b\tB\n")
+        parsed = []
+        parse = corpus_cache.parse_prompt_file
+        monkeypatch.setattr(
+            corpus_cache,
+            "parse_prompt_file",
+            lambda path: parsed.append(path) or parse(path),
+        )
+
+        cache = CorpusCache(max_files=4)
+        pattern = str(tmp_path / "part_*.txt")
+        corpus = cache.get(pattern)
+        rng = random.Random(0)
+        for _ in range(100):
+            index = rng.randrange(len(corpus))
+            assert corpus.entries[index].tags == f"tag{index // 2}{'ab'[index % 2]}"
+        assert sorted(parsed) == sorted(set(parsed))
+        assert cache.get(pattern) is corpus